@@ -155,6 +155,7 @@ def apply_loadout(name, project_root=None, soft=False, external_vram=0.0):
                 "port": port,
                 "role": role,
                 "pid": existing_pids.get(port),
+                "params": params,
                 "log_path": os.path.join(session_dir, f"svc_{role}_{sid.replace('/', '--').replace(':', '--')}.log")
             })
             continue
@@ -248,6 +249,7 @@ def apply_loadout(name, project_root=None, soft=False, external_vram=0.0):
             "port": port,
             "role": role,
             "pid": active_pid,
+            "params": params,
             "log_path": log_file
         })
 
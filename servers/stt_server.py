@@ -1,18 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect, Request
 from fastapi.responses import JSONResponse
 import torch
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio, __version__ as FW_VERSION
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 import io
 import os
 import sys
+import json
 import time
+import queue
+import bisect
+import asyncio
 import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import Optional
 import numpy as np
 
 # Allow importing from parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import load_config
+from utils.edge.pcm import unpack_header, HEADER_SIZE
+from utils.infra.disconnect import ClientDisconnected, await_job
 from utils.console import ensure_utf8_output
 
 # Ensure UTF-8 output for Windows console
@@ -49,52 +59,491 @@ if not args.stub:
     print(f"Warming up STT [{model_id}] (First-time kernel spin-up)...")
     warmup_audio = np.zeros(16000, dtype=np.float32) # 1s of silence at 16kHz
     # Use deterministic settings for warmup if in benchmark mode
-    warmup_beam = 1 if args.benchmark_mode else 5
-    list(model.transcribe(warmup_audio, beam_size=warmup_beam)) # Force evaluation
+    # Warm both decoding paths (greedy for short clips, beam for long ones)
+    list(model.transcribe(warmup_audio, beam_size=1))
+    if not args.benchmark_mode: list(model.transcribe(warmup_audio, beam_size=5)) # Force evaluation
     print(f"STT {model_id} loaded and WARM on port {args.port} (Benchmark Mode: {args.benchmark_mode}).")
 else:
     print(f"STT {model_id} STUB ready on port {args.port}.")
 
+# --- INFERENCE WORKER ---
+SAMPLE_RATE = 16000
+CHUNK_S = 30.0  # Whisper context window
+# faster-whisper 1.2+ reads batched clip_timestamps in seconds and decodes each clip on its own. Older releases
+# read them as sample indices and merge them all into a single chunk, so cross-request batching needs 1.2+.
+CLIP_BATCHING = tuple(int(p) for p in FW_VERSION.split(".")[:2]) >= (1, 2)
+STUB_TEXT = "This is a stubbed transcription for testing plumbing."
+
+class QueueFullError(Exception):
+    pass
+
+class DecodePolicy:
+    """
+    Per-request decoding options.
+    `adaptive` (default) decodes clips up to `long_clip_s` greedily and switches to beam search above it,
+    `fast` is always greedy (lowest latency), `accurate` always uses `beam_size`.
+    Benchmark mode pins greedy decoding so results stay comparable across runs.
+    """
+    NAMES = ("adaptive", "fast", "accurate")
+
+    def __init__(self, policy: str = "adaptive", beam_size: int = 5, long_clip_s: float = 8.0, vad_filter: bool = False, without_timestamps: bool = True):
+        if policy not in self.NAMES:
+            raise ValueError(f"Unknown decode policy '{policy}' (expected one of {', '.join(self.NAMES)}).")
+        self.policy = policy
+        self.beam_size = max(1, int(beam_size))
+        self.long_clip_s = float(long_clip_s)
+        self.vad_filter = bool(vad_filter)
+        self.without_timestamps = bool(without_timestamps)
+
+    def with_overrides(self, policy: Optional[str] = None, beam_size: Optional[int] = None, vad_filter: Optional[bool] = None, without_timestamps: Optional[bool] = None) -> "DecodePolicy":
+        return DecodePolicy(
+            policy or self.policy, beam_size or self.beam_size, self.long_clip_s,
+            self.vad_filter if vad_filter is None else vad_filter,
+            self.without_timestamps if without_timestamps is None else without_timestamps
+        )
+
+    def options(self, duration_s: float) -> dict:
+        if args.benchmark_mode or self.policy == "fast":
+            beam = 1
+        elif self.policy == "accurate":
+            beam = self.beam_size
+        else:
+            beam = self.beam_size if duration_s > self.long_clip_s else 1
+        return {"beam_size": beam, "vad_filter": self.vad_filter, "without_timestamps": self.without_timestamps}
+
+class LanguageCache:
+    """
+    Language hints per client session. Once detection is confident (`min_probability`), later requests of the
+    same session pass the language explicitly and skip detection. Bounded LRU over sessions.
+    """
+    def __init__(self, min_probability: float = 0.8, capacity: int = 256):
+        self.min_probability = min_probability
+        self.capacity = capacity
+        self._langs: OrderedDict = OrderedDict()
+
+    def get(self, session_id: Optional[str]) -> Optional[str]:
+        if not session_id or session_id not in self._langs: return None
+        self._langs.move_to_end(session_id)
+        return self._langs[session_id]
+
+    def observe(self, session_id: Optional[str], language: Optional[str], probability: float):
+        if not session_id or not language or probability < self.min_probability: return
+        self._langs[session_id] = language
+        self._langs.move_to_end(session_id)
+        while len(self._langs) > self.capacity:
+            self._langs.popitem(last=False)
+
+    def __len__(self):
+        return len(self._langs)
+
+class InferenceJob:
+    __slots__ = ("audio", "language", "prompt", "options", "future", "enqueued_t")
+
+    def __init__(self, audio: np.ndarray, language: Optional[str], prompt: Optional[str], options: dict):
+        self.audio = audio
+        self.language = language
+        self.prompt = prompt
+        self.options = options
+        self.future = Future()
+        self.enqueued_t = time.perf_counter()
+
+    @property
+    def batchable(self) -> bool:
+        # Batched decoding shares one language, prompt and beam across the batch (VAD is replaced by clip timestamps)
+        return self.language is not None and not self.prompt and not self.options.get("vad_filter")
+
+    @property
+    def batch_key(self):
+        return (self.language, self.options.get("beam_size")) if self.batchable else id(self)
+
+class InferenceWorker:
+    """
+    Owns the model on a dedicated thread so decoding never blocks the event loop.
+    Jobs that arrive within `max_wait_ms` of each other (up to `max_batch`) and share a language are decoded
+    in one batched pass: their audio is laid out back to back and each one becomes a clip of the batched pipeline.
+    Everything else is decoded one job at a time. Jobs whose client disconnected before decoding started are dropped.
+    """
+    def __init__(self, model, max_batch: int = 8, max_wait_ms: float = 25.0, max_queue: int = 32):
+        self.model = model
+        self.batched = BatchedInferencePipeline(model=model) if model is not None and max_batch > 1 and CLIP_BATCHING else None
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = int(max_queue)
+        self.queue: queue.Queue = queue.Queue()
+        self.active = 0
+        self.completed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_job_s = 1.0
+        threading.Thread(target=self._run, name="stt-worker", daemon=True).start()
+
+    # --- Event loop side ---
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def busy(self) -> bool:
+        return self.active > 0
+
+    def retry_after(self) -> int:
+        """Rough seconds until the backlog clears."""
+        return max(1, int(round(self.depth * self.last_job_s / self.max_batch)))
+
+    async def submit(self, audio: np.ndarray, language: Optional[str] = None, prompt: Optional[str] = None, options: Optional[dict] = None, request: Optional[Request] = None):
+        """Returns (text, language, language_probability, queue_wait_s). Raises ClientDisconnected if `request`'s client left first."""
+        if self.depth >= self.max_queue:
+            raise QueueFullError(f"{self.depth} requests queued")
+        job = InferenceJob(audio, language, prompt, options or {"beam_size": 5})
+        self.queue.put(job)
+        return await await_job(job.future, request)
+
+    # --- Worker thread ---
+    def _collect(self) -> list:
+        batch = [self.queue.get()]
+        if not batch[0].batchable or self.batched is None: return batch
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0: break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            collected = self._collect()
+            jobs = [job for job in collected if job.future.set_running_or_notify_cancel()]  # Skips abandoned jobs
+            self.dropped += len(collected) - len(jobs)
+            if not jobs: continue
+            self.active = len(jobs)
+            # Group compatible jobs, keeping arrival order between groups
+            groups = {}
+            for job in jobs:
+                groups.setdefault(job.batch_key, []).append(job)
+            for group in groups.values():
+                start = time.perf_counter()
+                try:
+                    results = self._decode_batch(group) if len(group) > 1 else [self._decode_one(group[0])]
+                    for job, res in zip(group, results):
+                        job.future.set_result((*res, start - job.enqueued_t))
+                except Exception as e:
+                    for job in group:
+                        if not job.future.done(): job.future.set_exception(e)
+                self.last_job_s = (time.perf_counter() - start) / len(group)
+                self.completed += len(group)
+                self.batches += 1
+            self.active = 0
+
+    def _decode_one(self, job: InferenceJob) -> tuple[str, str, float]:
+        if self.model is None: return STUB_TEXT, job.language or "en", 1.0
+        segments, info = self.model.transcribe(
+            job.audio, language=job.language, initial_prompt=job.prompt or None,
+            condition_on_previous_text=False, **job.options
+        )
+        return "".join([segment.text for segment in segments]).strip(), info.language, info.language_probability
+
+    def _decode_batch(self, jobs: list) -> list[tuple[str, str, float]]:
+        """
+        Decodes several same-language jobs in one batched pass, each split into <= 30 s clips.
+        Clip bounds are laid out as integer sample offsets into the concatenated audio and handed over in seconds.
+        """
+        bounds, owners, offset = [], [], 0
+        chunk, min_clip = int(CHUNK_S * SAMPLE_RATE), SAMPLE_RATE // 100
+        for i, job in enumerate(jobs):
+            n = len(job.audio)
+            for pos in range(0, n, chunk):
+                end = min(n, pos + chunk)
+                if end - pos < min_clip: continue  # Nothing to decode; would blur the ms-rounded segment starts
+                bounds.append((offset + pos, offset + end))
+                owners.append(i)
+            offset += n
+        clips = [{"start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE} for start, end in bounds]
+        audio = np.concatenate([job.audio for job in jobs])
+        segments, info = self.batched.transcribe(
+            audio, language=jobs[0].language, beam_size=jobs[0].options.get("beam_size", 1),
+            clip_timestamps=clips, batch_size=len(clips), without_timestamps=True
+        )
+        starts = [c["start"] for c in clips]
+        texts = [[] for _ in jobs]
+        for segment in segments:
+            clip = max(0, bisect.bisect_right(starts, segment.start + 5e-3) - 1)
+            texts[owners[clip]].append(segment.text)
+        return [("".join(t).strip(), info.language, info.language_probability) for t in texts]
+
+stt_cfg = cfg.get('inference', {}).get('stt', {})
+worker = InferenceWorker(
+    model, max_batch=stt_cfg.get('max_batch', 8), max_wait_ms=stt_cfg.get('max_wait_ms', 25),
+    max_queue=stt_cfg.get('max_queue', 32)
+)
+decode_cfg = stt_cfg.get('decoding', {})
+default_policy = DecodePolicy(
+    decode_cfg.get('policy', 'adaptive'), decode_cfg.get('beam_size', 5), decode_cfg.get('long_clip_s', 8.0),
+    decode_cfg.get('vad_filter', False), decode_cfg.get('without_timestamps', True)
+)
+languages = LanguageCache(decode_cfg.get('language_confidence', 0.8), decode_cfg.get('session_capacity', 256))
+
+def parse_flag(value) -> Optional[bool]:
+    if value is None or value == "": return None
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+async def run_transcription(audio: np.ndarray, language: Optional[str], session_id: Optional[str], policy: DecodePolicy, request: Optional[Request] = None):
+    """
+    Decodes one request with its policy. Without an explicit language the session's cached hint is used;
+    confident detections are remembered for the session. Returns (text, language, probability, queue_wait, options, language_source).
+    """
+    hint = language or languages.get(session_id)
+    source = "request" if language else ("session" if hint else "detected")
+    options = policy.options(len(audio) / SAMPLE_RATE)
+    text, detected, probability, queue_wait = await worker.submit(audio, hint, None, options, request)
+    if source == "detected": languages.observe(session_id, detected, probability)
+    return text, detected, probability, queue_wait, options, source
+
+def transcription_response(text, detected, probability, processing_time, queue_wait, options, source) -> JSONResponse:
+    return JSONResponse(
+        content={"text": text, "language": detected, "detected_language": detected, "language_probability": probability, "decode": options},
+        headers={"X-Inference-Time": str(processing_time), "X-Queue-Wait": str(queue_wait), "X-Language-Source": source}
+    )
+
+def queue_full_response(e: Exception) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"error": f"STT queue full ({e})"}, headers={"Retry-After": str(worker.retry_after())})
+
 @app.get("/health")
 async def health():
-    res = {"status": "ready", "model": model_id, "port": args.port, "benchmark_mode": args.benchmark_mode, "stub": args.stub}
+    res = {
+        "status": "busy" if worker.busy else "ready", "model": model_id, "port": args.port,
+        "benchmark_mode": args.benchmark_mode, "stub": args.stub,
+        "queue_depth": worker.depth, "active": worker.active, "max_queue": worker.max_queue,
+        "completed": worker.completed, "batches": worker.batches, "dropped": worker.dropped,
+        "decode_policy": default_policy.policy, "language_sessions": len(languages)
+    }
     if args.stub:
         res["service"] = "stt_stub"
     return res
 
+def disconnected_response() -> JSONResponse:
+    return JSONResponse(status_code=499, content={"error": "client disconnected"})
+
 @app.post("/transcribe")
 async def transcribe(
+    request: Request,
     file: UploadFile = File(...),
-    language: Optional[str] = Form(None)
+    language: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    policy: Optional[str] = Form(None),
+    beam_size: Optional[int] = Form(None),
+    vad_filter: Optional[str] = Form(None),
+    without_timestamps: Optional[str] = Form(None)
 ):
     try:
+        decode = default_policy.with_overrides(policy, beam_size, parse_flag(vad_filter), parse_flag(without_timestamps))
         audio_bytes = await file.read()
         
         start_time = time.perf_counter()
         
         if args.stub:
-            text = "This is a stubbed transcription for testing plumbing."
-            detected_lang = language or "en"
+            audio = np.zeros(0, dtype=np.float32)
         else:
-            audio_file = io.BytesIO(audio_bytes)
-            # Deterministic settings for benchmarking
-            beam_size = 1 if args.benchmark_mode else 5
-            segments, info = model.transcribe(audio_file, beam_size=beam_size, language=language if language else None)
-            text = "".join([segment.text for segment in segments]).strip()
-            detected_lang = info.language
+            audio = await asyncio.to_thread(decode_audio, io.BytesIO(audio_bytes), SAMPLE_RATE)
+        text, detected_lang, prob, queue_wait, options, source = await run_transcription(audio, language or None, session_id, decode, request)
         
         processing_time = time.perf_counter() - start_time
         
-        print(f"STT [{model_id}] Result: [{text}] (Took {processing_time:.3f}s)")
+        print(f"STT [{model_id}] Result: [{text}] (Took {processing_time:.3f}s, queued {queue_wait:.3f}s, beam {options['beam_size']}, lang {source})")
         
-        return JSONResponse(
-            content={"text": text, "language": detected_lang, "detected_language": detected_lang},
-            headers={"X-Inference-Time": str(processing_time)}
-        )
+        return transcription_response(text, detected_lang, prob, processing_time, queue_wait, options, source)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except ClientDisconnected:
+        return disconnected_response()
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        print(f"STT Error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+def pcm_to_float32(buf, sample_rate: int, dtype: str = "int16", channels: int = 1) -> np.ndarray:
+    """Wraps raw PCM with np.frombuffer (no container decoding) and converts it to 16 kHz mono float32."""
+    samples = np.frombuffer(buf, dtype="<i2" if dtype == "int16" else "<f4")
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    samples = samples.astype(np.float32) / 32768.0 if dtype == "int16" else samples.astype(np.float32, copy=False)
+    if sample_rate != SAMPLE_RATE and len(samples):
+        n_out = int(round(len(samples) * SAMPLE_RATE / sample_rate))
+        samples = np.interp(np.linspace(0, len(samples) - 1, n_out), np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+@app.post("/transcribe_pcm")
+async def transcribe_pcm(request: Request, language: Optional[str] = None, session_id: Optional[str] = None, policy: Optional[str] = None,
+                         beam_size: Optional[int] = None, vad_filter: Optional[str] = None, without_timestamps: Optional[str] = None):
+    """
+    Body: PCM header (`utils/edge/pcm.py`) followed by raw samples. Skips container decoding entirely.
+    Query params mirror the `/transcribe` form fields (language, session and decoding policy).
+    """
+    try:
+        decode = default_policy.with_overrides(policy, beam_size, parse_flag(vad_filter), parse_flag(without_timestamps))
+        body = await request.body()
+        sample_rate, dtype, channels = unpack_header(body)
+        start_time = time.perf_counter()
+        audio = pcm_to_float32(memoryview(body)[HEADER_SIZE:], sample_rate, dtype, channels)
+        text, detected_lang, prob, queue_wait, options, source = await run_transcription(audio, language or None, session_id, decode, request)
+        processing_time = time.perf_counter() - start_time
+
+        print(f"STT [{model_id}] PCM Result: [{text}] ({len(audio) / SAMPLE_RATE:.2f}s audio, took {processing_time:.3f}s, queued {queue_wait:.3f}s, beam {options['beam_size']}, lang {source})")
+        return transcription_response(text, detected_lang, prob, processing_time, queue_wait, options, source)
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except ClientDisconnected:
+        return disconnected_response()
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         print(f"STT Error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+# --- STREAMING SESSIONS ---
+STREAM_RATE = SAMPLE_RATE
+
+class StreamSession:
+    """
+    Accumulates live 16 kHz audio and cuts it into utterance segments with Silero VAD.
+    A segment is closed once `min_silence_ms` of silence follows speech (or it hits `max_segment_s`);
+    closed segments are decoded while the speaker keeps talking, so only the open tail remains at the end.
+    """
+    def __init__(self, min_silence_ms: int = 500, max_segment_s: float = 20.0, vad_step_s: float = 0.3, speech_pad_ms: int = 200):
+        self.vad = VadOptions(min_silence_duration_ms=min_silence_ms, speech_pad_ms=speech_pad_ms)
+        self.min_silence = int(min_silence_ms * STREAM_RATE / 1000)
+        self.max_segment = int(max_segment_s * STREAM_RATE)
+        self.vad_step = int(vad_step_s * STREAM_RATE)
+        self.pad = int(speech_pad_ms * STREAM_RATE / 1000)
+        self.pending = np.zeros(0, dtype=np.float32)  # Audio since the last cut
+        self.offset = 0                               # Absolute sample index of pending[0]
+        self._unchecked = 0
+
+    def append(self, samples: np.ndarray):
+        self.pending = np.concatenate((self.pending, samples))
+        self._unchecked += len(samples)
+
+    def next_cut(self) -> Optional[tuple[int, np.ndarray]]:
+        """Runs VAD over the open audio; returns (start_offset, segment) when a segment is complete."""
+        if self._unchecked < self.vad_step: return None
+        self._unchecked = 0
+        n = len(self.pending)
+        speech = get_speech_timestamps(self.pending, self.vad)
+        if not speech:
+            # Pure silence: keep a short pre-roll only
+            keep = min(n, self.pad)
+            self.offset += n - keep
+            self.pending = self.pending[n - keep:]
+            return None
+        end = speech[-1]["end"]
+        if n - end >= self.min_silence:
+            return self._cut(min(n, end + self.pad))
+        if n >= self.max_segment:
+            # Forced cut: prefer the last pause between speech chunks, otherwise cut everything
+            pause = speech[-2]["end"] if len(speech) > 1 else 0
+            return self._cut(pause or n)
+        return None
+
+    def flush(self) -> Optional[tuple[int, np.ndarray]]:
+        if not len(self.pending): return None
+        return self._cut(len(self.pending))
+
+    def _cut(self, at: int) -> tuple[int, np.ndarray]:
+        start, segment = self.offset, self.pending[:at]
+        self.pending = self.pending[at:]
+        self.offset += at
+        return start, segment
+
+@app.websocket("/stream")
+async def stream(ws: WebSocket):
+    """
+    Streaming session. Query params: `sample_rate` (default 16000), `language`, `min_silence_ms`, `max_segment_s`,
+    plus `session_id` (language hint cache) and the decoding policy fields (`policy`, `beam_size`).
+    Client -> server: binary frames of mono int16 PCM, then a text frame `{"event": "end"}`.
+    Server -> client: `{"type": "partial", "segment", "text", "start", "end", "decode_s"}` per closed segment,
+    then `{"type": "final", "text", "language", "segments", "tail_decode_s"}`. Invalid query parameters get
+    `{"type": "error", "error"}` before the session starts.
+    """
+    await ws.accept()
+    q = ws.query_params
+    session_id = q.get("session_id") or None
+    language = q.get("language") or languages.get(session_id)
+    detect = language is None
+    try:
+        sample_rate = int(q.get("sample_rate", STREAM_RATE))
+        decode = default_policy.with_overrides(q.get("policy") or None, int(q["beam_size"]) if q.get("beam_size") else None, parse_flag(q.get("vad_filter")))
+        session = StreamSession(int(q.get("min_silence_ms", 500)), float(q.get("max_segment_s", 20.0)))
+    except ValueError as e:  # Unknown policy or malformed number in the query string
+        await ws.send_json({"type": "error", "error": str(e)})
+        await ws.close()
+        return
+    segments_q: asyncio.Queue = asyncio.Queue()
+    texts = []
+
+    async def decoder():
+        nonlocal language
+        tail_decode_s = 0.0
+        while True:
+            item = await segments_q.get()
+            if item is None: break
+            start, audio, is_tail = item
+            t0 = time.perf_counter()
+            if not len(audio) and not args.stub:
+                text, detected = "", language
+            elif args.stub:
+                text, detected = (STUB_TEXT if is_tail else ""), (language or "en")
+            else:
+                text, detected, prob, _ = await worker.submit(audio, language, " ".join(texts[-2:]), decode.options(len(audio) / STREAM_RATE))
+                if detect and not language: languages.observe(session_id, detected, prob)
+            decode_s = time.perf_counter() - t0
+            if is_tail: tail_decode_s = decode_s
+            language = language or detected  # Lock the language after the first segment
+            if not text: continue
+            texts.append(text)
+            await ws.send_json({
+                "type": "partial", "segment": len(texts) - 1, "text": text,
+                "start": start / STREAM_RATE, "end": (start + len(audio)) / STREAM_RATE, "decode_s": decode_s
+            })
+        return tail_decode_s
+
+    decode_task = asyncio.create_task(decoder())
+    try:
+        while True:
+            msg = await ws.receive()
+            if msg.get("type") == "websocket.disconnect": raise WebSocketDisconnect()
+            if msg.get("bytes"):
+                session.append(pcm_to_float32(msg["bytes"], sample_rate))
+                if not args.stub:
+                    cut = await asyncio.to_thread(session.next_cut)
+                    if cut: await segments_q.put((*cut, False))
+            elif msg.get("text"):
+                if json.loads(msg["text"]).get("event") == "end": break
+
+        tail = session.flush()
+        await segments_q.put((*tail, True) if tail else (0, np.zeros(0, dtype=np.float32), True))
+        await segments_q.put(None)
+        tail_decode_s = await decode_task
+        text = " ".join(texts).strip()
+        print(f"STT [{model_id}] Stream result: [{text}] ({len(texts)} segments, tail decode {tail_decode_s:.3f}s)")
+        await ws.send_json({"type": "final", "text": text, "language": language or "en", "segments": len(texts), "tail_decode_s": tail_decode_s})
+        await ws.close()
+    except WebSocketDisconnect:
+        decode_task.cancel()
+    except QueueFullError as e:
+        decode_task.cancel()
+        await ws.send_json({"type": "error", "error": f"STT queue full ({e})", "retry_after": worker.retry_after()})
+        await ws.close()
+    except Exception as e:
+        decode_task.cancel()
+        print(f"STT Stream Error: {e}")
+        try:
+            await ws.send_json({"type": "error", "error": str(e)})
+            await ws.close()
+        except Exception: pass
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -1,12 +1,21 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 import torch
 import io
 import os
 import sys
 import time
+import queue
+import asyncio
 import argparse
+import hashlib
+import itertools
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Optional
 import soundfile as sf
 import numpy as np
 from loguru import logger
@@ -42,20 +51,401 @@ args, unknown = parser.parse_known_args()
 
 # Allow importing from parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import load_config
+from utils import load_config, resolve_path
+from utils.edge.pcm import pack_header, PCM_MEDIA_TYPE
+from utils.infra.disconnect import ClientDisconnected, await_job
 
 cfg = load_config()
+tts_cfg = dict(cfg.get('inference', {}).get('tts', {}))
+cache_cfg = tts_cfg.pop('cache', {}) or {}
+voice_cfg = tts_cfg.pop('voices', {}) or {}
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def default_seed() -> Optional[int]:
+    """Benchmark mode is deterministic (seed 42); otherwise sampling is left unseeded."""
+    return 42 if args.benchmark_mode else None
 VARIANT_ID = args.variant
 device = cfg['device'] if torch.cuda.is_available() else "cpu"
 
+# --- SYNTHESIS WORKER ---
+# Lower rank is served first. Interactive turns always beat speculative prefetch and benchmark traffic.
+PRIORITIES = {"interactive": 0, "speculative": 1, "benchmark": 2, "prewarm": 3}
+
+class QueueFullError(Exception):
+    pass
+
+class SynthesisJob:
+    __slots__ = ("text", "language_id", "priority", "ordinal", "seed", "voice_id", "sink", "future", "enqueued_t", "abandoned")
+
+    def __init__(self, text: str, language_id: str, priority: int, ordinal: int, seed: Optional[int] = None, voice_id: Optional[str] = None, sink: Optional[Callable] = None):
+        self.text = text
+        self.language_id = language_id
+        self.priority = priority
+        self.ordinal = ordinal
+        self.seed = seed
+        self.voice_id = voice_id
+        self.sink = sink  # Streaming jobs: called from the worker thread with each float32 chunk
+        self.future = Future()
+        self.enqueued_t = time.perf_counter()
+        self.abandoned = False
+
+    def cancel(self):
+        """The client went away: a queued job is skipped, a streaming job in progress stops at its next chunk."""
+        self.abandoned = True
+        self.future.cancel()
+
+class SynthesisWorker:
+    """
+    Owns the TTS model on a dedicated thread; request handlers only enqueue and await.
+    The queue is ordered by (priority, sentence ordinal, arrival), so the head-of-line sentence of an
+    interactive turn is always synthesized next. If the variant exposes `generate_batch`, short queued
+    sentences of the same priority and language are micro-batched into one call.
+    Streaming jobs are never batched; their chunks are handed to the job's sink as the model yields them.
+    Jobs whose client disconnected are dropped before synthesis (see `SynthesisJob.cancel`).
+    """
+    def __init__(self, model, variant: str, voices: Optional["VoiceConditioningCache"] = None, max_queue: int = 64, max_batch: int = 4, batch_max_chars: int = 80):
+        self.model = model
+        self.variant = variant
+        self.voices = voices
+        self.max_batch = max(1, int(max_batch)) if hasattr(model, "generate_batch") else 1
+        self.batch_max_chars = batch_max_chars
+        self.queue: queue.PriorityQueue = queue.PriorityQueue()  # Unbounded: the worker must always be able to re-queue held jobs
+        self.max_queue = max_queue  # Enforced in `enqueue`
+        self._arrival = itertools.count()
+        self.active = 0
+        self.completed = 0
+        self.dropped = 0
+        self.last_job_s = 1.0
+        threading.Thread(target=self._run, name="tts-worker", daemon=True).start()
+
+    # --- Event loop side ---
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def busy(self) -> bool:
+        return self.active > 0
+
+    @property
+    def sample_rate(self) -> int:
+        return self.model.sr if self.model is not None else 24000
+
+    def retry_after(self) -> int:
+        return max(1, int(round(self.depth * self.last_job_s)))
+
+    def enqueue(self, text: str, language_id: str = "en", priority: str = "interactive", ordinal: int = 0, seed: Optional[int] = None, voice_id: Optional[str] = None, sink: Optional[Callable] = None) -> SynthesisJob:
+        """Queues a job without waiting for it. Raises QueueFullError when the queue is at capacity."""
+        if voice_id and self.model is not None and (self.voices is None or voice_id not in self.voices.voices):
+            raise ValueError(f"Unknown voice_id: {voice_id}")
+        if self.depth >= self.max_queue:
+            raise QueueFullError(f"{self.depth} requests queued")
+        job = SynthesisJob(text, language_id, PRIORITIES.get(priority, 0), int(ordinal), seed, voice_id, sink)
+        self.queue.put_nowait((job.priority, job.ordinal, next(self._arrival), job))
+        return job
+
+    async def submit(self, text: str, language_id: str = "en", priority: str = "interactive", ordinal: int = 0, seed: Optional[int] = None, voice_id: Optional[str] = None, request: Optional[Request] = None):
+        """Raises ClientDisconnected if `request`'s client left before the job finished."""
+        job = self.enqueue(text, language_id, priority, ordinal, seed, voice_id)
+        return await await_job(job.future, request)
+
+    # --- Worker thread ---
+    def _collect(self) -> list:
+        first = self.queue.get()[-1]
+        jobs = [first]
+        if self.max_batch == 1 or first.sink or len(first.text) > self.batch_max_chars: return jobs
+        held = []
+        while len(jobs) < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            job = item[-1]
+            if not job.sink and job.priority == first.priority and job.language_id == first.language_id and job.seed == first.seed and job.voice_id == first.voice_id and len(job.text) <= self.batch_max_chars:
+                jobs.append(job)
+            else:
+                held.append(item)
+        for item in held: self.queue.put_nowait(item)
+        return jobs
+
+    def _run(self):
+        while True:
+            collected = self._collect()
+            jobs = [job for job in collected if job.future.set_running_or_notify_cancel()]  # Skips abandoned jobs
+            self.dropped += len(collected) - len(jobs)
+            if not jobs: continue
+            self.active = len(jobs)
+            start = time.perf_counter()
+            try:
+                wavs = self._synthesize(jobs)
+                synth_s = (time.perf_counter() - start) / len(jobs)  # Per job: a micro-batch's time is shared by its jobs
+                for job, (wav, sr) in zip(jobs, wavs):
+                    job.future.set_result((wav, sr, start - job.enqueued_t, synth_s))
+            except Exception as e:
+                for job in jobs:
+                    if not job.future.done(): job.future.set_exception(e)
+            self.last_job_s = (time.perf_counter() - start) / len(jobs)
+            self.completed += len(jobs)
+            self.active = 0
+
+    def _synthesize(self, jobs: list) -> list:
+        if self.model is None:
+            time.sleep(0.01)
+            results = [(np.zeros(24000, dtype=np.float32), 24000) for _ in jobs]  # 1s of silence at 24kHz
+            if jobs[0].sink: jobs[0].sink(results[0][0])
+            return results
+
+        if self.voices:
+            self.voices.activate(jobs[0].voice_id)
+        if jobs[0].seed is not None:
+            torch.manual_seed(jobs[0].seed)
+        if jobs[0].sink:
+            return [(self._synthesize_stream(jobs[0]), self.model.sr)]
+        if len(jobs) > 1:
+            texts = [job.text for job in jobs]
+            if self.variant == "multilingual":
+                wavs = self.model.generate_batch(texts, language_id=jobs[0].language_id)
+            else:
+                wavs = self.model.generate_batch(texts)
+        elif self.variant == "multilingual":
+            wavs = [self.model.generate(jobs[0].text, jobs[0].language_id)]
+        else:
+            wavs = [self.model.generate(jobs[0].text)]
+        return [(wav.squeeze().cpu().numpy(), self.model.sr) for wav in wavs]
+
+    def _synthesize_stream(self, job: SynthesisJob) -> np.ndarray:
+        """Feeds vocoder chunks to the sink as they are produced; variants without `generate_stream` deliver one chunk."""
+        stream_fn = getattr(self.model, "generate_stream", None)
+        if stream_fn is None:
+            if self.variant == "multilingual":
+                wav = self.model.generate(job.text, job.language_id).squeeze().cpu().numpy()
+            else:
+                wav = self.model.generate(job.text).squeeze().cpu().numpy()
+            job.sink(wav)
+            return wav
+
+        kwargs = {"language_id": job.language_id} if self.variant == "multilingual" else {}
+        parts = []
+        for item in stream_fn(job.text, **kwargs):
+            if job.abandoned: break  # Client disconnected mid-stream
+            chunk = item[0] if isinstance(item, tuple) else item  # (audio_chunk, metrics) in streaming forks
+            chunk = chunk.squeeze().cpu().numpy()
+            parts.append(chunk)
+            job.sink(chunk)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+def encode_wav(wav_numpy: np.ndarray, sr: int) -> bytes:
+    out = io.BytesIO()
+    sf.write(out, wav_numpy, sr, format="WAV", subtype="PCM_16")
+    return out.getvalue()
+
+def to_pcm16(wav_numpy: np.ndarray) -> bytes:
+    return (np.clip(wav_numpy, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+# --- VOICE CONDITIONING ---
+class VoiceConditioningCache:
+    """
+    Keeps Chatterbox speaker conditionals (`model.conds`) per voice so `generate` never re-encodes a reference clip.
+    Entries are keyed by a hash of the reference audio bytes, held in an LRU on the model device and persisted to disk
+    (`Conditionals.save`) so a restart only reloads tensors. Only the worker thread calls `activate`.
+    """
+    def __init__(self, model, voices: dict, root: str, capacity: int = 8, exaggeration: float = 0.5):
+        self.model = model
+        self.voices = {vid: resolve_path(path) for vid, path in (voices or {}).items()}
+        self.root = root
+        self.capacity = max(1, int(capacity))
+        self.exaggeration = exaggeration
+        self.default = model.conds  # Built-in voice
+        self._lru: OrderedDict[str, object] = OrderedDict()
+        self._hashes: dict[str, tuple] = {}  # path -> (mtime, size, digest)
+        self.hits = self.disk_loads = self.encodes = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        memo = self._hashes.get(path)
+        if memo and memo[:2] == (st.st_mtime, st.st_size): return memo[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._hashes[path] = (st.st_mtime, st.st_size, digest)
+        return digest
+
+    def _load(self, voice_id: str):
+        path = self.voices[voice_id]
+        key = f"{self._digest(path)}-{self.exaggeration}"
+        conds = self._lru.get(key)
+        if conds is not None:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return conds
+
+        disk_path = os.path.join(self.root, f"{key}.pt")
+        if os.path.exists(disk_path):
+            conds = type(self.default).load(disk_path, map_location=device).to(device)
+            self.disk_loads += 1
+        else:
+            logger.info(f"🎙️ Encoding voice [{voice_id}] conditionals from {path}...")
+            self.model.prepare_conditionals(path, exaggeration=self.exaggeration)
+            conds = self.model.conds
+            conds.save(disk_path)
+            self.encodes += 1
+        self._lru[key] = conds
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+        return conds
+
+    def activate(self, voice_id: Optional[str]):
+        self.model.conds = self._load(voice_id) if voice_id else self.default
+
+    def stats(self) -> dict:
+        return {"voices": sorted(self.voices), "loaded": len(self._lru), "hits": self.hits, "disk_loads": self.disk_loads, "encodes": self.encodes}
+
+# --- PHRASE CACHE ---
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split()).casefold()
+
+class PhraseCache:
+    """
+    Content-addressed cache of synthesized WAV bytes.
+    Keys hash (variant, normalized text, language_id, seed). Lookups hit an in-memory LRU first, then an on-disk store;
+    both tiers are size-capped and evict least-recently-used entries. Disk I/O runs off the event loop.
+    """
+    def __init__(self, root: str, max_memory_mb: float = 64, max_disk_mb: float = 512):
+        self.root = root
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self.max_disk = int(max_disk_mb * 1024 * 1024)
+        self._mem: OrderedDict[str, bytes] = OrderedDict()
+        self._mem_bytes = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        if self.max_disk > 0:
+            os.makedirs(root, exist_ok=True)
+            entries = []
+            for name in os.listdir(root):
+                if name.endswith(".wav"):
+                    st = os.stat(os.path.join(root, name))
+                    entries.append((st.st_mtime, name[:-4], st.st_size))
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+
+    @staticmethod
+    def key(variant: str, text: str, language_id: str, seed: Optional[int], voice_id: Optional[str] = None) -> str:
+        raw = "\x1f".join([variant, normalize_text(text), language_id or "", str(seed), voice_id or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.wav")
+
+    def _remember(self, key: str, audio: bytes):
+        with self._lock:
+            if key in self._mem: return
+            self._mem[key] = audio
+            self._mem_bytes += len(audio)
+            while self._mem_bytes > self.max_memory and self._mem:
+                _, old = self._mem.popitem(last=False)
+                self._mem_bytes -= len(old)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Blocking lookup (memory, then disk)."""
+        with self._lock:
+            audio = self._mem.get(key)
+            if audio is not None:
+                self._mem.move_to_end(key)
+                self.hits["memory"] += 1
+                return audio
+            on_disk = key in self._disk
+        if on_disk:
+            try:
+                with open(self._path(key), "rb") as f: audio = f.read()
+                os.utime(self._path(key))
+                with self._lock:
+                    if key in self._disk: self._disk.move_to_end(key)
+                    self.hits["disk"] += 1
+                self._remember(key, audio)
+                return audio
+            except OSError:
+                with self._lock:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        """Blocking insert into both tiers."""
+        self._remember(key, audio)
+        if self.max_disk <= 0 or len(audio) > self.max_disk: return
+        with open(self._path(key), "wb") as f: f.write(audio)
+        with self._lock:
+            self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            evict = []
+            while self._disk_bytes > self.max_disk and self._disk:
+                old, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evict.append(old)
+        for old in evict:
+            try: os.remove(self._path(old))
+            except OSError: pass
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._mem or key in self._disk
+
+    def stats(self) -> dict:
+        hits = self.hits["memory"] + self.hits["disk"]
+        total = hits + self.misses
+        return {
+            "hits": hits, "memory_hits": self.hits["memory"], "disk_hits": self.hits["disk"], "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_entries": len(self._mem), "memory_mb": self._mem_bytes / 1048576,
+            "disk_entries": len(self._disk), "disk_mb": self._disk_bytes / 1048576
+        }
+
+async def synthesize_cached(text: str, language_id: str, priority: str, ordinal: int, seed: Optional[int], use_cache: bool = True, voice_id: Optional[str] = None, request: Optional[Request] = None) -> tuple[bytes, dict]:
+    """Returns WAV bytes plus response headers, going to the GPU only on a cache miss."""
+    cache = app.state.cache if use_cache else None
+    worker = app.state.worker
+    key = PhraseCache.key(VARIANT_ID, text, language_id, seed, voice_id)
+    if cache:
+        audio = await asyncio.to_thread(cache.get, key)
+        if audio is not None:
+            return audio, {"X-Cache": "HIT", "X-Inference-Time": "0", "X-Synthesis-Time": "0", "X-Queue-Wait": "0"}
+
+    wav_numpy, sr, queue_wait, processing_time = await worker.submit(text, language_id, priority, ordinal, seed, voice_id, request)
+    audio = await asyncio.to_thread(encode_wav, wav_numpy, sr)
+    if cache:
+        await asyncio.to_thread(cache.put, key, audio)
+    return audio, {"X-Cache": "MISS", "X-Inference-Time": str(processing_time), "X-Synthesis-Time": str(processing_time), "X-Queue-Wait": str(queue_wait)}
+
+async def prewarm_cache(phrases: list, language_id: str, seed: Optional[int]):
+    """Synthesizes missing phrases at the lowest priority so live traffic always goes first."""
+    missing = [p for p in phrases if PhraseCache.key(VARIANT_ID, p, language_id, seed) not in app.state.cache]
+    for phrase in missing:
+        try:
+            await synthesize_cached(phrase, language_id, "prewarm", 0, seed)
+        except Exception as e:
+            logger.warning(f"Phrase cache prewarm failed for [{phrase}]: {e}")
+    if missing: logger.info(f"🗄️ Phrase cache prewarmed {len(missing)}/{len(phrases)} phrases.")
+
+def create_cache() -> Optional[PhraseCache]:
+    if not cache_cfg.get('enabled', True): return None
+    root = os.path.join(PROJECT_ROOT, ".cache", "tts_phrases", VARIANT_ID + ("-stub" if args.stub else ""))
+    return PhraseCache(root, cache_cfg.get('max_memory_mb', 64), cache_cfg.get('max_disk_mb', 512))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- STARTUP ---
+    app.state.cache = create_cache()
     if args.stub:
         logger.info(f"🚀 TTS Server starting in STUB MODE (Variant: {VARIANT_ID})")
         app.state.model = None
         app.state.internal_variant = "stub"
         app.state.benchmark_mode = args.benchmark_mode
+        app.state.voices = None
+        app.state.worker = SynthesisWorker(None, "stub", **tts_cfg)
         app.state.is_ready = True
         yield
         return
@@ -92,7 +482,23 @@ async def lifespan(app: FastAPI):
         else:
             model.generate("warm")
         
+        # Voice conditionals are cached per reference clip; the built-in voice stays the default
+        voices = None
+        if hasattr(model, "prepare_conditionals") and getattr(model, "conds", None) is not None:
+            voices = VoiceConditioningCache(
+                model, voice_cfg.get('library', {}), os.path.join(PROJECT_ROOT, ".cache", "tts_voices", VARIANT_ID),
+                voice_cfg.get('capacity', 8), voice_cfg.get('exaggeration', 0.5)
+            )
+            for voice_id in voice_cfg.get('preload', []):
+                voices.activate(voice_id)
+            voices.activate(None)
+        app.state.voices = voices
+
+        # From here on only the worker thread touches the model
+        app.state.worker = SynthesisWorker(model, internal_variant, voices, **tts_cfg)
         app.state.is_ready = True
+        if app.state.cache and cache_cfg.get('prewarm'):
+            app.state.prewarm_task = asyncio.create_task(prewarm_cache(cache_cfg['prewarm'], cache_cfg.get('prewarm_language', 'en'), default_seed()))
         logger.info(f"✅ Model {VARIANT_ID} loaded and WARM on port {args.port} ({time.perf_counter() - start_warm:.1f}s).")
     except Exception as e:
         logger.critical(f"❌ CRITICAL ERROR: Failed to load model {VARIANT_ID}: {e}")
@@ -107,13 +513,29 @@ app.state.is_ready = False
 async def health():
     if not app.state.is_ready:
         return JSONResponse(status_code=503, content={"status": "STARTUP", "variant": VARIANT_ID})
-    res = {"status": "ON", "variant": VARIANT_ID, "port": args.port, "benchmark_mode": app.state.benchmark_mode}
+    worker = app.state.worker
+    res = {
+        "status": "ON", "variant": VARIANT_ID, "port": args.port, "benchmark_mode": app.state.benchmark_mode,
+        "busy": worker.busy, "queue_depth": worker.depth, "active": worker.active, "max_queue": worker.max_queue,
+        "completed": worker.completed, "dropped": worker.dropped, "max_batch": worker.max_batch
+    }
+    if app.state.cache:
+        res["cache"] = app.state.cache.stats()
+    if app.state.voices:
+        res["voices"] = app.state.voices.stats()
     if args.stub:
         res["service"] = "tts_stub"
     return res
 
 @app.post("/tts")
 async def tts(request: Request):
+    """
+    Body: `text`, `language_id`, optional `priority` ("interactive" | "speculative" | "benchmark")
+    and `ordinal` (sentence index within the turn; lower goes first within a priority).
+    Optional `seed` makes the output reproducible; benchmark mode defaults it to 42. `cache: false` bypasses the phrase cache.
+    Optional `voice_id` selects a voice from `inference.tts.voices.library` (the built-in voice otherwise).
+    """
+    worker = app.state.worker
     try:
         data = await request.json()
         text = data.get("text", "")
@@ -122,43 +544,85 @@ async def tts(request: Request):
         if not text:
             return Response(status_code=400, content="No text provided")
         
-        model = app.state.model
-        internal_variant = app.state.internal_variant
-        
         logger.debug(f"Generating [{VARIANT_ID}] TTS for: [{text[:50]}...]")
         
-        start_time = time.perf_counter()
-        
-        if internal_variant == "stub":
-            # Generate 1 second of silence at 24kHz
-            sr = 24000
-            wav_numpy = np.zeros(sr, dtype=np.float32)
-            out = io.BytesIO()
-            sf.write(out, wav_numpy, sr, format="WAV", subtype="PCM_16")
-            processing_time = 0.01
-        else:
-            if app.state.benchmark_mode:
-                torch.manual_seed(42)
-
-            if internal_variant == "multilingual":
-                wav = model.generate(text, language_id)
-            else:
-                wav = model.generate(text)
-            processing_time = time.perf_counter() - start_time
-            
-            wav_numpy = wav.squeeze().cpu().numpy()
-            out = io.BytesIO()
-            sf.write(out, wav_numpy, model.sr, format="WAV", subtype="PCM_16")
+        priority = data.get("priority", "benchmark" if app.state.benchmark_mode else "interactive")
+        seed = data.get("seed", default_seed())
+        # Benchmarks measure synthesis, so they skip the cache unless asked otherwise
+        use_cache = data.get("cache", not (app.state.benchmark_mode and cache_cfg.get('benchmark_bypass', True)))
+        audio, headers = await synthesize_cached(text, language_id, priority, data.get("ordinal", 0), seed, use_cache, data.get("voice_id"), request)
         
-        return Response(
-            content=out.getvalue(), 
-            media_type="audio/wav",
-            headers={"X-Inference-Time": str(processing_time)}
-        )
+        return Response(content=audio, media_type="audio/wav", headers=headers)
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"error": f"TTS queue full ({e})"}, headers={"Retry-After": str(worker.retry_after())})
+    except ClientDisconnected:
+        return JSONResponse(status_code=499, content={"error": "client disconnected"})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logger.error(f"Error generating TTS: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/tts/stream")
+async def tts_stream(request: Request):
+    """
+    Same body as `/tts`, but the response is a raw PCM stream (see `utils/edge/pcm.py`): a 12-byte header
+    (sample rate, int16, mono) followed by sample frames flushed as soon as the model yields them.
+    """
+    worker = app.state.worker
+    data = await request.json()
+    text = data.get("text", "")
+    language_id = data.get("language_id", "en")
+    if not text:
+        return Response(status_code=400, content="No text provided")
+
+    priority = data.get("priority", "benchmark" if app.state.benchmark_mode else "interactive")
+    seed = data.get("seed", default_seed())
+    use_cache = data.get("cache", not (app.state.benchmark_mode and cache_cfg.get('benchmark_bypass', True)))
+    cache = app.state.cache if use_cache else None
+    voice_id = data.get("voice_id")
+    key = PhraseCache.key(VARIANT_ID, text, language_id, seed, voice_id)
+
+    if cache:
+        audio = await asyncio.to_thread(cache.get, key)
+        if audio is not None:
+            wav_numpy, sr = await asyncio.to_thread(sf.read, io.BytesIO(audio), dtype="float32")
+            async def cached_body():
+                yield pack_header(sr, "int16", 1) + to_pcm16(wav_numpy)
+            return StreamingResponse(cached_body(), media_type=PCM_MEDIA_TYPE, headers={"X-Cache": "HIT"})
+
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    try:
+        job = worker.enqueue(text, language_id, priority, data.get("ordinal", 0), seed, voice_id, sink=lambda c: loop.call_soon_threadsafe(chunks.put_nowait, c))
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"error": f"TTS queue full ({e})"}, headers={"Retry-After": str(worker.retry_after())})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    done = asyncio.wrap_future(job.future)
+    done.add_done_callback(lambda _: chunks.put_nowait(None))  # Scheduled after every chunk callback
+
+    async def body():
+        try:
+            yield pack_header(worker.sample_rate, "int16", 1)
+            while True:
+                chunk = await chunks.get()
+                if chunk is None: break
+                yield await asyncio.to_thread(to_pcm16, chunk)
+        except BaseException:
+            job.cancel()  # Client disconnected: drop the job if queued, stop it if already streaming
+            raise
+        try:
+            wav_numpy, sr, queue_wait, processing_time = done.result()
+        except Exception as e:
+            logger.error(f"Error streaming TTS: {e}")
+            return
+        logger.debug(f"Streamed [{VARIANT_ID}] TTS (queued {queue_wait:.3f}s, synthesis {processing_time:.3f}s)")
+        if cache:
+            await asyncio.to_thread(lambda: cache.put(key, encode_wav(wav_numpy, sr)))
+
+    return StreamingResponse(body(), media_type=PCM_MEDIA_TYPE, headers={"X-Cache": "MISS"})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -26,7 +26,9 @@ from test_utils.mocks import get_mock_implementation
 from test_utils.env_simulators import AudioFeeder, ScreenFeeder, KeyboardSandbox
 from test_utils.scenarios import load_scenarios_from_sources
 from utils.infra.daemon import wait_for_daemon_ready
-from utils.engine import PipelineResolver, PipelineExecutor
+from utils.engine import PipelineResolver, PipelineExecutor, PipelineRuntime
+from utils.edge.capture import SignalEvent
+from utils.engine.cost import LatencyProfile
 
 class E2EOrchestrator:
     """Manages virtual environment synchronization for hardware E2E tests."""
@@ -74,6 +76,9 @@ class PipelineTestRunner:
         ]
         self.resolver = PipelineResolver(self.project_root, search_paths=search_paths)
         self.executor = PipelineExecutor(self.project_root, dashboard=dashboard, session_dir=self.session_dir)
+        self.runtime = PipelineRuntime(self.executor, self.resolver)  # One warm loop + connection pool for every scenario
+        self.latency_profile = LatencyProfile(self.project_root)
+        self.record_latency = False
         
         # 1. Gather ALL scenario patterns from the plan
         all_patterns = []
@@ -92,7 +97,7 @@ class PipelineTestRunner:
         self.cfg = utils.load_config()
         self.max_scenario_time = self.cfg.get('system', {}).get('maximum_scenario_length', 500.0)
 
-    def run_scenario(self, sid, pid, mid, domain, l_id, v_ext=0.0, v_static=0.0, overrides=None, remaining_timeout=None):
+    def run_scenario(self, sid, pid, strategy, domain, l_id, v_ext=0.0, v_static=0.0, overrides=None, remaining_timeout=None):
         self.orch_log.info(f"🎬 Starting Scenario: {sid}")
         # Initialize Scenario Directory (Temporary name)
         # Use sanitized ID for filesystem (replace / with --)
@@ -121,12 +126,13 @@ class PipelineTestRunner:
                     else: inputs['input_instruction'] = content
                     if media: inputs['input_media'] = media
 
-        inputs['ptt_active'] = threading.Event()
+        inputs['ptt_active'] = SignalEvent()
+        inputs['conversation_id'] = f"{l_id}::{sid}"  # Scopes server-side session state (e.g. the STT language hint) to this scenario
 
         # --- PRE-FLIGHT VALIDATION ---
         try:
-            bound_graph = self.resolver.resolve(pid, mid, overrides=overrides)
-            validation_errors = []
+            bound_graph = self.resolver.resolve(pid, strategy, overrides=overrides)
+            validation_errors = list(self.executor.compiler.compile(bound_graph).errors)
             for nid, node in bound_graph.items():
                 impl = node.get('binding')
                 if impl and impl.validate_fn:
@@ -146,10 +152,16 @@ class PipelineTestRunner:
         try:
             async def e2e_wrapper():
                 seq = scen_def.get('sequence')
-                if seq: asyncio.create_task(self.e2e_orchestrator.execute_sequence(seq, inputs))
+                seq_task = asyncio.create_task(self.e2e_orchestrator.execute_sequence(seq, inputs)) if seq else None
                 timeout = remaining_timeout if remaining_timeout else self.max_scenario_time
-                return await asyncio.wait_for(self.executor.run(bound_graph, inputs), timeout=timeout)
-            success = asyncio.run(e2e_wrapper())
+                try:
+                    return await asyncio.wait_for(self.runtime.run_turn(bound_graph, inputs), timeout=timeout)
+                finally:
+                    # The runtime loop outlives the scenario: an unfinished sequence must not leak into the next one
+                    if seq_task:
+                        seq_task.cancel()
+                        await asyncio.gather(seq_task, return_exceptions=True)
+            success = self.runtime.call(e2e_wrapper())
         except Exception as e:
             self.log(f"Execution Error: {e}", level="error")
             success = False
@@ -158,12 +170,21 @@ class PipelineTestRunner:
             return False
 
         duration = time.perf_counter() - start_time
+        # `output` expectations pin exactly what a node emitted (e.g. the sentences of a chunked stream)
+        mismatches = [
+            f"{exp['node']}: expected {exp['content']}, got {self.executor.results.get(exp['node'], [])}"
+            for turn in scen_def.get('turns', []) for exp in turn.get('expect', [])
+            if exp.get('type') == 'output' and self.executor.results.get(exp['node'], []) != exp['content']
+        ]
+        if mismatches:
+            self.log(f"Output Mismatch: {' | '.join(mismatches)}", level="error")
+            success = False
         status = "PASSED" if success else "FAILED"
 
         # Save trace artifact INSIDE scenario folder
-        trace_path = os.path.join(temp_scenario_dir, f"trace.json")
-        with open(trace_path, "w") as f:
-            json.dump(self.executor.trace, f, indent=2)
+        trace_path = os.path.join(temp_scenario_dir, f"trace.ndjson")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            self.executor.trace.dump_ndjson(f)
 
         # RENAME Scenario Directory with Status Prefix
         final_scenario_dir = os.path.join(self.session_dir, f"{status}__{domain.upper()}__{sid}")
@@ -182,13 +203,25 @@ class PipelineTestRunner:
                 if exp.get('type') == 'log' and exp.get('content'): expected = exp['content']
 
         node_metrics = {}
+        mic_id = next((nid for nid, n in bound_graph.items() if n.get('role') == 'microphone'), None)
         for nid, node in bound_graph.items():
-            if node['type'] != 'processing': continue
             role = node.get('role', '').lower()
+            if role == 'audio_playback':
+                node_metrics[nid] = evaluator.calculate_playback_metrics(nid, source_node=mic_id)
+                continue
+            if node['type'] != 'processing': continue
             if role == 'stt': node_metrics[nid] = evaluator.calculate_stt_metrics(nid, expected_text=expected)
             elif role == 'llm': node_metrics[nid] = evaluator.calculate_llm_metrics(nid)
             elif role == 'tts': node_metrics[nid] = evaluator.calculate_tts_metrics(nid)
 
+        # Feed measured latencies into the prefer_fast cost model (real models only; stubs would skew it)
+        if success and self.record_latency:
+            measured = {
+                node['binding'].id: node_metrics[nid] for nid, node in bound_graph.items()
+                if node.get('binding') and node['binding'].config.get('binding') and isinstance(node_metrics.get(nid), dict)
+            }
+            if measured: self.latency_profile.record_many(measured)
+
         stt_res = self.executor.results.get("proc_stt", [])
         llm_res = self.executor.results.get("proc_llm", [])
         res_obj = {
@@ -201,6 +234,7 @@ class PipelineTestRunner:
             "input_file": inputs.get("input_mic") or inputs.get("input_media", ""),
             "output_file": self.executor.results.get("proc_tts", [""])[0]
         }
+        if mismatches: res_obj["result"] = f"OUTPUT_MISMATCH: {' | '.join(mismatches)}"
         if self.reporter: self.reporter.report(res_obj)
         return success
 
@@ -210,6 +244,7 @@ class PipelineTestRunner:
         if self.dashboard: self.dashboard.log(msg)
 
     def run_all(self, args):
+        self.record_latency = not args.mock_models
         structure = {}
         execution_blocks = self.plan.get('execution', [])
         
@@ -259,6 +294,7 @@ class PipelineTestRunner:
             loadouts = block.get('loadouts', [None])
             resolved_ids = block.get('resolved_ids', [])
             mapping = block.get('mapping')
+            strategy = block.get('strategy')  # Optional system_config/strategies/<name>.yaml for real-model binding
             
             if self.dashboard: self.dashboard.current_domain = domain.upper()
             for l in loadouts:
@@ -279,6 +315,7 @@ class PipelineTestRunner:
 
                 def execution_wrapper():
                     block_start = time.perf_counter()
+                    self.runtime.reset_connections()  # Fresh pool for this loadout's servers
                     overrides = {}
                     if args.mock_edge:
                         try:
@@ -296,7 +333,7 @@ class PipelineTestRunner:
                     for s_id in resolved_ids:
                         elapsed = time.perf_counter() - block_start
                         rem = max(1.0, self.max_scenario_time - elapsed)
-                        self.run_scenario(sid=s_id, pid=pipeline, mid=mapping, domain=domain, l_id=l_id, v_ext=v_ext, v_static=v_static, overrides=overrides, remaining_timeout=rem)
+                        self.run_scenario(sid=s_id, pid=pipeline, strategy=strategy, domain=domain, l_id=l_id, v_ext=v_ext, v_static=v_static, overrides=overrides, remaining_timeout=rem)
 
                 v_ext_start = utils.get_gpu_vram_usage()
                 
@@ -321,6 +358,7 @@ class PipelineTestRunner:
                 loadout_results = [r for r in self.reporter.results if r.get('loadout_id') == l_id]
                 save_artifact(domain, [{"loadout": l_id, "scenarios": loadout_results, "status": status.upper()}], session_dir=self.session_dir)
             if self.dashboard: self.dashboard.finalize_domain(domain)
+        self.runtime.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Jarvis Unified Flow Runner")
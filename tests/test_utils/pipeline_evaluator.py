@@ -28,21 +28,29 @@ class TraceEvaluator:
 
         start_event = next((e for e in events if e.get('type') == 'START'), None)
         finish_event = next((e for e in events if e.get('type') == 'FINISH'), None)
-        in_packet = next((e for e in events if e.get('dir') == 'IN' and e.get('type') == 'input_source'), None)
+        in_packets = [e for e in events if e.get('dir') == 'IN' and e.get('type') in ['audio_utterance', 'audio_path', 'data_path', 'audio_stream']]
         out_packet = next((e for e in events if e.get('dir') == 'OUT' and e.get('type') == 'text_final'), None)
 
-        if not (start_event and finish_event and in_packet and out_packet):
+        if not (start_event and finish_event and in_packets and out_packet):
             return {"status": "INCOMPLETE_DATA"}
 
-        # 1. RTF Calculation
+        # 1. RTF Calculation (against the audio that was actually sent for decoding)
         inf_duration = finish_event['t'] - start_event['t']
-        audio_path = in_packet.get('content')
         audio_duration = 1.0 # Fallback
-        if audio_path and os.path.exists(os.path.join(self.project_root, audio_path)):
+        utterance = next((e for e in in_packets if e.get('type') == 'audio_utterance' and e.get('audio_s')), None)
+        file_packet = next((e for e in in_packets if e.get('type') in ['audio_path', 'data_path']), None)
+        stream_bytes = sum(int(e.get('data_len', 0)) for e in in_packets if e.get('type') == 'audio_stream')
+        if out_packet.get('audio_s'):
+            audio_duration = float(out_packet['audio_s']) # Reported by the STT node: what it actually decoded
+        elif utterance:
+            audio_duration = float(utterance['audio_s']) # Trimmed length when a preprocessor ran
+        elif file_packet and file_packet.get('content') and os.path.exists(os.path.join(self.project_root, file_packet['content'])):
             try:
-                with wave.open(os.path.join(self.project_root, audio_path), 'rb') as f:
+                with wave.open(os.path.join(self.project_root, file_packet['content']), 'rb') as f:
                     audio_duration = f.getnframes() / float(f.getframerate())
             except: pass
+        elif stream_bytes:
+            audio_duration = stream_bytes / (2.0 * 16000) # Live mic chunks: 16 kHz int16
         
         rtf = inf_duration / audio_duration if audio_duration > 0 else 0
 
@@ -99,9 +107,9 @@ class TraceEvaluator:
         start_event = next((e for e in events if e.get('type') == 'START'), None)
         finish_event = next((e for e in events if e.get('type') == 'FINISH'), None)
         in_packets = [e for e in events if e.get('dir') == 'IN' and e.get('type') in ['text_token', 'text_sentence', 'text_final']]
-        out_packet = next((e for e in events if e.get('dir') == 'OUT' and e.get('type') == 'audio_path'), None)
+        out_packets = [e for e in events if e.get('dir') == 'OUT' and e.get('type') in ['audio_path', 'audio_stream']]
 
-        if not (start_event and finish_event and out_packet):
+        if not (start_event and finish_event and out_packets):
             return {"status": "INCOMPLETE_DATA"}
 
         # 1. CPS (Characters Per Second)
@@ -109,14 +117,19 @@ class TraceEvaluator:
         inf_duration = finish_event['t'] - start_event['t']
         cps = total_chars / inf_duration if inf_duration > 0 else 0
 
-        # 2. Audio RTF
-        audio_path = out_packet.get('content')
-        audio_duration = 1.0
-        if audio_path and os.path.exists(os.path.join(self.project_root, audio_path)):
-            try:
-                with wave.open(os.path.join(self.project_root, audio_path), 'rb') as f:
-                    audio_duration = f.getnframes() / float(f.getframerate())
-            except: pass
+        # 2. Audio RTF (summed over every synthesized sentence clip)
+        audio_duration = 0.0
+        for out_packet in out_packets:
+            if out_packet.get('type') == 'audio_stream':
+                audio_duration += float(out_packet.get('audio_s', 0.0)) # Streamed PCM chunks carry their own duration
+                continue
+            audio_path = out_packet.get('content')
+            if audio_path and os.path.exists(os.path.join(self.project_root, audio_path)):
+                try:
+                    with wave.open(os.path.join(self.project_root, audio_path), 'rb') as f:
+                        audio_duration += f.getnframes() / float(f.getframerate())
+                except: pass
+        if audio_duration <= 0: audio_duration = 1.0 # Fallback
         
         rtf = inf_duration / audio_duration if audio_duration > 0 else 0
 
@@ -124,5 +137,25 @@ class TraceEvaluator:
             "cps": cps,
             "rtf": rtf,
             "audio_len": audio_duration,
+            "clips": len({p.get('sentence', p.get('seq')) for p in out_packets}),
+            "ttfa": out_packets[0]['t'] - start_event['t'],
             "duration": inf_duration
         }
+
+    def calculate_playback_metrics(self, node_id, source_node=None):
+        """Reports playback health and the voice-to-voice delay (source FINISH -> first sample at the DAC)."""
+        events = self.get_node_events(node_id)
+        stats = next((e for e in events if e.get('type') == 'playback_stats'), None)
+        if not stats:
+            return {"status": "INCOMPLETE_DATA"}
+
+        res = {
+            "underruns": stats.get('underruns', 0),
+            "output_latency": stats.get('output_latency_s', 0.0),
+            "played_s": stats.get('played_s', 0.0),
+            "clips": stats.get('clips', 0)
+        }
+        src_finish = next((e for e in self.get_node_events(source_node) if e.get('type') == 'FINISH'), None) if source_node else None
+        if src_finish and stats.get('first_audio_t'):
+            res["voice_to_voice"] = stats['first_audio_t'] - src_finish['t']
+        return res
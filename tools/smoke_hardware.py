@@ -8,6 +8,7 @@ from loguru import logger
 # --- Core Dependencies ---
 import utils
 from utils.engine.contract import Capability
+from utils.edge.capture import SignalEvent
 from utils.engine.implementations import (
     execute_ptt_mic, execute_speaker, execute_screen_capture, 
     execute_camera_capture, execute_keyboard_typer, execute_clipboard_sensor,
@@ -19,7 +20,7 @@ async def smoke_mic():
     logger.info("🎤 SMOKE TEST: Microphone (Hold-to-Talk)")
     logger.info("Please hold the SPACE BAR and speak for 2 seconds...")
     
-    ptt_signal = threading.Event()
+    ptt_signal = SignalEvent()
     
     def key_listener():
         try:
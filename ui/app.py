@@ -173,6 +173,7 @@ class JarvisApp(ctk.CTk):
 
     def on_config_change(self, _=None):
         self.controller.current_pipeline = self.pipe_var.get()
+        self.controller.stop_continuous("pipeline changed")
         self.controller.save_checkpoint()
         self.update_graph_view()
 
@@ -184,6 +185,8 @@ class JarvisApp(ctk.CTk):
         self.controller.is_maximized = (self.state() == "zoomed")
         self.controller.save_checkpoint()
         self.controller.is_polling = False
+        if self.controller.active_run: self.controller.active_run.cancel("shutdown", timeout=1.0)  # Stop playback before the loop goes away
+        self.controller.runtime.close()
         self.destroy()
 
     def on_loadout_change(self, val):
@@ -316,7 +319,7 @@ class JarvisApp(ctk.CTk):
             bound_graph = self.controller.resolver.resolve(self.controller.current_pipeline, silent=True)
             for node in bound_graph.values():
                 binding = node.get('binding')
-                if binding: bound_mids.add(binding['id'])
+                if binding: bound_mids.add(binding.id)
         except: pass
 
         # Update or Create widgets
@@ -14,7 +14,8 @@ if script_dir not in sys.path:
 
 import utils
 from utils import load_config, get_system_health
-from utils.engine import PipelineResolver, PipelineExecutor
+from utils.engine import PipelineResolver, PipelineExecutor, PipelineRuntime
+from utils.edge.capture import SignalEvent
 from manage_loadout import apply_loadout, kill_loadout, restart_service, kill_service
 
 CHECKPOINT_PATH = os.path.join(script_dir, ".cache", "checkpoint-client.json")
@@ -63,9 +64,16 @@ class JarvisController:
         # 4. Embedded Flow Engine (Session Aware)
         self.resolver = PipelineResolver(self.project_root)
         self.executor = PipelineExecutor(self.project_root, session_dir=self.session_dir)
+        self.runtime = PipelineRuntime(self.executor, self.resolver)  # Warm loop, pooled connections, cached graphs
+        turn_cfg = self.cfg.get('system', {}).get('turns', {})
+        self.barge_in = turn_cfg.get('barge_in', True)  # A new PTT press preempts the reply still in flight
+        self.cancel_timeout = turn_cfg.get('cancel_timeout', 0.5)
+        self.active_run = None  # RunHandle of the turn in flight
+        self.continuous_pipeline = None  # Pipeline id when `active_run` is an always-on (mode: continuous) graph
+        self._turn_seq = 0
         
         # Edge Hardware (bound via registry)
-        self.ptt_signal = threading.Event()
+        self.ptt_signal = SignalEvent()  # Press/release wake the mic's async PTT waits directly
 
         # 5. Fast-boot from initial state if provided
         if initial_state_path and os.path.exists(initial_state_path):
@@ -164,6 +172,12 @@ class JarvisController:
                         silent=True
                     )
                     self._last_poll_state = current_state
+                    if self.runnability.get('runnable'):
+                        # Resolve ahead of the next PTT press so the turn starts from a cached graph
+                        try:
+                            self.runtime.prepare(self.current_pipeline, self.current_strategy, silent=True)
+                        except Exception as e:
+                            logger.debug(f"Graph prewarm failed: {e}")
                 
                 # Logic for "LOADOUT APPLIED" detection
                 try:
@@ -171,6 +185,7 @@ class JarvisController:
                     if daemon_state == "READY" and self._last_daemon_state in ["STARTING", "IDLE"]:
                         msg = "✅ LOADOUT APPLIED"
                         logger.info(msg)
+                        self.runtime.reset_connections()  # Servers may have been restarted on the same ports
                         self.ui_queue.put({"type": "log", "msg": msg, "tag": "system"})
                     self._last_daemon_state = daemon_state
                 except: pass
@@ -237,7 +252,13 @@ class JarvisController:
         self.is_recording = True
         self.ptt_signal.set()
         self.ui_queue.put({"type": "state", "recording": True})
-        threading.Thread(target=self._run_pipeline_local, daemon=True).start()
+        if self.continuous_alive(): return  # The live graph's microphone takes this press as its next turn
+        self.runtime.spawn(self._run_pipeline_local()).add_done_callback(self._report_run_error)
+
+    @staticmethod
+    def _report_run_error(fut):
+        if not fut.cancelled() and fut.exception():
+            logger.opt(exception=fut.exception()).error(f"Pipeline run crashed: {fut.exception()}")
 
     def stop_recording(self):
         if not self.is_recording: return
@@ -245,23 +266,68 @@ class JarvisController:
         self.ptt_signal.clear()
         self.ui_queue.put({"type": "state", "recording": False})
 
-    def _run_pipeline_local(self):
+    def pipeline_mode(self, pipeline_id):
+        """'continuous' for pipelines that keep their graph alive across turns, else 'turn'."""
+        try:
+            return self.resolver.load_yaml(pipeline_id).get('mode', 'turn')
+        except Exception:
+            return 'turn'
+
+    def continuous_alive(self):
+        run = self.active_run
+        return bool(run and not run.done() and self.continuous_pipeline == self.current_pipeline)
+
+    def stop_continuous(self, reason="stopped"):
+        """Tears down a live always-on graph (e.g. when the user switches pipelines)."""
+        if self.continuous_pipeline and self.active_run and not self.active_run.done():
+            self.active_run.cancel(reason, timeout=self.cancel_timeout)
+
+    async def _run_pipeline_local(self):
+        """
+        One PTT turn on the persistent runtime loop.
+        A turn still in flight is cancelled first (barge-in) or awaited, so turns never overlap on the shared executor.
+        If another press arrives while this one is still preparing, the newer press wins.
+        `mode: continuous` pipelines start their always-on graph instead; later presses feed it without a new run.
+        """
+        self._turn_seq += 1
+        my_turn = self._turn_seq
+        previous = self.active_run
+        if previous and not previous.done():
+            if self.barge_in or self.continuous_pipeline:  # An always-on graph never finishes on its own
+                t0 = time.perf_counter()
+                if await previous.cancel_async("barge-in", timeout=self.cancel_timeout):
+                    logger.info(f"✋ Barge-in: previous turn stopped in {(time.perf_counter() - t0) * 1000:.0f}ms")
+                else:
+                    logger.warning(f"✋ Barge-in: previous turn still unwinding after {self.cancel_timeout}s")
+                    await asyncio.wait({previous.task})
+            else:
+                await asyncio.wait({previous.task})
         try:
-            bound_graph = self.resolver.resolve(self.current_pipeline)
+            bound_graph = await self.runtime.graph(self.current_pipeline, self.current_strategy)
         except Exception as e:
             logger.error(f"Resolution Error: {e}")
             return
-        inputs = {"ptt_active": self.ptt_signal}
-        async def run_and_monitor():
-            exec_task = asyncio.create_task(self.executor.run(bound_graph, inputs))
-            last_idx = 0
-            while not exec_task.done() or last_idx < len(self.executor.trace):
-                while last_idx < len(self.executor.trace):
-                    packet = self.executor.trace[last_idx]; last_idx += 1
-                    if packet.get('dir') == 'OUT':
-                        ptype = packet.get('type')
-                        content = packet.get('content')
-                        if ptype in ["text_token", "text_sentence", "text_final"]:
-                            self.ui_queue.put({"type": "log", "msg": str(content), "tag": "assistant"})
-                await asyncio.sleep(0.05)
-        asyncio.run(run_and_monitor())
+        if my_turn != self._turn_seq: return  # Superseded by a newer press while preparing
+
+        if self.pipeline_mode(self.current_pipeline) == 'continuous':
+            handle = self.runtime.begin_continuous(bound_graph, {"ptt_active": self.ptt_signal})
+            self.continuous_pipeline = self.current_pipeline
+        else:
+            handle = self.runtime.begin_turn(bound_graph, {"ptt_active": self.ptt_signal})
+            self.continuous_pipeline = None
+        self.active_run = handle
+        last_idx = 0
+        while not handle.done() or last_idx < self.executor.trace.total:
+            events, last_idx = self.executor.trace.read_from(last_idx)
+            for packet in events:
+                if packet.get('dir') == 'OUT':
+                    ptype = packet.get('type')
+                    content = packet.get('content')
+                    if ptype in ["text_token", "text_sentence", "text_final"]:
+                        self.ui_queue.put({"type": "log", "msg": str(content), "tag": "assistant"})
+            if handle.cancelled(): break  # The next turn owns the trace now
+            await asyncio.sleep(0.05)
+        if handle.cancelled():
+            logger.info(f"Turn {handle.turn} cancelled ({handle.cancel_reason})")
+        elif handle.task.exception():
+            logger.error(f"Turn failed: {handle.task.exception()}")
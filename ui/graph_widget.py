@@ -2,6 +2,7 @@ import os
 import sys
 import customtkinter as ctk
 from utils.engine import GraphLayoutEngine
+from utils.engine.contract import EdgeSpec
 
 class PipelineGraphWidget(ctk.CTkFrame):
     def __init__(self, master, ui_config, initial_positions=None, **kwargs):
@@ -182,7 +183,7 @@ class PipelineGraphWidget(ctk.CTkFrame):
             dest_caps = node.get('capabilities', [])
             
             # Standard Inputs
-            inputs = node.get('inputs', [])
+            inputs = [EdgeSpec.parse(e).source for e in node.get('inputs', [])]
             for src_id in inputs:
                 if src_id in self.nodes:
                     src = self.nodes[src_id]
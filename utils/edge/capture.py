@@ -0,0 +1,276 @@
+import time
+import wave
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Optional
+from loguru import logger
+
+# --- Optional Dependencies ---
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class MicCapture:
+    """
+    Background microphone recorder. PortAudio delivers buffers on its own thread; each buffer is kept for the
+    final utterance and handed to the event loop through a thread-safe queue, so consumers can process audio
+    while the user is still talking.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, sample_rate: int = 16000, frames_per_buffer: int = 1024, device_index: Optional[int] = None):
+        if not pyaudio:
+            raise RuntimeError("pyaudio missing: microphone capture unavailable.")
+        self.loop = loop
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.device_index = device_index
+        self.frames: list[bytes] = []
+        self.started_t = None
+        self.stopped_t = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pa = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+            frames_per_buffer=self.frames_per_buffer, input_device_index=self.device_index,
+            stream_callback=self._on_audio
+        )
+        self.started_t = time.perf_counter()
+        self._stream.start_stream()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        # PortAudio thread: never touch asyncio objects directly
+        with self._lock:
+            if self._stream is None: return (None, pyaudio.paComplete)
+            self.frames.append(in_data)
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, in_data)
+        return (None, pyaudio.paContinue)
+
+    def stop(self):
+        """Stops recording and terminates the chunk stream. Safe to call from any thread, more than once."""
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is None: return
+        try:
+            stream.stop_stream(); stream.close()
+        finally:
+            if self._pa: self._pa.terminate()
+            self.stopped_t = time.perf_counter()
+            self.loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yields raw int16 PCM buffers as they arrive, until `stop()`."""
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None: break
+            yield chunk
+
+    @property
+    def pcm(self) -> bytes:
+        return b''.join(self.frames)
+
+    @property
+    def duration(self) -> float:
+        return sum(len(f) for f in self.frames) / 2.0 / self.sample_rate
+
+def find_input_device(name: str) -> Optional[int]:
+    """Index of the first capture device whose name contains `name` (e.g. "CABLE Output" for a virtual cable)."""
+    if not pyaudio: return None
+    pa = pyaudio.PyAudio()
+    try:
+        for i in range(pa.get_device_count()):
+            info = pa.get_device_info_by_index(i)
+            if name in info.get('name', '') and info.get('maxInputChannels', 0) > 0:
+                return i
+    finally:
+        pa.terminate()
+    return None
+
+class VADEndpointer:
+    """
+    Streaming energy-based voice activity endpointer for hands-free capture.
+    Feed raw int16 mono buffers as they arrive. Nothing is released until speech is confirmed; the onset is then
+    released together with the preceding `preroll_ms` of audio so the first syllable is not clipped.
+    The utterance is closed once `silence_ms` of trailing silence follows at least `min_speech_ms` of voiced
+    audio; shorter bursts (clicks, coughs) are discarded and listening resumes.
+
+    A frame is voiced if it is above the absolute `threshold_db` and at least `snr_db` above the running noise
+    floor, which adapts on unvoiced frames so a noisy room does not keep the utterance open.
+    """
+    def __init__(self, sample_rate: int = 16000, threshold_db: float = -45.0, snr_db: float = 10.0, silence_ms: float = 600.0,
+                 min_speech_ms: float = 250.0, preroll_ms: float = 300.0, max_utterance_s: float = 30.0, frame_ms: float = 20.0):
+        if np is None:
+            raise RuntimeError("numpy missing: VAD endpointing unavailable.")
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.snr_db = snr_db
+        self.frame = max(1, int(sample_rate * frame_ms / 1000.0))
+        self.frame_ms = self.frame * 1000.0 / sample_rate
+        self.silence_frames = max(1, int(round(silence_ms / self.frame_ms)))
+        self.min_speech_frames = max(1, int(round(min_speech_ms / self.frame_ms)))
+        self.max_frames = int(max_utterance_s * 1000.0 / self.frame_ms) if max_utterance_s else None
+        self.noise_floor = None
+        self.preroll = deque(maxlen=int(round(preroll_ms / self.frame_ms)) + 1)  # + the onset frame itself
+        self.triggered = False
+        self.confirmed = False
+        self.done = False
+        self.speech_onset_t = None
+        self.speech_end_t = None
+        self._utterance: list[bytes] = []
+        self._held: list[bytes] = []
+        self._pending = b""
+        self._voiced = 0
+        self._silent = 0
+        self._frames = 0
+
+    def _is_voiced(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+        level = 20.0 * np.log10(max(float(np.sqrt(np.mean(samples ** 2))), 1e-10))
+        floor = self.noise_floor if self.noise_floor is not None else level
+        voiced = level >= self.threshold_db and level >= floor + self.snr_db
+        if not voiced:
+            # Fast to follow the room down, slow to follow it up
+            self.noise_floor = level if self.noise_floor is None else floor + (0.05 if level > floor else 0.3) * (level - floor)
+        return voiced
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Consumes a capture buffer and returns the audio to release downstream (possibly empty)."""
+        if self.done: return b""
+        self._pending += chunk
+        n = len(self._pending) // (2 * self.frame) * 2 * self.frame
+        frames = [self._pending[i:i + 2 * self.frame] for i in range(0, n, 2 * self.frame)]
+        self._pending = self._pending[n:]
+
+        out = []
+        for frame in frames:
+            voiced = self._is_voiced(frame)
+            if not self.triggered:
+                self.preroll.append(frame)
+                if not voiced: continue
+                self.triggered = True
+                self.speech_onset_t = time.perf_counter()
+                self._held = list(self.preroll); self.preroll.clear()
+                self._voiced, self._silent, self._frames = 1, 0, 0
+                continue
+
+            (out if self.confirmed else self._held).append(frame)
+            self._frames += 1
+            if voiced:
+                self._voiced += 1; self._silent = 0
+            else:
+                self._silent += 1
+            if not self.confirmed and self._voiced >= self.min_speech_frames:
+                # Long enough to be speech: release the held onset (pre-roll included)
+                self.confirmed = True
+                out.extend(self._held); self._held = []
+            if self._silent >= self.silence_frames or (self.max_frames and self._frames >= self.max_frames):
+                if not self.confirmed:
+                    # Too short to be speech (click, cough): drop it and go back to listening
+                    self.triggered = False; self._held = []
+                    continue
+                self.done = True
+                self.speech_end_t = time.perf_counter()
+                break
+
+        released = b''.join(out)
+        if released: self._utterance.append(released)
+        return released
+
+    @property
+    def pcm(self) -> bytes:
+        return b''.join(self._utterance)
+
+    @property
+    def duration(self) -> float:
+        return sum(len(c) for c in self._utterance) / 2.0 / self.sample_rate
+
+    @property
+    def trailing_silence_s(self) -> float:
+        return self._silent * self.frame_ms / 1000.0 if self.done else 0.0
+
+def write_wav(path: str, pcm: bytes, sample_rate: int = 16000):
+    """Writes mono int16 PCM to a WAV file (blocking; run it off the event loop)."""
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+
+class SignalEvent(threading.Event):
+    """
+    threading.Event (e.g. the PTT key) whose set()/clear() also wake coroutines waiting for either edge: each waiter
+    parks a future on its loop and the setting thread resolves it through `loop.call_soon_threadsafe`.
+    Nothing polls and no worker thread is held, so cancelling the waiting task ends the wait at once.
+    """
+    def __init__(self):
+        super().__init__()
+        self._waiters: list = []  # (loop, future)
+        self._waiters_lock = threading.Lock()
+
+    def set(self):
+        super().set()
+        self._wake()
+
+    def clear(self):
+        super().clear()
+        self._wake()
+
+    def _wake(self):
+        with self._waiters_lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, future)
+            except RuntimeError:
+                pass  # The waiter's loop is already closed
+
+    async def wait_state(self, state: bool = True):
+        """Returns once the event is set (`state=True`) or cleared."""
+        loop = asyncio.get_running_loop()
+        while self.is_set() != state:
+            future = loop.create_future()
+            with self._waiters_lock:
+                self._waiters.append((loop, future))
+            if self.is_set() == state: break  # Flipped before the waiter was registered
+            try:
+                await future
+            finally:
+                with self._waiters_lock:
+                    if (loop, future) in self._waiters: self._waiters.remove((loop, future))
+
+def _resolve_waiter(future: asyncio.Future):
+    if not future.done(): future.set_result(None)
+
+async def wait_for_signal(signal: threading.Event, state: bool = True, timeout: Optional[float] = None, slice_s: float = 0.05) -> bool:
+    """
+    Waits until `signal` (e.g. the PTT key) is set (`state=True`) or cleared. Returns False on timeout.
+    A SignalEvent wakes the waiter directly. A plain threading.Event is waited on in a worker thread, in `slice_s`
+    slices that stop as soon as the awaiting task is cancelled (barge-in, stopping a continuous graph).
+    """
+    if signal.is_set() == state: return True
+    if isinstance(signal, SignalEvent):
+        try:
+            await asyncio.wait_for(signal.wait_state(state), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    stop = threading.Event()
+    def _wait() -> bool:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while signal.is_set() != state:
+            if stop.is_set() or (deadline is not None and time.perf_counter() >= deadline): return False
+            (signal if state else stop).wait(slice_s)  # A plain Event can only be waited on for being set
+        return True
+    try:
+        return await asyncio.to_thread(_wait)
+    finally:
+        stop.set()  # Releases the worker thread when the awaiting task is cancelled
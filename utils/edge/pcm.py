@@ -0,0 +1,60 @@
+import struct
+from typing import Optional
+
+# Raw PCM wire format shared by the model servers and their engine clients:
+# a fixed 12-byte header followed by interleaved little-endian samples.
+#   MAGIC(4) | u8 version | u8 dtype code | u8 channels | u8 reserved | u32 sample_rate
+PCM_MAGIC = b"JPCM"
+PCM_VERSION = 1
+PCM_MEDIA_TYPE = "application/x-jarvis-pcm"
+HEADER_SIZE = 12
+
+_DTYPES = {"int16": (1, 2), "float32": (2, 4)}
+_DTYPE_NAMES = {code: name for name, (code, _) in _DTYPES.items()}
+_HEADER = struct.Struct("<4sBBBBI")
+
+def pack_header(sample_rate: int, dtype: str = "int16", channels: int = 1) -> bytes:
+    if dtype not in _DTYPES: raise ValueError(f"Unsupported PCM dtype: {dtype}")
+    return _HEADER.pack(PCM_MAGIC, PCM_VERSION, _DTYPES[dtype][0], channels, 0, sample_rate)
+
+def unpack_header(buf) -> tuple[int, str, int]:
+    """Returns (sample_rate, dtype, channels) from the first HEADER_SIZE bytes."""
+    magic, version, code, channels, _, sample_rate = _HEADER.unpack(bytes(buf[:HEADER_SIZE]))
+    if magic != PCM_MAGIC: raise ValueError("Not a PCM stream (bad magic).")
+    if version != PCM_VERSION: raise ValueError(f"Unsupported PCM stream version {version}.")
+    if code not in _DTYPE_NAMES: raise ValueError(f"Unknown PCM dtype code {code}.")
+    return sample_rate, _DTYPE_NAMES[code], channels
+
+def frame_size(dtype: str, channels: int = 1) -> int:
+    return _DTYPES[dtype][1] * channels
+
+class PCMStreamReader:
+    """
+    Incremental parser for a PCM byte stream that arrives in arbitrary network chunks.
+    `feed()` returns whole-frame sample buffers only; partial frames are carried to the next call.
+    """
+    def __init__(self):
+        self.sample_rate: Optional[int] = None
+        self.dtype: Optional[str] = None
+        self.channels: Optional[int] = None
+        self._pending = b""
+        self._frame = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.sample_rate is not None
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        self._pending += data
+        if not self.ready:
+            if len(self._pending) < HEADER_SIZE: return None
+            self.sample_rate, self.dtype, self.channels = unpack_header(self._pending)
+            self._frame = frame_size(self.dtype, self.channels)
+            self._pending = self._pending[HEADER_SIZE:]
+        usable = len(self._pending) - len(self._pending) % self._frame
+        if not usable: return None
+        out, self._pending = self._pending[:usable], self._pending[usable:]
+        return out
+
+    def seconds(self, nbytes: int) -> float:
+        return nbytes / float(self._frame * self.sample_rate) if self.ready else 0.0
@@ -0,0 +1,215 @@
+import time
+import asyncio
+import threading
+from typing import Callable, Optional
+from loguru import logger
+
+# --- Optional Dependencies ---
+try:
+    import sounddevice as sd
+    import numpy as np
+except ImportError:
+    sd = np = None
+
+def to_float32_mono(samples, dtype: str = "float32"):
+    """Normalizes a PCM buffer (bytes/memoryview/ndarray, int16 or float) to a mono float32 array."""
+    if not isinstance(samples, np.ndarray):
+        samples = np.frombuffer(samples, dtype=np.dtype(dtype))
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+def resample_linear(samples, src_rate: int, dst_rate: int):
+    """Cheap vectorized linear resampler (good enough for speech playback)."""
+    if src_rate == dst_rate or len(samples) == 0: return samples
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    x_out = np.linspace(0, len(samples) - 1, n_out, dtype=np.float64)
+    return np.interp(x_out, np.arange(len(samples)), samples).astype(np.float32)
+
+class PCMRingBuffer:
+    """Single-producer / single-consumer float32 ring shared between the event loop side and the audio thread."""
+    def __init__(self, capacity_frames: int):
+        self.capacity = int(capacity_frames)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._r = 0  # Absolute read offset
+        self._w = 0  # Absolute write offset
+        self._cond = threading.Condition()
+
+    @property
+    def available(self) -> int:
+        return self._w - self._r
+
+    def write(self, samples, crossfade: int = 0, timeout: Optional[float] = None, abort: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Appends samples, blocking while the ring is full.
+        With `crossfade` > 0 the first samples are overlap-added onto the still-unplayed tail instead of appended.
+        `abort` is re-checked whenever the writer wakes; once it returns True the rest of the clip is dropped.
+        """
+        with self._cond:
+            n_fade = min(crossfade, len(samples), self.available)
+            if n_fade > 0:
+                ramp = np.linspace(0.0, 1.0, n_fade, dtype=np.float32)
+                idx = np.arange(self._w - n_fade, self._w) % self.capacity
+                self._buf[idx] = self._buf[idx] * (1.0 - ramp) + samples[:n_fade] * ramp
+                samples = samples[n_fade:]
+
+        pos = 0
+        while pos < len(samples):
+            with self._cond:
+                if not self._cond.wait_for(lambda: self.available < self.capacity or (abort and abort()), timeout=timeout):
+                    return False
+                if abort and abort(): return False
+                n = min(len(samples) - pos, self.capacity - self.available)
+                start = self._w % self.capacity
+                first = min(n, self.capacity - start)
+                self._buf[start:start + first] = samples[pos:pos + first]
+                if n > first:
+                    self._buf[:n - first] = samples[pos + first:pos + n]
+                self._w += n
+                pos += n
+        return True
+
+    def read_into(self, out) -> int:
+        """Copies up to len(out) samples into `out` without blocking. Returns how many were read."""
+        with self._cond:
+            n = min(len(out), self.available)
+            if n:
+                start = self._r % self.capacity
+                first = min(n, self.capacity - start)
+                out[:first] = self._buf[start:start + first]
+                if n > first:
+                    out[first:n] = self._buf[:n - first]
+                self._r += n
+                self._cond.notify_all()
+            return n
+
+    def clear(self):
+        with self._cond:
+            self._r = self._w
+            self._cond.notify_all()
+
+class AudioPlaybackEngine:
+    """
+    Non-blocking audio sink. PortAudio pulls from a PCM ring buffer on its own audio thread, so the event loop
+    only pays for copying samples in. Consecutive clips are concatenated gaplessly (or crossfaded) into one
+    continuous output stream. A jitter buffer holds playback until `prebuffer_ms` is queued, and re-primes after an underrun.
+    """
+    def __init__(self, sample_rate: int = 24000, buffer_s: float = 30.0, prebuffer_ms: float = 150.0, crossfade_ms: float = 0.0, device=None, blocksize: int = 0):
+        if not sd or not np:
+            raise RuntimeError("sounddevice/numpy missing: audio playback unavailable.")
+        self.sample_rate = sample_rate
+        self.ring = PCMRingBuffer(int(buffer_s * sample_rate))
+        self.prebuffer_frames = int(prebuffer_ms * sample_rate / 1000.0)
+        self.crossfade_frames = int(crossfade_ms * sample_rate / 1000.0)
+        self.device = device
+        self.blocksize = blocksize
+        self._stream = None
+        self._playing = False
+        self._eos = False
+        self._idle = threading.Event(); self._idle.set()
+        self._epoch = 0  # Bumped by flush(); writes started before it are abandoned
+
+        # Metrics
+        self.underruns = 0
+        self.played_frames = 0
+        self.clips = 0
+        self.first_write_t = None
+        self.first_audio_t = None  # perf_counter estimate of when the first sample reaches the DAC
+
+    # --- Lifecycle ---
+    def start(self):
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate, channels=1, dtype="float32",
+            callback=self._callback, device=self.device, blocksize=self.blocksize
+        )
+        self._stream.start()
+
+    def close(self, abort: bool = False):
+        """Stops the output stream. `abort` discards what PortAudio still holds instead of letting it play out."""
+        if self._stream:
+            try:
+                if abort: self._stream.abort()
+                else: self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                logger.warning(f"Playback stream close failed: {e}")
+            self._stream = None
+
+    @property
+    def output_latency(self) -> float:
+        """Device latency reported by PortAudio (seconds)."""
+        return float(self._stream.latency) if self._stream else 0.0
+
+    # --- Audio thread ---
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        if not self._playing:
+            if self.ring.available >= max(1, self.prebuffer_frames) or (self._eos and self.ring.available):
+                self._playing = True
+            else:
+                out.fill(0)
+                return
+
+        n = self.ring.read_into(out)
+        if n and self.first_audio_t is None:
+            self.first_audio_t = time.perf_counter() + self.output_latency
+        self.played_frames += n
+        if n < frames:
+            out[n:] = 0
+            self._playing = False
+            if self._eos:
+                self._idle.set()
+            else:
+                self.underruns += 1  # Starved mid-stream: re-prime the jitter buffer
+
+    # --- Producer side ---
+    def write(self, samples, sample_rate: Optional[int] = None, dtype: str = "float32", continuation: bool = False):
+        """
+        Queues a clip (ndarray or raw PCM buffer). Blocks only while the ring is full.
+        `continuation` marks a later chunk of the same clip (streamed synthesis): it is appended without a crossfade.
+        """
+        epoch = self._epoch
+        samples = to_float32_mono(samples, dtype)
+        samples = resample_linear(samples, sample_rate or self.sample_rate, self.sample_rate)
+        if epoch != self._epoch: return
+        if self.first_write_t is None: self.first_write_t = time.perf_counter()
+        self._eos = False
+        self._idle.clear()
+        fade = self.crossfade_frames if self.clips and not continuation else 0
+        self.ring.write(samples, crossfade=fade, abort=lambda: epoch != self._epoch)
+        if not continuation: self.clips += 1
+
+    async def write_async(self, samples, sample_rate: Optional[int] = None, dtype: str = "float32", continuation: bool = False):
+        await asyncio.to_thread(self.write, samples, sample_rate, dtype, continuation)
+
+    def mark_end_of_stream(self):
+        """No more clips are coming: lets the jitter buffer release a tail shorter than the prebuffer."""
+        self._eos = True
+        if not self.ring.available: self._idle.set()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued has been played."""
+        self.mark_end_of_stream()
+        return self._idle.wait(timeout)
+
+    async def drain_async(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self.drain, timeout)
+
+    def flush(self):
+        """Drops all queued audio immediately and abandons writes still in progress (barge-in)."""
+        self._epoch += 1
+        self.ring.clear()
+        self._playing = False
+        self._idle.set()
+
+    def stats(self) -> dict:
+        return {
+            "clips": self.clips,
+            "underruns": self.underruns,
+            "played_s": self.played_frames / float(self.sample_rate),
+            "output_latency_s": self.output_latency,
+            "first_audio_t": self.first_audio_t,
+            "first_write_t": self.first_write_t
+        }
@@ -0,0 +1,86 @@
+# --- Optional Dependencies ---
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TARGET_RATE = 16000  # What faster-whisper decodes at
+
+def to_mono_float32(samples, dtype: str = "int16", channels: int = 1):
+    """Raw PCM buffer or ndarray -> mono float32 in [-1, 1]."""
+    if not isinstance(samples, np.ndarray):
+        samples = np.frombuffer(samples, dtype=np.dtype(dtype))
+    if samples.ndim == 1 and channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+def frame_energy_db(samples, sample_rate: int, frame_ms: float = 20.0):
+    """Per-frame RMS level in dBFS (vectorized; the last partial frame is zero-padded)."""
+    frame = max(1, int(sample_rate * frame_ms / 1000.0))
+    n_frames = -(-len(samples) // frame)
+    padded = np.zeros(n_frames * frame, dtype=np.float32)
+    padded[:len(samples)] = samples
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, frame) ** 2, axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10)), frame
+
+def trim_silence(samples, sample_rate: int, threshold_db: float = -35.0, floor_db: float = -60.0, frame_ms: float = 20.0, pad_ms: float = 150.0) -> tuple[int, int]:
+    """
+    Returns the (start, end) sample range that contains speech.
+    A frame counts as voiced if it is within `threshold_db` of the loudest frame and above the absolute `floor_db`;
+    `pad_ms` of context is kept on both sides so word onsets and tails are not clipped.
+    """
+    if not len(samples): return 0, 0
+    level, frame = frame_energy_db(samples, sample_rate, frame_ms)
+    voiced = np.flatnonzero(level >= max(level.max() + threshold_db, floor_db))
+    if not len(voiced): return 0, 0
+    pad = int(sample_rate * pad_ms / 1000.0)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return int(start), int(end)
+
+def resample(samples, src_rate: int, dst_rate: int = TARGET_RATE, taps: int = 63):
+    """Band-limited resampler: windowed-sinc low-pass (when downsampling) followed by linear interpolation."""
+    if src_rate == dst_rate or not len(samples): return samples.astype(np.float32, copy=False)
+    if dst_rate < src_rate:
+        cutoff = 0.5 * dst_rate / src_rate  # Normalized to the source rate
+        n = np.arange(taps) - (taps - 1) / 2.0
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    x_out = np.linspace(0, len(samples) - 1, n_out)
+    return np.interp(x_out, np.arange(len(samples)), samples).astype(np.float32)
+
+def peak_normalize(samples, target_dbfs: float = -1.0):
+    peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if peak < 1e-6: return samples
+    return (samples * (10.0 ** (target_dbfs / 20.0) / peak)).astype(np.float32, copy=False)
+
+def preprocess_utterance(samples, sample_rate: int, dtype: str = "int16", channels: int = 1, target_rate: int = TARGET_RATE,
+                         trim: bool = True, normalize: bool = True, threshold_db: float = -35.0, pad_ms: float = 150.0,
+                         target_dbfs: float = -1.0) -> tuple:
+    """
+    Full client-side cleanup before upload: mono float32 -> silence trim -> resample to `target_rate` -> peak normalize.
+    Trimming runs before resampling so the band-limiting filter only touches speech.
+    Returns (float32 samples at target_rate, info) where info holds the original and kept durations in seconds.
+    """
+    if np is None:
+        raise RuntimeError("numpy missing: audio preprocessing unavailable.")
+    audio = to_mono_float32(samples, dtype, channels)
+    orig_s = len(audio) / float(sample_rate)
+    start, end = trim_silence(audio, sample_rate, threshold_db, pad_ms=pad_ms) if trim else (0, len(audio))
+    audio = resample(audio[start:end], sample_rate, target_rate)
+    if normalize: audio = peak_normalize(audio, target_dbfs)
+    info = {
+        "orig_audio_s": orig_s,
+        "audio_s": len(audio) / float(target_rate),
+        "lead_trim_s": start / float(sample_rate),
+        "tail_trim_s": orig_s - end / float(sample_rate)
+    }
+    return audio, info
+
+def to_int16_pcm(samples: "np.ndarray") -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
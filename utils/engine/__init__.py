@@ -1,4 +1,7 @@
 from .resolver import PipelineResolver
 from .executor import PipelineExecutor
+from .runtime import PipelineRuntime
+from .compiler import PipelineCompiler, CompiledPipeline, PipelineCompileError, get_compiler
 from .stream_utils import chunk_by_delimiter
 from .layout import GraphLayoutEngine
+from .packet import PipelinePacket, PayloadKind
@@ -1,31 +1,78 @@
 import os
-import yaml
-import json
 from loguru import logger
 from .contract import Capability, MappingPreference, NodeImplementation, IOType
 from .registry import ImplementationRegistry
 from .implementations import execute_openai_chat, execute_whisper_stt, execute_chatterbox_tts
-from utils.config import get_project_root, safe_filename
+from .file_cache import FileCache, CalibrationStore, file_signature, load_json_file
+from .cost import CostModel, LatencyProfile, get_cost_model
+from .strategy import BindingStrategy, StrategyPick, model_key, pick_within_budget, enforce_e2e_budget
+from utils.config import get_project_root
 
 class AutoBinder:
     """
     Intelligent Model and Edge Binder for Jarvis Pipelines.
     Matches logical nodes to physical implementations (local functions or remote models).
     """
-    def __init__(self, project_root=None):
+    def __init__(self, project_root=None, calibrations=None, cost_model: CostModel = None):
         self.project_root = project_root if project_root else get_project_root()
         self.cal_dir = os.path.join(self.project_root, "system_config", "model_calibrations")
         self.cache_path = os.path.join(self.project_root, ".cache", "pipeline_bindings.json")
+        self.calibrations = calibrations or CalibrationStore(self.cal_dir)
+        self._bindings_cache = FileCache(load_json_file)
         self.registry = ImplementationRegistry()
+        self.cost_model = cost_model  # Overrides the preference-based ranking when set
+        self.latency_profile = LatencyProfile(self.project_root)  # Measured latencies checked against strategy budgets
+        self._cost_models = {}
+        self._index_key = None
+        self._index = None
+        self._aliases = []  # (model_key, implementation id) for every live model
+
+    def get_cost_model(self, preference: MappingPreference) -> CostModel:
+        if self.cost_model: return self.cost_model
+        if preference not in self._cost_models:
+            self._cost_models[preference] = get_cost_model(preference, self.project_root)
+        return self._cost_models[preference]
+
+    def candidate_index(self, active_models) -> ImplementationRegistry:
+        """Static implementations overlaid with the loadout's models; rebuilt only when the loadout or its calibrations change."""
+        key = tuple(
+            (m.get('id'), m.get('engine'), m.get('port'), tuple(m.get('capabilities', [])),
+             file_signature(self.calibrations.path_for(m.get('id', ''), m.get('engine', ''))))
+            for m in active_models
+        )
+        if key != self._index_key:
+            self._index = self.registry.overlay(self._model_to_implementation(m) for m in active_models)
+            self._aliases = []
+            for m in active_models:
+                cal_id = self.calibrations.get(m.get('id', ''), m.get('engine', '')).get('id')
+                for alias in {model_key(m['id']), model_key(cal_id)}:
+                    if alias: self._aliases.append((alias, m['id']))
+            self._index_key = key
+        return self._index
+
+    def match_candidate(self, name, index):
+        """Live implementation for a strategy candidate: its exact id, else a model id or calibration name with the same `model_key`."""
+        exact = index.get(name)
+        if exact: return exact
+        key = model_key(name)
+        for alias, impl_id in self._aliases:
+            if alias == key: return index.get(impl_id)
+        return None
+
+    def live_candidates(self, node, candidates, index) -> list[NodeImplementation]:
+        """The strategy's candidates that are served by the loadout and satisfy the node, in strategy order."""
+        capable = {impl.id for impl in index.find_by_capability(node.get('capabilities', []))}
+        live, seen = [], set()
+        for name in candidates:
+            impl = self.match_candidate(name, index)
+            if impl and impl.id in capable and impl.id not in seen:
+                live.append(impl)
+                seen.add(impl.id)
+        return live
 
     def _get_model_physics(self, model_id, engine):
-        """Loads calibration data for a model to get its 'weight' (VRAM/Params)."""
-        safe_id = safe_filename(model_id)
-        path = os.path.join(self.cal_dir, f"{engine}_{safe_id}.yaml")
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                return yaml.safe_load(f)
-        return {}
+        """Calibration data for a model, used for its 'weight' (VRAM/Params). Served from the in-memory store."""
+        return self.calibrations.get(model_id, engine)
 
     def _model_to_implementation(self, m: dict) -> NodeImplementation:
         """Wraps a loadout model into a standard NodeImplementation object."""
@@ -39,10 +86,10 @@ class AutoBinder:
         elif engine == 'native':
             if any(c in [Capability.STT, "stt"] for c in caps):
                 fn = execute_whisper_stt
-                it, ot = [IOType.AUDIO_FILE], [IOType.TEXT_FINAL]
+                it, ot = [IOType.AUDIO_FILE, IOType.AUDIO_STREAM], [IOType.TEXT_FINAL]
             elif any(c in [Capability.TTS, "tts"] for c in caps):
                 fn = execute_chatterbox_tts
-                it, ot = [IOType.TEXT_FINAL], [IOType.AUDIO_FILE]
+                it, ot = [IOType.TEXT_FINAL, IOType.TEXT_STREAM], [IOType.AUDIO_FILE, IOType.AUDIO_STREAM]
             else:
                 fn = None; it = ot = []
         else:
@@ -59,26 +106,22 @@ class AutoBinder:
         )
 
     def get_persisted_binding(self, pipeline_id, loadout_id, node_id):
-        """Checks the local cache for a manual override."""
-        if not os.path.exists(self.cache_path): return None
-        try:
-            with open(self.cache_path, "r") as f:
-                data = json.load(f)
-                key = f"{pipeline_id}::{loadout_id}"
-                return data.get(key, {}).get(node_id)
-        except: return None
-
-    def generate_manifest(self, pipeline_id, nodes, active_models, preference=MappingPreference.PREFER_BIG, loadout_id="unknown", overrides=None, silent=False):
+        """Checks the local cache for a manual override (the file is parsed once per change, not once per node)."""
+        data = self._bindings_cache.get(self.cache_path, default={}, copy_result=False)
+        if not isinstance(data, dict): return None
+        return data.get(f"{pipeline_id}::{loadout_id}", {}).get(node_id)
+
+    def generate_manifest(self, pipeline_id, nodes, active_models, preference=MappingPreference.PREFER_BIG, loadout_id="unknown", overrides=None, silent=False, strategy: BindingStrategy = None):
         """
         Creates a binding manifest for a list of nodes.
-        Hierarchy: Manual Overrides > Fixed YAML Binding > Cache Override > Heuristic Discovery.
+        Hierarchy: Manual Overrides > Fixed YAML Binding > Cache Override > Strategy Candidates > Heuristic Discovery.
         """
         manifest = {}
+        picks: dict[str, StrategyPick] = {}
         
-        # 1. Prepare candidate implementations (Static + Dynamic Models)
-        all_candidates = self.registry.get_all().copy()
-        for m in active_models:
-            all_candidates.append(self._model_to_implementation(m))
+        # 1. Candidate implementations (Static + Dynamic Models), indexed by capability
+        index = self.candidate_index(active_models)
+        cost_model = self.get_cost_model(preference)
 
         for node in nodes:
             nid = node['id']
@@ -93,7 +136,7 @@ class AutoBinder:
             
             # A. Strategy 1: Fixed Binding (Direct implementation ID in YAML)
             if fixed_impl_id:
-                bound = next((c for c in all_candidates if c.id == fixed_impl_id), None)
+                bound = index.get(fixed_impl_id)
                 if bound:
                     manifest[nid] = bound
                     continue
@@ -103,29 +146,40 @@ class AutoBinder:
             # B. Strategy 2: Persistent Cache Override
             cache_override = self.get_persisted_binding(pipeline_id, loadout_id, nid)
             if cache_override:
-                bound = next((c for c in all_candidates if c.id == cache_override), None)
+                bound = index.get(cache_override)
                 if bound:
                     manifest[nid] = bound
                     continue
 
-            # C. Strategy 3: Discovery based on Capabilities
+            # C. Strategy 3: Strategy Candidates (first live model within the node's latency budget)
+            node_strategy = strategy.bindings.get(nid) if strategy else None
+            if node_strategy and node_strategy.candidates:
+                live = self.live_candidates(node, node_strategy.candidates, index)
+                if live:
+                    picks[nid] = pick_within_budget(node, live, node_strategy.budget_s, self.latency_profile, silent)
+                    manifest[nid] = picks[nid].chosen
+                    continue
+                if not silent: logger.warning(f"No candidate of strategy '{strategy.id}' is live for node {nid}; falling back to discovery")
+
+            # D. Strategy 4: Discovery based on Capabilities
             if required_caps:
-                candidates = [
-                    c for c in all_candidates 
-                    if all(rc in c.capabilities for rc in required_caps)
-                ]
-                
+                candidates = index.find_by_capability(required_caps)
+
                 if not candidates:
                     if not silent: logger.warning(f"No implementations satisfy capabilities {required_caps} for node {nid}")
                     manifest[nid] = None
                     continue
 
-                # Sort by physics if multiple candidates exist
-                reverse = (preference == MappingPreference.PREFER_BIG)
-                candidates.sort(key=lambda x: x.physics_weight, reverse=reverse)
-                manifest[nid] = candidates[0]
+                # Rank by the preference's cost model (VRAM size or measured latency)
+                manifest[nid] = cost_model.rank(candidates, node)[0] if len(candidates) > 1 else candidates[0]
             else:
                 # No capabilities and no fixed binding? Node is likely a passthrough or utility
                 manifest[nid] = None
 
+        if picks and strategy.e2e_budget_s is not None:
+            total = enforce_e2e_budget(picks, strategy.e2e_budget_s, self.latency_profile, silent)
+            for nid, pick in picks.items():
+                manifest[nid] = pick.chosen
+            if total and not silent: logger.info(f"⏱️ Strategy '{strategy.id}': estimated {total:.2f}s of {strategy.e2e_budget_s:.2f}s end-to-end budget")
+
         return manifest
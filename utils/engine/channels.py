@@ -0,0 +1,242 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Optional
+from .contract import OverflowPolicy
+from .packet import PipelinePacket
+
+def coalesce_packets(older: Any, newer: Any) -> Any:
+    """Merges two packets for a COALESCE edge: text is concatenated, any other payload keeps the newest value."""
+    older, newer = PipelinePacket.coerce(older), PipelinePacket.coerce(newer)
+    if older.is_text and newer.is_text:
+        return older.replace(content=older.content + newer.content, ts=newer.ts)
+    return newer
+
+class ChannelCursor:
+    """
+    A single subscriber's read position inside a BroadcastChannel.
+    Mirrors the `asyncio.Queue.get()` contract used by the executor: returns packets in order and `None` once the channel is closed and drained.
+    """
+    def __init__(self, channel: "BroadcastChannel", subscriber_id: str, position: int, capacity: Optional[int] = None, overflow: OverflowPolicy = OverflowPolicy.BLOCK):
+        self.channel = channel
+        self.subscriber_id = subscriber_id
+        self.position = position  # Absolute offset of the next packet to read
+        self.capacity = capacity
+        self.overflow = overflow
+        self.detached = False
+        self._carry = None        # COALESCE: merged packet standing in for everything before `position`
+        self._wakeup = asyncio.Event()
+
+        # Edge counters (reported to the trace by the executor)
+        self.max_depth = 0
+        self.blocked_s = 0.0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def lag(self) -> int:
+        """Number of published packets this subscriber has not consumed yet."""
+        return self.channel.head - self.position
+
+    @property
+    def depth(self) -> int:
+        """Unread packets as seen by the consumer (including a pending coalesced packet)."""
+        return self.lag + (1 if self._carry is not None else 0)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity, "overflow": self.overflow.value,
+            "depth_max": self.max_depth, "blocked_s": round(self.blocked_s, 6),
+            "dropped": self.dropped, "coalesced": self.coalesced
+        }
+
+    async def get(self) -> Optional[Any]:
+        ch = self.channel
+        if self._carry is not None:
+            packet, self._carry = self._carry, None
+            ch._room.set()
+            return packet
+
+        while self.position >= ch.head:
+            if ch.closed or self.detached: return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        packet = ch._log[self.position - ch.base]
+        self.position += 1
+        ch._release()
+        ch._room.set()
+        return packet
+
+    def detach(self):
+        """Stops consuming. Packets retained only for this cursor become releasable immediately."""
+        if self.detached: return
+        self.detached = True
+        self._carry = None
+        self.channel._unsubscribe(self)
+        self._wakeup.set()
+
+    def _enforce_capacity(self):
+        """Applies the non-blocking overflow policies right after a publish. Turn markers are never dropped or merged."""
+        ch = self.channel
+        if getattr(ch._log[-1], 'is_turn_end', False): return  # A marker never displaces the data of its own turn
+        while self.depth > self.capacity and self.position < ch.head:
+            oldest = ch._log[self.position - ch.base]
+            if getattr(oldest, 'is_turn_end', False): break  # Shedding never crosses a turn boundary
+            self.position += 1
+            if self.overflow == OverflowPolicy.DROP_OLDEST:
+                self.dropped += 1
+            elif self._carry is None:
+                self._carry = oldest
+            else:
+                self._carry = coalesce_packets(self._carry, oldest)
+                self.coalesced += 1
+
+class BroadcastChannel:
+    """
+    Multicast edge for the flow graph: one producer, N subscribers.
+    Packets live once in a shared append-only log; each subscriber reads through its own cursor.
+    A packet is released as soon as every live cursor has moved past it, so fan-out never copies payloads.
+    Cursors may be bounded: a BLOCK cursor applies backpressure to the producer, the others shed or merge load.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.base = 0      # Absolute offset of _log[0]
+        self.head = 0      # Absolute offset of the next packet to be published
+        self.closed = False
+        self._log = deque()
+        self._cursors: list[ChannelCursor] = []
+        self._room = asyncio.Event()
+
+    def subscribe(self, subscriber_id: str, capacity: Optional[int] = None, overflow: OverflowPolicy = OverflowPolicy.BLOCK) -> ChannelCursor:
+        """Registers a subscriber. It will see every packet published from now on."""
+        cursor = ChannelCursor(self, subscriber_id, self.head, capacity, overflow)
+        self._cursors.append(cursor)
+        return cursor
+
+    @property
+    def subscribers(self) -> list[ChannelCursor]:
+        return list(self._cursors)
+
+    @property
+    def retained(self) -> int:
+        """Number of packets currently held in memory."""
+        return len(self._log)
+
+    async def put(self, packet: Any):
+        """Queue-compatible publish. Awaits while a BLOCK subscriber is full; `None` closes the channel (end-of-stream)."""
+        if packet is None:
+            self.close()
+            return
+        await self._wait_for_room()
+        self.publish(packet)
+
+    def publish(self, packet: Any):
+        if self.closed:
+            raise RuntimeError(f"Channel '{self.name}' is closed.")
+        self._log.append(packet)
+        self.head += 1
+        for c in self._cursors:
+            if c.capacity and c.overflow != OverflowPolicy.BLOCK:
+                c._enforce_capacity()
+            if c.depth > c.max_depth: c.max_depth = c.depth
+        self._release()
+        self._notify()
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self._notify()
+
+    async def _wait_for_room(self):
+        while True:
+            full = [
+                c for c in self._cursors
+                if c.capacity and c.overflow == OverflowPolicy.BLOCK and c.depth >= c.capacity
+            ]
+            if not full: return
+            self._room.clear()
+            t0 = time.perf_counter()
+            await self._room.wait()
+            waited = time.perf_counter() - t0
+            for c in full: c.blocked_s += waited
+
+    def _notify(self):
+        for c in self._cursors:
+            c._wakeup.set()
+
+    def _unsubscribe(self, cursor: ChannelCursor):
+        if cursor in self._cursors:
+            self._cursors.remove(cursor)
+        self._release()
+        self._room.set()
+
+    def _release(self):
+        """Drops every packet that all live cursors have already consumed."""
+        low = min((c.position for c in self._cursors), default=self.head)
+        while self.base < low:
+            self._log.popleft()
+            self.base += 1
+
+class TurnInput:
+    """
+    Turn-delimited reader over a cursor, for graphs that stay alive across turns.
+    Keeps one packet of lookahead so a node can wait for its next turn without consuming it; `finish_turn()`
+    skips whatever the node left unread of the current turn, up to and including the turn marker.
+    """
+    def __init__(self, cursor: ChannelCursor):
+        self.cursor = cursor
+        self._pending = None
+        self._has_pending = False
+
+    @property
+    def ready(self) -> bool:
+        return self._has_pending
+
+    @property
+    def closed(self) -> bool:
+        return self._has_pending and self._pending is None
+
+    @property
+    def turn(self) -> Optional[int]:
+        """Turn id of the packet waiting to be read (None if nothing is pending)."""
+        return self._pending.get("turn") if self._pending is not None else None
+
+    async def peek(self) -> Optional[Any]:
+        if not self._has_pending:
+            self._pending = await self.cursor.get()
+            self._has_pending = True
+        return self._pending
+
+    async def next(self) -> Optional[Any]:
+        packet = await self.peek()
+        if packet is not None: self._has_pending = False  # End-of-stream stays pending
+        return packet
+
+    async def finish_turn(self):
+        while True:
+            packet = await self.next()
+            if packet is None or packet.is_turn_end: return
+
+class TurnGate:
+    """Turn counter shared by the sources of a continuous graph: the driver opens turns, follower sources wait for them."""
+    def __init__(self):
+        self.opened = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def open(self, turn: int):
+        self.opened = max(self.opened, turn)
+        self._changed.set()
+
+    def close(self):
+        self.closed = True
+        self._changed.set()
+
+    async def wait_for(self, turn: int) -> bool:
+        """True once `turn` has been opened; False if the gate closed first."""
+        while self.opened < turn:
+            if self.closed: return False
+            self._changed.clear()
+            await self._changed.wait()
+        return True
@@ -0,0 +1,210 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+from loguru import logger
+from utils.config import get_project_root
+from .contract import IOType, get_input_edges
+from .cost import LatencyProfile
+from .file_cache import CalibrationStore, file_signature
+
+# Representations of the same modality are bridged by the packet layer (a final text is a one-chunk stream,
+# an audio file can be read as a stream), so only a modality mismatch is a hard type error.
+_MODALITY = {
+    IOType.TEXT_STREAM: "text", IOType.TEXT_FINAL: "text",
+    IOType.AUDIO_FILE: "audio", IOType.AUDIO_STREAM: "audio",
+    IOType.IMAGE_FILE: "image", IOType.IMAGE_RAW: "image",
+    IOType.VIDEO_FILE: "video",
+    IOType.SIGNAL: "signal",
+    IOType.DATA_PATH: None  # Generic fallback: compatible with anything
+}
+_WIDENS = {IOType.TEXT_FINAL: IOType.TEXT_STREAM}  # Exact enough to need no warning
+
+# Declared node capabilities stand in for IO types when the binding does not declare any
+_CAP_INPUTS = {
+    "text_in": [IOType.TEXT_FINAL, IOType.TEXT_STREAM], "audio_in": [IOType.AUDIO_FILE, IOType.AUDIO_STREAM],
+    "image_in": [IOType.IMAGE_FILE, IOType.IMAGE_RAW], "video_in": [IOType.VIDEO_FILE]
+}
+_CAP_OUTPUTS = {
+    "text_out": [IOType.TEXT_FINAL, IOType.TEXT_STREAM], "audio_out": [IOType.AUDIO_FILE, IOType.AUDIO_STREAM],
+    "image_out": [IOType.IMAGE_FILE], "video_out": [IOType.VIDEO_FILE]
+}
+
+class PipelineCompileError(ValueError):
+    """Raised when a bound graph has structural errors (cycles, dangling inputs, incompatible edges)."""
+
+@dataclass
+class CompiledPipeline:
+    """
+    Static analysis of one bound graph.
+    `stages` groups nodes by topological rank (every node's inputs live in earlier stages) and `order` flattens
+    them into the schedule. Latency predictions are time-to-first-output: measured TTFT / TTFA / STT RTF per node,
+    accumulated along the slowest chain (`critical_path`). Nodes without measurements count as zero and are listed
+    in `unmeasured`. `peak_vram_gb` sums the calibrated footprint of every distinct bound model (all stay resident).
+    """
+    order: list[str] = field(default_factory=list)
+    stages: list[list[str]] = field(default_factory=list)
+    ranks: dict[str, int] = field(default_factory=dict)
+    parents: dict[str, list[str]] = field(default_factory=dict)
+    node_latency: dict[str, Optional[float]] = field(default_factory=dict)
+    critical_path: list[str] = field(default_factory=list)
+    predicted_latency_s: float = 0.0
+    unmeasured: list[str] = field(default_factory=list)
+    peak_vram_gb: float = 0.0
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def raise_for_errors(self, pipeline_id: str = "pipeline"):
+        if self.errors:
+            raise PipelineCompileError(f"{pipeline_id} failed to compile: " + "; ".join(self.errors))
+
+def node_io_types(node: dict) -> tuple[list[IOType], list[IOType]]:
+    """(inputs, outputs) a node accepts/produces: the binding's declared types, else those implied by its capabilities."""
+    impl = node.get('binding')
+    caps = [c.value if hasattr(c, 'value') else str(c) for c in node.get('capabilities', []) or []]
+    inputs = list(impl.input_types) if impl and impl.input_types else [t for c in caps for t in _CAP_INPUTS.get(c, [])]
+    outputs = list(impl.output_types) if impl and impl.output_types else [t for c in caps for t in _CAP_OUTPUTS.get(c, [])]
+    return inputs, outputs
+
+def check_edge(outputs: list[IOType], inputs: list[IOType]) -> Optional[str]:
+    """None if the edge is compatible, 'error' on a modality mismatch, 'warning' on a representation-only mismatch."""
+    if not outputs or not inputs: return None  # Untyped side (e.g. a bare mock): nothing to check
+    if set(outputs) & set(inputs) or {_WIDENS.get(t) for t in outputs} & set(inputs): return None
+    if IOType.DATA_PATH in outputs or IOType.DATA_PATH in inputs: return None
+    if {_MODALITY[t] for t in outputs} & {_MODALITY[t] for t in inputs}: return "warning"
+    return "error"
+
+class PipelineCompiler:
+    """
+    Validates and schedules bound graphs ahead of execution. Results are memoized per graph structure (node ids,
+    edges, bindings) plus the signatures of the latency profile and the bound models' calibrations, so the
+    executor and the UI layout share one analysis per resolved graph.
+    """
+    def __init__(self, project_root: str = None, calibrations: CalibrationStore = None, latency_profile: LatencyProfile = None, capacity: int = 64):
+        self.project_root = project_root or get_project_root()
+        self.calibrations = calibrations or CalibrationStore(os.path.join(self.project_root, "system_config", "model_calibrations"))
+        self.latency_profile = latency_profile or LatencyProfile(self.project_root)
+        self.capacity = capacity
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model(node: dict) -> dict:
+        impl = node.get('binding')
+        return (impl.config.get('binding') or {}) if impl and isinstance(impl.config, dict) else {}
+
+    def key(self, bound_graph: dict) -> tuple:
+        """Cheap structural key: ids, edges, bindings and the stats of every file the predictions read."""
+        nodes = []
+        cal_sigs = []
+        for nid, node in bound_graph.items():
+            impl = node.get('binding')
+            model = self._model(node)
+            inputs, outputs = node_io_types(node)
+            nodes.append((
+                nid, node.get('role'), impl.id if impl else None,
+                tuple(t.value for t in inputs), tuple(t.value for t in outputs),
+                tuple(e.source for e in get_input_edges(node)),
+                (model.get('params') or {}).get('num_ctx')
+            ))
+            if model: cal_sigs.append(file_signature(self.calibrations.path_for(model.get('id', ''), model.get('engine', ''))))
+        return (tuple(nodes), self.latency_profile.signature, tuple(cal_sigs))
+
+    def compile(self, bound_graph: dict) -> CompiledPipeline:
+        key = self.key(bound_graph)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        compiled = self._compile(bound_graph)
+        with self._lock:
+            self._cache[key] = compiled
+            while len(self._cache) > self.capacity: self._cache.popitem(last=False)
+        return compiled
+
+    def _compile(self, bound_graph: dict) -> CompiledPipeline:
+        result = CompiledPipeline()
+
+        # 1. Edges: dangling inputs and IO type compatibility
+        for nid, node in bound_graph.items():
+            parents = []
+            in_types = node_io_types(node)[0]
+            for edge in get_input_edges(node):
+                if edge.source not in bound_graph:
+                    result.errors.append(f"'{nid}' reads from unknown node '{edge.source}'")
+                    continue
+                parents.append(edge.source)
+                out_types = node_io_types(bound_graph[edge.source])[1]
+                verdict = check_edge(out_types, in_types)
+                if verdict:
+                    msg = (f"'{edge.source}' -> '{nid}': produces {[t.value for t in out_types]}, "
+                           f"accepts {[t.value for t in in_types]}")
+                    (result.errors if verdict == "error" else result.warnings).append(msg)
+            result.parents[nid] = parents
+
+        # 2. Topological schedule (Kahn); nodes never released sit on or behind a cycle
+        pending = {nid: len(set(p)) for nid, p in result.parents.items()}
+        children = {nid: [] for nid in bound_graph}
+        for nid, parents in result.parents.items():
+            for p in set(parents): children[p].append(nid)
+        stage = [nid for nid, n in pending.items() if n == 0]
+        while stage:
+            result.stages.append(stage)
+            for nid in stage: result.ranks[nid] = len(result.stages) - 1
+            released = []
+            for nid in stage:
+                for child in children[nid]:
+                    pending[child] -= 1
+                    if pending[child] == 0: released.append(child)
+            stage = released
+        result.order = [nid for s in result.stages for nid in s]
+        cyclic = [nid for nid in bound_graph if nid not in result.ranks]
+        if cyclic:
+            result.errors.append(f"cycle detected; unschedulable nodes: {cyclic}")
+
+        # 3. Predictions: per-node latency, critical path, resident VRAM
+        finish, via = {}, {}  # nid -> (seconds to first output, hops); hops break ties toward the longest chain
+        for nid in result.order:
+            node = bound_graph[nid]
+            impl = node.get('binding')
+            est = self.latency_profile.estimate(impl.id, node.get('role')) if impl else None
+            result.node_latency[nid] = est
+            if impl and est is None and self._model(node): result.unmeasured.append(nid)
+            best = max(result.parents[nid], key=lambda p: finish[p], default=None)
+            before = finish[best] if best else (0.0, 0)
+            finish[nid] = (before[0] + (est or 0.0), before[1] + 1)
+            via[nid] = best
+        if finish:
+            tail = max(finish, key=finish.get)
+            result.predicted_latency_s = finish[tail][0]
+            while tail:
+                result.critical_path.insert(0, tail)
+                tail = via[tail]
+
+        seen = set()
+        for node in bound_graph.values():
+            model = self._model(node)
+            ident = (model.get('id'), model.get('engine'))
+            if not model or ident in seen: continue
+            seen.add(ident)
+            constants = self.calibrations.get(*ident).get('constants', {}) or {}
+            ctx = (model.get('params') or {}).get('num_ctx') or 0
+            result.peak_vram_gb += float(constants.get('base_vram_gb', 0.0) or 0.0)
+            result.peak_vram_gb += float(constants.get('kv_cache_gb_per_10k', 0.0) or 0.0) * ctx / 10000.0
+
+        for w in result.warnings: logger.debug(f"Pipeline compile warning: {w}")
+        return result
+
+_COMPILERS: dict[str, PipelineCompiler] = {}
+
+def get_compiler(project_root: str = None) -> PipelineCompiler:
+    """Process-wide compiler per project root, so every caller shares the same compiled-graph cache."""
+    root = project_root or get_project_root()
+    if root not in _COMPILERS:
+        _COMPILERS[root] = PipelineCompiler(root)
+    return _COMPILERS[root]
@@ -1,6 +1,6 @@
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Union
 
 class Capability(Enum):
     """Formalized model capabilities for autonomous binding."""
@@ -24,6 +24,7 @@ class MappingPreference(Enum):
     """User preference for automatic model selection."""
     PREFER_BIG = "prefer_big"
     PREFER_SMALL = "prefer_small"
+    PREFER_FAST = "prefer_fast"  # Lowest measured latency (see utils/engine/cost.py)
 
 class IOType(Enum):
     """Strict data types for node input/output validation."""
@@ -37,6 +38,45 @@ class IOType(Enum):
     SIGNAL = "signal"  # For PTT events, etc.
     DATA_PATH = "data_path" # Generic fallback
 
+class OverflowPolicy(Enum):
+    """What a bounded edge does when its consumer falls `capacity` packets behind."""
+    BLOCK = "block"              # Producer awaits until the consumer catches up (backpressure)
+    DROP_OLDEST = "drop_oldest"  # Consumer skips its oldest unread packet
+    COALESCE = "coalesce"        # Oldest unread packets are merged (text concatenated, other payloads keep the latest)
+
+@dataclass
+class EdgeSpec:
+    """
+    A single entry of a node's `inputs` list.
+    Accepts the short form (`- proc_llm`) or the mapping form (`- {source: proc_llm, capacity: 32, overflow: block}`).
+    """
+    source: str
+    capacity: Optional[int] = None  # None = unbounded
+    overflow: OverflowPolicy = OverflowPolicy.BLOCK
+
+    @classmethod
+    def parse(cls, entry: Union[str, dict]) -> "EdgeSpec":
+        if isinstance(entry, str):
+            return cls(source=entry)
+        if not isinstance(entry, dict) or 'source' not in entry:
+            raise ValueError(f"Invalid input edge '{entry}'. Expected a node id or a mapping with a 'source' key.")
+        capacity = entry.get('capacity')
+        if capacity is not None and int(capacity) < 1:
+            raise ValueError(f"Edge from '{entry['source']}' must have capacity >= 1 (got {capacity}).")
+        return cls(
+            source=entry['source'],
+            capacity=int(capacity) if capacity is not None else None,
+            overflow=OverflowPolicy(entry.get('overflow', OverflowPolicy.BLOCK.value))
+        )
+
+def get_input_edges(node: dict) -> list[EdgeSpec]:
+    """Returns the parsed input edges of a pipeline node, including its system prompt source."""
+    edges = [EdgeSpec.parse(e) for e in node.get('inputs', []) or []]
+    sys_prompt_id = node.get('system_prompt')
+    if sys_prompt_id and all(e.source != sys_prompt_id for e in edges):
+        edges.append(EdgeSpec(source=sys_prompt_id))
+    return edges
+
 @dataclass
 class NodeImplementation:
     """
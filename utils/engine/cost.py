@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import statistics
+from typing import Callable, Optional
+from loguru import logger
+from .contract import MappingPreference, NodeImplementation
+from .file_cache import FileCache, file_signature, load_json_file
+
+LATENCY_PROFILE = os.path.join(".cache", "model_latency.json")
+
+# Which measured metric estimates a node's latency, per role. STT RTF is scaled to a typical utterance.
+ROLE_METRICS = {"llm": "ttft", "vlm": "ttft", "tts": "ttfa", "stt": "rtf"}
+REFERENCE_UTTERANCE_S = 3.0
+
+class LatencyProfile:
+    """
+    Per-model latencies measured by past benchmark runs, stored in `.cache/model_latency.json`.
+    The backend runner records the node metrics of every real-model scenario; each metric keeps its last
+    `window` samples and is summarized by the median, so one cold start does not skew the ranking.
+    """
+    def __init__(self, project_root: str, window: int = 20):
+        self.path = os.path.join(project_root, LATENCY_PROFILE)
+        self.window = window
+        self._cache = FileCache(load_json_file)
+
+    @property
+    def signature(self):
+        return file_signature(self.path)
+
+    def _data(self) -> dict:
+        data = self._cache.get(self.path, default={}, copy_result=False)
+        return data if isinstance(data, dict) else {}
+
+    def get(self, model_id: str) -> dict:
+        """Median of every recorded metric for a model ({} if it was never measured)."""
+        samples = self._data().get(model_id, {}).get("samples", {})
+        return {k: statistics.median(v) for k, v in samples.items() if v}
+
+    def estimate(self, model_id: str, role: Optional[str] = None) -> Optional[float]:
+        """Expected seconds until the node produces useful output, or None if unmeasured."""
+        stats = self.get(model_id)
+        metric = ROLE_METRICS.get((role or "").lower())
+        if metric == "rtf" and "rtf" in stats:
+            return stats["rtf"] * REFERENCE_UTTERANCE_S
+        if metric and metric in stats:
+            return stats[metric]
+        return stats.get("duration")
+
+    def record(self, model_id: str, metrics: dict):
+        self.record_many({model_id: metrics})
+
+    def record_many(self, entries: dict):
+        """entries: model_id -> {metric: seconds}. Non-numeric values are ignored."""
+        data = json.loads(json.dumps(self._data()))
+        for model_id, metrics in entries.items():
+            entry = data.setdefault(model_id, {"samples": {}})
+            for key, value in metrics.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0: continue
+                series = entry["samples"].setdefault(key, [])
+                series.append(float(value))
+                del series[:-self.window]
+            entry["updated"] = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to update latency profile: {e}")
+
+class CostModel:
+    """Ranks binding candidates for a node. `cost()` returns a sortable key; the lowest key wins."""
+    def cost(self, impl: NodeImplementation, node: dict):
+        raise NotImplementedError
+
+    def rank(self, candidates: list[NodeImplementation], node: dict) -> list[NodeImplementation]:
+        return sorted(candidates, key=lambda c: self.cost(c, node))
+
+class VramCostModel(CostModel):
+    """The original physics heuristic: rank by base VRAM (biggest or smallest first)."""
+    def __init__(self, prefer_big: bool = True):
+        self.prefer_big = prefer_big
+
+    def cost(self, impl, node):
+        return -impl.physics_weight if self.prefer_big else impl.physics_weight
+
+class LatencyCostModel(CostModel):
+    """Ranks by measured latency for the node's role. Unmeasured candidates go last, smallest first."""
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+
+    def cost(self, impl, node):
+        estimate = self.profile.estimate(impl.id, node.get('role'))
+        return (estimate if estimate is not None else float("inf"), impl.physics_weight)
+
+_COST_MODELS: dict[MappingPreference, Callable[[str], CostModel]] = {
+    MappingPreference.PREFER_BIG: lambda root: VramCostModel(prefer_big=True),
+    MappingPreference.PREFER_SMALL: lambda root: VramCostModel(prefer_big=False),
+    MappingPreference.PREFER_FAST: lambda root: LatencyCostModel(LatencyProfile(root)),
+}
+
+def register_cost_model(preference: MappingPreference, factory: Callable[[str], CostModel]):
+    """Plugs in a different ranking for a preference. `factory(project_root)` builds the model."""
+    _COST_MODELS[preference] = factory
+
+def get_cost_model(preference: MappingPreference, project_root: str) -> CostModel:
+    return _COST_MODELS.get(preference, _COST_MODELS[MappingPreference.PREFER_BIG])(project_root)
+
+def parse_preference(value) -> MappingPreference:
+    if isinstance(value, MappingPreference): return value
+    try:
+        return MappingPreference(str(value).lower())
+    except ValueError:
+        logger.warning(f"Unknown mapping preference '{value}', using prefer_big.")
+        return MappingPreference.PREFER_BIG
@@ -3,9 +3,18 @@ import time
 import shutil
 import asyncio
 import aiohttp
+from collections import OrderedDict
 from loguru import logger
 
 import utils
+from .channels import BroadcastChannel, TurnGate, TurnInput
+from .compiler import PipelineCompileError, get_compiler
+from .contract import get_input_edges
+from .packet import PipelinePacket, PayloadKind
+from .recorder import FlightRecorder
+
+IDLE_BACKOFF_S = 0.25    # Continuous mode: pause after a driver invocation that produced nothing (e.g. PTT wait timed out)
+TURN_TIMINGS_KEPT = 256  # Continuous mode: per-turn timing entries retained
 
 class PipelineExecutor:
     def __init__(self, project_root, dashboard=None, session_dir=None):
@@ -13,9 +22,18 @@ class PipelineExecutor:
         self.session_dir = session_dir
         self.results = {}     # Node-id -> Consolidated results (for UI/debugging)
         self.timings = {}     # Node-id -> {start, end, duration}
-        self.trace = []       # Global Flight Recorder (Packet metadata)
+        self.turn_timings = OrderedDict()  # Continuous mode: turn -> {opened, closed, nodes: {node-id -> {start, end, first_out}}}
+        trace_cfg = utils.load_config().get('system', {}).get('trace', {})
+        self.trace = FlightRecorder(   # Global Flight Recorder (bounded ring of packet metadata)
+            capacity=trace_cfg.get('capacity', 65536),
+            content_sample_every=trace_cfg.get('content_sample_every', 1),
+            content_max_chars=trace_cfg.get('content_max_chars')
+        )
+        self.trace_artifacts = trace_cfg.get('audio_artifacts', True)  # Nodes may write debug WAVs off the critical path
         self.dashboard = dashboard
         self.vram_peak = 0.0
+        self.compiler = get_compiler(project_root)  # Shared with the UI layout; one analysis per resolved graph
+        self.compiled = None
 
     def resolve_path(self, path, default_filename=None):
         """Resolves a path relative to session_dir if available, otherwise project_root."""
@@ -29,118 +47,312 @@ class PipelineExecutor:
         logger.info(msg)
         if self.dashboard: self.dashboard.log(msg)
 
-    def record_packet(self, node_id, packet, direction="OUT"):
-        """Records packet envelope to the trace, including content for text modalities."""
+    def record_packet(self, node_id, packet, direction="OUT", depth=None):
+        """Records packet envelope to the trace, including content for text modalities and artifact paths."""
         if not packet: return
-        self.trace.append({
-            "t": time.perf_counter(),
-            "node": node_id,
-            "dir": direction,
-            "type": packet.get("type"),
-            "seq": packet.get("seq", 0),
-            "content": packet.get("content") if packet.get("type", "").startswith("text") else None,
-            "data_len": len(str(packet.get("content", ""))) if packet.get("content") else 0
-        })
-
-    async def _proxy_stream(self, node_id, input_queue):
-        """Yields packets from a queue and logs them as 'IN' events."""
+        packet = PipelinePacket.coerce(packet)
+        # Nodes can attach measurements (e.g. playback latency) via metadata["metrics"]; they are stored as extra trace fields
+        metrics = packet.metadata.get("metrics") if packet.metadata else None
+        extra = dict(metrics) if metrics else {}
+        if packet.metadata and packet.metadata.get("turn") is not None:
+            extra["turn"] = packet.metadata["turn"]  # Continuous mode: correlates every packet with its turn
+        self.trace.record(
+            time.perf_counter(), node_id, packet.type, direction, packet.seq, packet.size,
+            content=packet.content if packet.kind in (PayloadKind.TEXT, PayloadKind.PATH) else None, depth=depth,
+            **extra
+        )
+
+    def record_edges(self, node_id, input_cursors):
+        """Records per-edge backpressure counters (queue depth, blocked producer time, shed packets)."""
+        for src_id, cursor in input_cursors.items():
+            self.trace.record(time.perf_counter(), node_id, "EDGE", src=src_id, **cursor.stats())
+
+    async def _proxy_stream(self, node_id, input_cursor):
+        """Yields packets from a channel cursor and logs them as 'IN' events."""
         while True:
-            packet = await input_queue.get()
+            depth = input_cursor.depth
+            packet = await input_cursor.get()
             if packet is None: break
-            self.record_packet(node_id, packet, direction="IN")
+            self.record_packet(node_id, packet, direction="IN", depth=depth)
+            yield packet
+
+    async def _turn_stream(self, node_id, turn_input):
+        """Yields one turn's packets from a TurnInput and logs them as 'IN' events. The turn marker is left unread."""
+        while True:
+            depth = turn_input.cursor.depth
+            packet = await turn_input.peek()
+            if packet is None or packet.is_turn_end: return
+            await turn_input.next()
+            self.record_packet(node_id, packet, direction="IN", depth=depth)
             yield packet
 
-    async def _capture_stream(self, node_id, output_queue):
-        """Intersects the output queue to record 'OUT' events and consolidate results."""
+    async def _capture_stream(self, node_id, output_channel, turn=None, on_first=None):
+        """
+        Intersects the output channel to record 'OUT' events and consolidate results.
+        With a `turn`, packets are stamped with it and `None` does not close the channel: turns end with a marker instead.
+        `on_first` is called with the first packet, before it is published.
+        """
         class LoggingQueue:
             def __init__(self, target_q, recorder, nid, results):
                 self.target_q = target_q
                 self.recorder = recorder
                 self.nid = nid
                 self.results = results
+                self.turn = turn
+                self.count = 0
+                self.first_t = None
             async def put(self, packet):
                 if packet is not None:
+                    # Legacy dict packets are normalized once here; downstream only sees PipelinePackets
+                    packet = PipelinePacket.coerce(packet)
+                    if self.turn is not None: packet["turn"] = self.turn
+                    if self.first_t is None:
+                        self.first_t = time.perf_counter()
+                        if on_first: on_first(packet)
+                    self.count += 1
                     self.recorder(self.nid, packet, "OUT")
                     if self.nid not in self.results: self.results[self.nid] = []
-                    self.results[self.nid].append(packet.get('content'))
+                    self.results[self.nid].append(packet.content)
+                elif self.turn is not None:
+                    return  # The executor closes the turn (and later the channel) itself
                 await self.target_q.put(packet)
-        return LoggingQueue(output_queue, self.record_packet, node_id, self.results)
+        return LoggingQueue(output_channel, self.record_packet, node_id, self.results)
 
-    async def execute_node(self, node_id, node, input_queues, output_queues, session):
-        """Agnostic node runner using the NodeImplementation system."""
+    async def _invoke(self, node_id, node, in_streams, out_q, session, turn=None):
+        """Runs a node's implementation once over the given streams. `turn` tags the lifecycle events in continuous mode."""
+        tag = {} if turn is None else {"turn": turn}
         start_t = time.perf_counter()
-        self.trace.append({"t": start_t, "node": node_id, "type": "START"})
-        
-        try:
-            # 1. Setup Data Flow
-            in_streams = {
-                nid: self._proxy_stream(node_id, q) 
-                for nid, q in input_queues.items()
-            }
-            out_q_wrapped = await self._capture_stream(node_id, output_queues[node_id])
+        self.trace.record(start_t, node_id, "START", **tag)
+        if turn is not None: self.results.pop(node_id, None)  # Results always describe the latest turn
 
-            # 2. Extract Implementation (Binding)
+        try:
+            # 1. Extract Implementation (Binding)
             implementation = node.get('binding')
             if not implementation:
                 # If node has no binding, it might be an input provider or a passthrough
                 self.log(f"  -> {node_id} (Skipping: No binding)")
                 return
 
-            self.log(f"  -> {node_id} (Running {implementation.id})")
+            self.log(f"  -> {node_id} (Running {implementation.id})" + (f" [turn {turn}]" if turn is not None else ""))
 
-            # 3. Track VRAM Peak
+            # 2. Track VRAM Peak
             try:
                 v = utils.get_gpu_vram_usage()
                 if v > self.vram_peak: self.vram_peak = v
             except: pass
 
-            # 4. Merge Config & Execute
+            # 3. Merge Config & Execute
             exec_config = node.copy()
             exec_config.update(implementation.config)
             exec_config['scenario_inputs'] = node.get('scenario_inputs', {})
             exec_config['session_dir'] = self.session_dir
+            exec_config['trace_artifacts'] = self.trace_artifacts
 
             if implementation.execute_fn:
-                await implementation.execute_fn(node_id, in_streams, exec_config, out_q_wrapped, session)
+                await implementation.execute_fn(node_id, in_streams, exec_config, out_q, session)
             else:
                 self.log(f"⚠️ No execute_fn for {node_id}")
 
+            end_t = time.perf_counter()
             self.timings[node_id] = {
                 "start": start_t, 
-                "end": time.perf_counter(), 
-                "duration": time.perf_counter() - start_t
+                "end": end_t, 
+                "duration": end_t - start_t
             }
-            self.trace.append({"t": time.perf_counter(), "node": node_id, "type": "FINISH"})
-            
+            if turn is not None: self._record_turn_timing(turn, node_id, start_t, end_t, out_q.first_t)
+            self.trace.record(end_t, node_id, "FINISH", **tag)
+
+        except asyncio.CancelledError:
+            # Turn preempted: the implementation has unwound (requests closed, audio flushed); propagate to the run
+            self.trace.record(time.perf_counter(), node_id, "CANCELLED", **tag)
+            raise
         except Exception as e:
             self.log(f"💥 {node_id} failed: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            self.trace.append({"t": time.perf_counter(), "node": node_id, "type": "ERROR", "msg": str(e)})
+            self.trace.record(time.perf_counter(), node_id, "ERROR", msg=str(e), **tag)
+
+    async def execute_node(self, node_id, node, input_cursors, channels, session):
+        """Agnostic node runner using the NodeImplementation system."""
+        try:
+            in_streams = {
+                nid: self._proxy_stream(node_id, c) 
+                for nid, c in input_cursors.items()
+            }
+            out_q_wrapped = await self._capture_stream(node_id, channels[node_id])
+            await self._invoke(node_id, node, in_streams, out_q_wrapped, session)
         finally:
-            await output_queues[node_id].put(None)
+            self.record_edges(node_id, input_cursors)
+            # Release our read positions so upstream packets are not retained for a finished consumer
+            for cursor in input_cursors.values(): cursor.detach()
+            await channels[node_id].put(None)
+
+    async def run(self, bound_graph, scenario_inputs, session=None):
+        """
+        Topological async execution loop. Symmetrical for all node types.
+        Pass a long-lived `session` (see PipelineRuntime) to reuse pooled keep-alive connections across turns;
+        otherwise a session is opened and closed for this run.
+        Cancelling the task that awaits `run` cancels every node task; it returns only after all nodes have unwound.
+        The graph is compiled first (cached); structural errors abort the run with a PipelineCompileError.
+        """
+        channels = self._arm(bound_graph, scenario_inputs)
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await self._run_graph(bound_graph, channels, own_session)
+        return await self._run_graph(bound_graph, channels, session)
 
-    async def run(self, bound_graph, scenario_inputs):
-        """Topological async execution loop. Symmetrical for all node types."""
-        self.results, self.timings, self.trace, self.vram_peak = {}, {}, [], 0.0
-        queues = {nid: asyncio.Queue() for nid in bound_graph}
+    def _arm(self, bound_graph, scenario_inputs):
+        """Resets run state, compiles the graph and creates one channel per node."""
+        self.results, self.timings, self.vram_peak = {}, {}, 0.0
+        self.turn_timings = OrderedDict()
+        self.trace.clear()
+        self.compiled = self.compiler.compile(bound_graph)
+        self.compiled.raise_for_errors()
+        # One multicast channel per producer; every consumer gets its own cursor into it
+        channels = {nid: BroadcastChannel(nid) for nid in bound_graph}
         
         # Inject scenario inputs into node configs
         for nid, node in bound_graph.items():
             node['scenario_inputs'] = scenario_inputs
+        return channels
+
+    def _subscribe(self, nid, node, channels):
+        # Subscribe before any task starts so no consumer misses early packets.
+        # Edge capacity / overflow policy come from the node's `inputs` entries.
+        return {
+            e.source: channels[e.source].subscribe(nid, capacity=e.capacity, overflow=e.overflow)
+            for e in get_input_edges(node) if e.source in channels
+        }
+
+    async def _run_graph(self, bound_graph, channels, session):
+        tasks = []
+        for nid in self.compiled.order:  # Topological schedule: producers are started before their consumers
+            node = bound_graph[nid]
+            in_cursors = self._subscribe(nid, node, channels)
+            tasks.append(self.execute_node(nid, node, in_cursors, channels, session))
 
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for nid, node in bound_graph.items():
-                # Build input queue list
-                input_ids = node.get('inputs', []).copy()
-                sys_prompt_id = node.get('system_prompt')
-                if sys_prompt_id and sys_prompt_id not in input_ids:
-                    input_ids.append(sys_prompt_id)
-                    
-                in_qs = {d: queues[d] for d in input_ids if d in queues}
-                tasks.append(self.execute_node(nid, node, in_qs, queues, session))
-
-            await asyncio.gather(*tasks)
-            
+        await asyncio.gather(*tasks)
         return True
+
+    # --- Continuous mode ---
+    @staticmethod
+    def turn_driver(bound_graph):
+        """The source that delimits turns: the one marked `turn_driver: true`, else the graph's only microphone."""
+        sources = [nid for nid, node in bound_graph.items() if not get_input_edges(node)]
+        drivers = [nid for nid in sources if bound_graph[nid].get('turn_driver')]
+        if not drivers:
+            drivers = [nid for nid in sources if bound_graph[nid].get('role') == 'microphone']
+        if len(drivers) != 1:
+            raise PipelineCompileError(f"Continuous mode needs exactly one turn driver source, found {drivers or 'none'}")
+        if not bound_graph[drivers[0]].get('binding'):
+            raise PipelineCompileError(f"Turn driver '{drivers[0]}' has no binding")
+        return drivers[0]
+
+    async def run_continuous(self, bound_graph, scenario_inputs, session=None, max_turns=None):
+        """
+        Always-on execution: every node task and channel is created once and stays alive across turns.
+        The turn driver source (see `turn_driver`) is re-invoked back to back; each invocation that emits anything
+        is one turn. Its first packet opens the turn for the other sources, which then run once for it. Processing
+        nodes run once per turn over that turn's packets. Every node ends its turn with a `turn_end` marker, so
+        edges stay open between turns. Packets and START/FINISH events carry the turn id in the trace, and
+        `turn_timings` keeps per-turn node timings. Runs until cancelled, or until `max_turns` turns completed.
+        """
+        channels = self._arm(bound_graph, scenario_inputs)
+        driver = self.turn_driver(bound_graph)
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await self._run_continuous_graph(bound_graph, channels, driver, own_session, max_turns)
+        return await self._run_continuous_graph(bound_graph, channels, driver, session, max_turns)
+
+    async def _run_continuous_graph(self, bound_graph, channels, driver, session, max_turns):
+        gate = TurnGate()
+        tasks = []
+        for nid in self.compiled.order:
+            node = bound_graph[nid]
+            in_cursors = self._subscribe(nid, node, channels)
+            if nid == driver:
+                tasks.append(self._drive_turns(nid, node, channels[nid], gate, session, max_turns))
+            elif not in_cursors:
+                tasks.append(self._follow_turns(nid, node, channels[nid], gate, session))
+            else:
+                tasks.append(self._process_turns(nid, node, in_cursors, channels[nid], session))
+
+        await asyncio.gather(*tasks)
+        return True
+
+    def _open_turn(self, turn, t):
+        self.turn_timings[turn] = {"opened": t, "closed": None, "nodes": {}}
+        while len(self.turn_timings) > TURN_TIMINGS_KEPT: self.turn_timings.popitem(last=False)
+
+    def _record_turn_timing(self, turn, node_id, start_t, end_t, first_t=None):
+        entry = self.turn_timings.get(turn)
+        if entry is None: return  # Aged out
+        entry["nodes"][node_id] = {"start": start_t, "end": end_t, "first_out": first_t}
+        if entry["closed"] is None or end_t > entry["closed"]: entry["closed"] = end_t
+
+    async def _drive_turns(self, node_id, node, channel, gate, session, max_turns):
+        turn = 0
+        def open_turn(packet):
+            # The driver's first packet opens the turn: follower sources start and latency is measured from here
+            t = time.perf_counter()
+            self._open_turn(turn + 1, t)
+            self.trace.record(t, node_id, "TURN", turn=turn + 1)
+            gate.open(turn + 1)
+        try:
+            while max_turns is None or turn < max_turns:
+                out_q = await self._capture_stream(node_id, channel, turn=turn + 1, on_first=open_turn)
+                await self._invoke(node_id, node, {}, out_q, session, turn=turn + 1)
+                if not out_q.count:
+                    await asyncio.sleep(IDLE_BACKOFF_S)  # Nothing captured: not a turn
+                    continue
+                turn += 1
+                await channel.put(PipelinePacket.turn_end(turn))
+                await asyncio.sleep(0)  # A source that never blocks must not starve the rest of the graph
+        finally:
+            gate.close()
+            await channel.put(None)
+
+    async def _follow_turns(self, node_id, node, channel, gate, session):
+        turn = 0
+        try:
+            while await gate.wait_for(turn + 1):
+                turn += 1
+                out_q = await self._capture_stream(node_id, channel, turn=turn)
+                await self._invoke(node_id, node, {}, out_q, session, turn=turn)
+                await channel.put(PipelinePacket.turn_end(turn))
+        finally:
+            await channel.put(None)
+
+    async def _process_turns(self, node_id, node, input_cursors, channel, session):
+        inputs = {src: TurnInput(c) for src, c in input_cursors.items()}
+        turn = 0
+        try:
+            while True:
+                pending = await self._next_turn(list(inputs.values()))
+                if pending is None: break  # Every upstream closed
+                turn = pending or turn + 1
+                in_streams = {src: self._turn_stream(node_id, inp) for src, inp in inputs.items()}
+                out_q = await self._capture_stream(node_id, channel, turn=turn)
+                await self._invoke(node_id, node, in_streams, out_q, session, turn=turn)
+                # Inputs stay aligned: whatever the node left unread of this turn is skipped
+                for inp in inputs.values(): await inp.finish_turn()
+                await channel.put(PipelinePacket.turn_end(turn))
+        finally:
+            self.record_edges(node_id, input_cursors)
+            for cursor in input_cursors.values(): cursor.detach()
+            await channel.put(None)
+
+    @staticmethod
+    async def _next_turn(inputs):
+        """Waits until any input has a packet. Returns its turn id (0 if untagged), or None once every input is closed."""
+        while True:
+            for inp in inputs:
+                if inp.ready and not inp.closed: return inp.turn or 0
+            live = [inp for inp in inputs if not inp.closed]
+            if not live: return None
+            waiters = [asyncio.ensure_future(inp.peek()) for inp in live]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for w in waiters: w.cancel()
+                await asyncio.gather(*waiters, return_exceptions=True)
@@ -0,0 +1,100 @@
+import os
+import json
+import copy
+import threading
+import yaml
+from typing import Any, Callable, Optional
+from loguru import logger
+from utils.config import safe_filename
+
+def file_signature(path: str) -> Optional[tuple]:
+    """Cheap change detector: (mtime_ns, size), or None if the file does not exist. One stat, no reads."""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def load_yaml_file(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def load_json_file(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+        return json.loads(content) if content else None
+
+class FileCache:
+    """
+    Parsed-file memo keyed by path and invalidated by the file's signature.
+    `get()` stats the file and only re-parses when it changed (or appeared/disappeared). Callers receive
+    a deep copy unless `copy=False`, so cached documents cannot be mutated behind the cache's back.
+    """
+    def __init__(self, loader: Callable[[str], Any] = load_yaml_file):
+        self.loader = loader
+        self._entries: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, default: Any = None, copy_result: bool = True) -> Any:
+        sig = file_signature(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == sig:
+            self.hits += 1
+            value = entry[1]
+        else:
+            self.misses += 1
+            value = default
+            if sig is not None:
+                try:
+                    value = self.loader(path)
+                except Exception as e:
+                    logger.error(f"Failed to load {path}: {e}")
+                    value = default
+            with self._lock:
+                self._entries[path] = (sig, value)
+        return copy.deepcopy(value) if copy_result else value
+
+    def signature(self, path: str) -> Optional[tuple]:
+        return file_signature(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class CalibrationStore:
+    """
+    In-memory view of `system_config/model_calibrations/*.yaml`.
+    Every calibration is parsed once at startup. After that a lookup costs one stat of the directory
+    (catching added/removed files) plus one stat of the requested file (catching edits).
+    `version` changes whenever any calibration that was looked up changed, so it can key higher-level caches.
+    """
+    def __init__(self, cal_dir: str):
+        self.cal_dir = cal_dir
+        self._files = FileCache(load_yaml_file)
+        self._dir_sig = None
+        self.version = 0
+        self.preload()
+
+    def path_for(self, model_id: str, engine: str) -> str:
+        return os.path.join(self.cal_dir, f"{engine}_{safe_filename(model_id)}.yaml")
+
+    def preload(self):
+        self._dir_sig = file_signature(self.cal_dir)
+        if self._dir_sig is None: return
+        for name in os.listdir(self.cal_dir):
+            if name.endswith(".yaml"):
+                self._files.get(os.path.join(self.cal_dir, name), copy_result=False)
+        self.version += 1
+
+    def get(self, model_id: str, engine: str) -> dict:
+        """Calibration document for a model (empty dict if none). Read-only: do not mutate the result."""
+        sig = file_signature(self.cal_dir)
+        if sig != self._dir_sig:
+            self._files.clear()
+            self.preload()
+        misses = self._files.misses
+        data = self._files.get(self.path_for(model_id, engine), default={}, copy_result=False) or {}
+        if self._files.misses != misses: self.version += 1
+        return data
@@ -3,7 +3,7 @@ from .models import (
     validate_stt
 )
 from .audio import (
-    execute_speaker, execute_ptt_mic, validate_ptt_mic
+    execute_speaker, execute_ptt_mic, execute_audio_preprocess, validate_ptt_mic
 )
 from .vision import (
     execute_screen_capture, execute_camera_capture,
@@ -5,6 +5,7 @@ import asyncio
 import threading
 from typing import Any, AsyncGenerator
 from loguru import logger
+from ..packet import PipelinePacket, PayloadKind
 
 # --- Optional Dependencies ---
 try:
@@ -20,27 +21,56 @@ except ImportError:
     pyaudio = None
 
 async def execute_speaker(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: Any):
-    """Local audio playback implementation."""
+    """
+    Local audio playback implementation.
+    Clips (file paths or in-memory PCM) are fed into an AudioPlaybackEngine whose ring buffer is drained on a
+    dedicated audio thread, so playback never blocks the event loop and consecutive sentences play gaplessly.
+    Cancelling the node (barge-in) flushes the ring and aborts the stream, so sound stops within one device buffer.
+    """
     if not sd or not sf: 
         logger.warning(f"[{node_id}] sounddevice or soundfile missing. Skipping playback.")
         return
-        
-    for stream in input_streams.values():
-        async for packet in stream:
-            if packet is None: break
-            content = packet.get('content')
-            if isinstance(content, str) and os.path.exists(content):
-                samples, fs = sf.read(content)
-                sd.play(samples, samplerate=fs)
-                sd.wait()
-            elif isinstance(content, (bytes, bytearray)):
-                samples = np.frombuffer(content, dtype=np.int16)
-                sd.play(samples, samplerate=24000)
-                sd.wait()
-            await output_queue.put(packet) # Propagate for tracing
+
+    from utils.edge.playback import AudioPlaybackEngine
+    engine = AudioPlaybackEngine(
+        sample_rate=config.get('sample_rate', 24000),
+        prebuffer_ms=config.get('prebuffer_ms', 150.0),
+        crossfade_ms=config.get('crossfade_ms', 0.0),
+        device=config.get('device')
+    )
+    engine.start()
+    cancelled = False
+    try:
+        for stream in input_streams.values():
+            async for packet in stream:
+                if packet is None: break
+                packet = PipelinePacket.coerce(packet)
+                content = packet.content
+                if packet.kind == PayloadKind.PCM or isinstance(content, (bytes, bytearray, memoryview)):
+                    meta = packet.metadata or {}
+                    await engine.write_async(content, meta.get('sample_rate', 24000), meta.get('dtype', 'int16'), continuation=meta.get('chunk', 0) > 0)
+                elif isinstance(content, str) and os.path.exists(content):
+                    samples, fs = await asyncio.to_thread(sf.read, content, dtype='float32')
+                    await engine.write_async(samples, fs)
+                await output_queue.put(packet) # Propagate for tracing
+
+        await engine.drain_async(timeout=config.get('drain_timeout'))
+    except asyncio.CancelledError:
+        # Barge-in: silence now instead of playing out the queued reply
+        cancelled = True
+        engine.flush()
+        raise
+    finally:
+        engine.close(abort=cancelled)
+
+    # Playback metrics land in the trace as extra fields of this packet
+    await output_queue.put(PipelinePacket("playback_stats", None, kind=PayloadKind.DATA, metadata={"metrics": engine.stats()}))
 
 async def execute_ptt_mic(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: Any):
-    """Push-to-Talk microphone implementation."""
+    """
+    Microphone source. `capture_mode: ptt` (default) records while the `ptt_active` signal is held;
+    `capture_mode: vad` is hands-free: it listens immediately and closes the utterance on trailing silence.
+    """
     if not pyaudio: 
         logger.warning(f"[{node_id}] pyaudio missing. Skipping capture.")
         return
@@ -53,45 +83,165 @@ async def execute_ptt_mic(node_id: str, input_streams: dict[str, AsyncGenerator]
         await output_queue.put({"type": "audio_path", "content": path, "ts": time.perf_counter()})
         return
 
-    ptt_signal = scenario_inputs.get('ptt_active')
     session_dir = config.get('session_dir', '.')
+    is_test = 'input_mic' in scenario_inputs or 'input_text' in scenario_inputs
+    timeout = config.get('wait_timeout', 15.0 if is_test else 300.0) 
+
+    from utils.edge.capture import MicCapture, write_wav, find_input_device
+    sample_rate = config.get('sample_rate', 16000)
+    device_index = config.get('device_index')
+    if device_index is None and config.get('device_name'):
+        device_index = find_input_device(config['device_name'])
+        if device_index is None:
+            logger.warning(f"[{node_id}] Input device '{config['device_name']}' not found. Using the default device.")
+
+    def open_capture():
+        capture = MicCapture(
+            asyncio.get_running_loop(), sample_rate=sample_rate,
+            frames_per_buffer=config.get('frames_per_buffer', 1024), device_index=device_index
+        )
+        capture.start()
+        return capture
+
+    # 1-2. Record on a background thread, streaming PCM chunks downstream as they are captured
+    if config.get('capture_mode', 'ptt') == 'vad':
+        result = await _capture_vad(node_id, config, output_queue, open_capture, sample_rate, timeout)
+    else:
+        result = await _capture_ptt(node_id, scenario_inputs, output_queue, open_capture, sample_rate, timeout)
+    if result is None: return
+    pcm, duration, seq, metrics = result
     
+    # 3. Hand the whole utterance downstream in memory (no container encode/decode on the critical path)
+    await output_queue.put(PipelinePacket.pcm(pcm, sample_rate, seq, ptype="audio_utterance", metadata={"duration": duration, "metrics": metrics}))
+
+    # 4. WAV artifact for traces only, written after downstream nodes already have the audio
+    if config.get('trace_artifacts', True):
+        out_path = os.path.join(session_dir, f"{node_id}_capture.wav")
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        await asyncio.to_thread(write_wav, out_path, pcm, sample_rate)
+        await output_queue.put(PipelinePacket.path("audio_path", out_path, seq + 1, metadata={"duration": duration}))
+
+async def _capture_ptt(node_id, scenario_inputs, output_queue, open_capture, sample_rate, timeout):
+    """Records while the PTT signal is held. Returns (pcm, duration, next_seq, metrics) or None."""
+    from utils.edge.capture import wait_for_signal
+    ptt_signal = scenario_inputs.get('ptt_active')
     if not ptt_signal:
         raise ValueError(f"{node_id} requires a 'ptt_active' signal or direct file override.")
 
-    # 1. Wait for PTT
-    wait_start = time.perf_counter()
-    is_test = 'input_mic' in scenario_inputs or 'input_text' in scenario_inputs
-    timeout = config.get('wait_timeout', 15.0 if is_test else 300.0) 
-    
-    while not ptt_signal.is_set():
-        if time.perf_counter() - wait_start > timeout:
-            logger.warning(f"[{node_id}] PTT wait timed out after {timeout}s")
-            return
-        await asyncio.sleep(0.05)
-    
-    # 2. Record
-    pa = pyaudio.PyAudio()
-    frames = []
-    stream = pa.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=1024)
-    while ptt_signal.is_set():
-        data = stream.read(1024)
-        frames.append(data)
-    stream.stop_stream(); stream.close(); pa.terminate()
-    
-    # 3. Save
-    out_path = os.path.join(session_dir, f"{node_id}_capture.wav")
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    with wave.open(out_path, 'wb') as wf:
-        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(16000)
-        wf.writeframes(b''.join(frames))
-    
-    await output_queue.put({"type": "audio_path", "content": out_path, "ts": time.perf_counter()})
+    # Wait for PTT (cancellable: a stopped turn never leaves a thread blocked on the key)
+    if not await wait_for_signal(ptt_signal, True, timeout):
+        logger.warning(f"[{node_id}] PTT wait timed out after {timeout}s")
+        return None
+
+    capture = open_capture()
+    async def stop_on_release():
+        await wait_for_signal(ptt_signal, False)
+        capture.stop()
+    release_task = asyncio.create_task(stop_on_release())
+
+    seq = 0
+    try:
+        async for chunk in capture.chunks():
+            await output_queue.put(PipelinePacket.pcm(chunk, sample_rate, seq))
+            seq += 1
+    finally:
+        capture.stop()
+        release_task.cancel()
+    return capture.pcm, capture.duration, seq, {"audio_s": capture.duration}
+
+async def _capture_vad(node_id, config, output_queue, open_capture, sample_rate, timeout):
+    """
+    Hands-free capture: only audio released by the VAD endpointer (pre-roll + speech) goes downstream, and the
+    utterance closes as soon as the trailing-silence threshold is reached. Returns (pcm, duration, next_seq, metrics) or None.
+    """
+    from utils.edge.capture import VADEndpointer
+    endpointer = VADEndpointer(
+        sample_rate=sample_rate,
+        threshold_db=config.get('vad_threshold_db', -45.0), snr_db=config.get('vad_snr_db', 10.0),
+        silence_ms=config.get('silence_ms', 600.0), min_speech_ms=config.get('min_speech_ms', 250.0),
+        preroll_ms=config.get('preroll_ms', 300.0), max_utterance_s=config.get('max_utterance_s', 30.0)
+    )
+    capture = open_capture()
+    deadline = time.perf_counter() + timeout
+
+    seq = 0
+    try:
+        async for chunk in capture.chunks():
+            released = endpointer.feed(chunk)
+            if released:
+                await output_queue.put(PipelinePacket.pcm(released, sample_rate, seq))
+                seq += 1
+            if endpointer.done: break
+            if not endpointer.triggered and time.perf_counter() > deadline:
+                break
+    finally:
+        capture.stop()
+
+    if not endpointer.done:
+        logger.warning(f"[{node_id}] No speech detected within {timeout}s")
+        return None
+    metrics = {
+        "audio_s": endpointer.duration,
+        "trailing_silence_s": endpointer.trailing_silence_s,
+        "onset_s": endpointer.speech_onset_t - capture.started_t
+    }
+    return endpointer.pcm, endpointer.duration, seq, metrics
+
+async def execute_audio_preprocess(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: Any):
+    """
+    Client-side cleanup of an utterance before STT: silence trimming, resampling to 16 kHz mono and peak normalization.
+    Accepts an in-memory utterance or an audio file and emits one 16 kHz int16 `audio_utterance`.
+    Live `audio_stream` chunks are not forwarded: downstream STT decodes the cleaned utterance, not the raw capture,
+    so the node is opt-in (e.g. `atomic_stt_prep`) and gives up the streaming decode overlap of the live pipelines.
+    The kept and original durations go to the trace as metrics (STT RTF is measured against the kept audio).
+    """
+    from utils.edge.preprocess import preprocess_utterance, to_int16_pcm, TARGET_RATE
+    options = {
+        "trim": config.get('trim', True), "normalize": config.get('normalize', True),
+        "threshold_db": config.get('threshold_db', -35.0), "pad_ms": config.get('pad_ms', 150.0),
+        "target_dbfs": config.get('target_dbfs', -1.0)
+    }
+    chunks, chunk_meta, seq = [], {}, 0
+    source = None
+    for stream in input_streams.values():
+        async for packet in stream:
+            if packet is None: break
+            packet = PipelinePacket.coerce(packet)
+            if packet.kind == PayloadKind.PCM and packet.type != "audio_utterance":
+                chunks.append(bytes(packet.content)); chunk_meta = packet.metadata or {}  # Fallback if no utterance arrives
+                continue
+            if packet.content:
+                source = packet
+                break
+        if source: break
+
+    meta = (source.metadata if source else chunk_meta) or {}
+    if source is not None and source.kind == PayloadKind.PCM:
+        args = (source.content, meta.get('sample_rate', 16000), meta.get('dtype', 'int16'), meta.get('channels', 1))
+    elif source is not None and isinstance(source.content, str) and os.path.exists(source.content):
+        if not sf: raise RuntimeError(f"{node_id}: soundfile missing, cannot read {source.content}.")
+        samples, fs = await asyncio.to_thread(sf.read, source.content, dtype='float32')
+        args = (samples, fs, "float32", 1)
+    elif chunks:
+        # No finished utterance arrived: fall back to the concatenated live chunks
+        args = (b''.join(chunks), meta.get('sample_rate', 16000), meta.get('dtype', 'int16'), meta.get('channels', 1))
+    else:
+        raise ValueError(f"{node_id} missing audio input.")
+
+    audio, info = await asyncio.to_thread(preprocess_utterance, *args, **options)
+    logger.debug(f"[{node_id}] Kept {info['audio_s']:.2f}s of {info['orig_audio_s']:.2f}s audio.")
+    await output_queue.put(PipelinePacket.pcm(
+        to_int16_pcm(audio), TARGET_RATE, seq, ptype="audio_utterance",
+        metadata={"duration": info['audio_s'], "metrics": info}
+    ))
 
 def validate_ptt_mic(node_id: str, config: dict, scenario_inputs: dict) -> tuple[bool, str]:
     """Ensures PTT Mic has a way to get data."""
     if scenario_inputs.get(node_id) or scenario_inputs.get('input_mic'):
         return True, ""
+
+    if config.get('capture_mode') == 'vad':
+        return True, ""  # Hands-free: the endpointer decides when the utterance ends
     
     if scenario_inputs.get('ptt_active'):
         return True, ""
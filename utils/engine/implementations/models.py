@@ -3,7 +3,10 @@ import os
 import aiohttp
 import asyncio
 import time
+from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator
+from loguru import logger
+from ..packet import PipelinePacket, PayloadKind
 
 async def resolve_inputs(input_streams: dict[str, AsyncGenerator]) -> dict[str, str]:
     """Standard utility to accumulate data from input streams."""
@@ -12,9 +15,12 @@ async def resolve_inputs(input_streams: dict[str, AsyncGenerator]) -> dict[str,
         content = ""
         async for packet in stream:
             if packet is None: break
-            val = packet.get('content', '')
+            packet = PipelinePacket.coerce(packet)
+            if packet.type == "text_partial": continue # Superseded by the final transcript
+            val = packet.content
             if val:
-                if isinstance(val, str) and os.path.exists(val):
+                # Only path packets are dereferenced; text tokens are never probed against the filesystem
+                if packet.kind == PayloadKind.PATH and os.path.exists(val):
                     try:
                         with open(val, 'r', encoding='utf-8', errors='ignore') as f:
                             content += f.read()
@@ -24,6 +30,21 @@ async def resolve_inputs(input_streams: dict[str, AsyncGenerator]) -> dict[str,
         resolved[in_id] = content
     return resolved
 
+@asynccontextmanager
+async def abortable(request):
+    """
+    `async with` for an aiohttp request that closes the connection when the turn is cancelled mid-response.
+    Without this the half-read socket is released back to the pool; closing it is what makes Ollama/vLLM
+    notice the disconnect and stop generating. The native STT/TTS servers drop a disconnected request's job if it
+    is still queued and stop a streaming synthesis at its next chunk; a decode or synthesis already running finishes.
+    """
+    async with request as resp:
+        try:
+            yield resp
+        except asyncio.CancelledError:
+            resp.close()
+            raise
+
 # --- MODEL IMPLEMENTATIONS ---
 
 async def execute_openai_chat(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: aiohttp.ClientSession):
@@ -59,7 +80,7 @@ async def execute_openai_chat(node_id: str, input_streams: dict[str, AsyncGenera
     
     url = f"http://127.0.0.1:{port}/v1/chat/completions"
     
-    async with session.post(url, json=payload) as resp:
+    async with abortable(session.post(url, json=payload)) as resp:
         if resp.status != 200:
             err_text = await resp.text()
             raise RuntimeError(f"LLM Server Error ({resp.status}): {err_text}")
@@ -73,62 +94,234 @@ async def execute_openai_chat(node_id: str, input_streams: dict[str, AsyncGenera
                     try:
                         token = json.loads(line_text[6:])['choices'][0]['delta'].get('content', '')
                         if token:
-                            await output_queue.put({"type": "text_token", "content": token, "seq": seq, "ts": time.perf_counter()})
+                            await output_queue.put(PipelinePacket.text("text_token", token, seq))
                             seq += 1
                     except: pass
         else:
             text = (await resp.json())['choices'][0]['message']['content']
-            await output_queue.put({"type": "text_final", "content": text, "ts": time.perf_counter()})
+            await output_queue.put(PipelinePacket.text("text_final", text))
+
+def _stt_decode_params(config: dict[str, Any]) -> dict[str, str]:
+    """
+    Decoding policy for STT requests, from the loadout model string flags (`#policy=fast`, `#beam=5`, `#vad`)
+    with node-level YAML keys (`decode_policy`, `beam_size`, `vad_filter`) taking precedence.
+    The session id lets the server cache the detected language for the rest of the conversation.
+    """
+    flags = (config.get('binding') or {}).get('params', {})
+    params = {}
+    policy = config.get('decode_policy', flags.get('policy'))
+    beam = config.get('beam_size', flags.get('beam'))
+    vad = config.get('vad_filter', flags.get('vad'))
+    if policy: params["policy"] = str(policy)
+    if beam: params["beam_size"] = str(int(beam))
+    if vad is not None: params["vad_filter"] = "true" if vad else "false"
+    if config.get('language'): params["language"] = config['language']
+    scenario_inputs = config.get('scenario_inputs') or {}
+    session_id = (config.get('stt_session_id') or scenario_inputs.get('conversation_id')
+                  or os.path.basename(os.path.normpath(config.get('session_dir') or '')) or None)
+    if session_id: params["session_id"] = session_id
+    return params
+
+def _pcm_seconds(n_bytes: int, meta: dict) -> float:
+    from utils.edge.pcm import frame_size
+    return n_bytes / float(frame_size(meta.get('dtype', 'int16'), meta.get('channels', 1)) * meta.get('sample_rate', 16000))
+
+async def _stream_transcribe(node_id: str, first: PipelinePacket, stream: AsyncGenerator, config: dict[str, Any], output_queue: asyncio.Queue, session: aiohttp.ClientSession) -> tuple[str, float]:
+    """Forwards live PCM packets to the server's `/stream` session. Returns the final transcript and the seconds of audio sent."""
+    binding = config.get('binding', {})
+    meta = first.metadata or {}
+    params = {"sample_rate": str(meta.get('sample_rate', 16000)), **_stt_decode_params(config)}
+    if config.get('min_silence_ms'): params["min_silence_ms"] = str(config['min_silence_ms'])
+    url = f"ws://127.0.0.1:{binding.get('port')}/stream"
+
+    async with session.ws_connect(url, params=params) as ws:
+        async def receive():
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT: continue
+                data = json.loads(msg.data)
+                if data.get('type') == 'partial':
+                    logger.debug(f"[{node_id}] Segment {data['segment']}: {data['text']}")
+                    if config.get('emit_partials'):
+                        await output_queue.put(PipelinePacket.text("text_partial", data['text'], data['segment'], metadata={"start": data.get('start'), "end": data.get('end')}))
+                elif data.get('type') == 'final':
+                    return data
+                elif data.get('type') == 'error':
+                    raise RuntimeError(f"STT Stream Error: {data.get('error')}")
+            raise RuntimeError("STT stream closed before the final transcript.")
+
+        reader = asyncio.create_task(receive())
+        sent = first.content.nbytes
+        try:
+            await ws.send_bytes(bytes(first.content))
+            async for packet in stream:
+                if packet is None: break
+                packet = PipelinePacket.coerce(packet)
+                if packet.kind != PayloadKind.PCM or packet.type == "audio_utterance": break  # The finished recording marks the end
+                await ws.send_bytes(bytes(packet.content))
+                sent += packet.content.nbytes
+            await ws.send_json({"event": "end"})
+            result = await reader
+        except BaseException:
+            reader.cancel()
+            raise
+    return result.get('text', ''), _pcm_seconds(sent, meta)
 
 async def execute_whisper_stt(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: aiohttp.ClientSession):
-    """Standard implementation for Whisper STT servers."""
-    audio_path = None
+    """
+    Standard implementation for Whisper STT servers.
+    Live PCM chunks (`audio_stream`) are forwarded to the `/stream` session as they arrive, so most of the
+    decoding overlaps with speaking. A finished in-memory utterance (`audio_utterance`) is posted as raw PCM to
+    `/transcribe_pcm`; only file inputs (e.g. scenario overrides) are uploaded to `/transcribe`.
+    `streaming: false` ignores live chunks; `emit_partials: true` also emits per-segment `text_partial` packets.
+    For in-memory audio the transcript carries the decoded duration (`metrics.audio_s`), so RTF matches what was decoded.
+    """
+    streaming = config.get('streaming', True)
+    audio = None
     for stream in input_streams.values():
         async for packet in stream:
             if packet is None: break
-            audio_path = packet.get('content')
-            if audio_path: break
-        if audio_path: break
+            packet = PipelinePacket.coerce(packet)
+            if packet.kind == PayloadKind.PCM and packet.type != "audio_utterance":
+                if not streaming: continue # Wait for the finished utterance
+                text, audio_s = await _stream_transcribe(node_id, packet, stream, config, output_queue, session)
+                await output_queue.put(PipelinePacket.text("text_final", text, metadata={"metrics": {"audio_s": audio_s}}))
+                return
+            if packet.content:
+                audio = packet
+                break
+        if audio: break
         
-    if not audio_path: raise ValueError(f"{node_id} missing audio path.")
+    if not audio: raise ValueError(f"{node_id} missing audio input.")
 
     binding = config.get('binding', {})
-    url = f"http://127.0.0.1:{binding.get('port')}/transcribe"
-    
-    data = aiohttp.FormData()
-    data.add_field('file', open(audio_path, 'rb'))
+    params = _stt_decode_params(config)
+    metrics = None
+    if audio.kind == PayloadKind.PCM:
+        from utils.edge.pcm import pack_header, PCM_MEDIA_TYPE
+        meta = audio.metadata or {}
+        url = f"http://127.0.0.1:{binding.get('port')}/transcribe_pcm"
+        body = pack_header(meta.get('sample_rate', 16000), meta.get('dtype', 'int16'), meta.get('channels', 1)) + bytes(audio.content)
+        metrics = {"audio_s": _pcm_seconds(audio.content.nbytes, meta)}
+        request = session.post(url, data=body, params=params, headers={"Content-Type": PCM_MEDIA_TYPE})
+    else:
+        url = f"http://127.0.0.1:{binding.get('port')}/transcribe"
+        def _read():
+            with open(audio.content, 'rb') as f: return f.read()
+        data = aiohttp.FormData()
+        data.add_field('file', await asyncio.to_thread(_read), filename=os.path.basename(audio.content))
+        for key, value in params.items(): data.add_field(key, value)
+        request = session.post(url, data=data)
     
-    async with session.post(url, data=data) as resp:
+    async with abortable(request) as resp:
         if resp.status != 200:
             err_text = await resp.text()
             raise RuntimeError(f"STT Server Error ({resp.status}): {err_text}")
         text = (await resp.json()).get('text', '')
-        await output_queue.put({"type": "text_final", "content": text, "ts": time.perf_counter()})
+        await output_queue.put(PipelinePacket.text("text_final", text, metadata={"metrics": metrics} if metrics else None))
 
 async def execute_chatterbox_tts(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: aiohttp.ClientSession):
-    """Standard implementation for Chatterbox TTS servers."""
-    text = None
-    for stream in input_streams.values():
-        async for packet in stream:
-            if packet is None: break
-            text = packet.get('content')
-            if text: break
-        if text: break
-        
-    if not text: return
-
+    """
+    Streaming implementation for Chatterbox TTS servers.
+    Every incoming sentence is synthesized; up to `max_inflight` requests run concurrently and
+    the resulting clips are emitted strictly in arrival order as soon as the head of the line is ready.
+    With `stream_audio: true` sentences come from `/tts/stream` and are forwarded as `audio_stream` PCM
+    packets while the server is still vocoding, instead of one WAV file per sentence.
+    """
+    from utils.edge.pcm import PCMStreamReader
     binding = config.get('binding', {})
-    url = f"http://127.0.0.1:{binding.get('port')}/synthesize"
-    
-    payload = {"text": text}
-    async with session.post(url, json=payload) as resp:
-        if resp.status != 200:
-            err_text = await resp.text()
-            raise RuntimeError(f"TTS Server Error ({resp.status}): {err_text}")
-        
-        result = await resp.json()
-        audio_path = result.get('audio_path')
-        await output_queue.put({"type": "audio_path", "content": audio_path, "ts": time.perf_counter()})
+    stream_audio = config.get('stream_audio', False)
+    url = f"http://127.0.0.1:{binding.get('port')}/tts/stream" if stream_audio else f"http://127.0.0.1:{binding.get('port')}/tts"
+    language_id = config.get('language_id', 'en')
+    session_dir = config.get('session_dir') or '.'
+    max_inflight = max(1, int(config.get('max_inflight', 2)))
+    priority = config.get('priority', 'interactive')
+    voice_id = config.get('voice_id')
+    pcm_seq = 0
+
+    async def synthesize(ordinal: int, text: str, sink: asyncio.Queue):
+        # The ordinal lets the server put this turn's head-of-line sentence first
+        payload = {"text": text, "language_id": language_id, "priority": priority, "ordinal": ordinal}
+        if voice_id: payload["voice_id"] = voice_id
+        async with abortable(session.post(url, json=payload)) as resp:
+            if resp.status != 200:
+                err_text = await resp.text()
+                raise RuntimeError(f"TTS Server Error ({resp.status}): {err_text}")
+            if stream_audio:
+                reader, chunk_idx = PCMStreamReader(), 0
+                async for data in resp.content.iter_any():
+                    pcm = reader.feed(data)
+                    if not pcm: continue
+                    meta = {"sentence": ordinal, "chunk": chunk_idx, "metrics": {"audio_s": reader.seconds(len(pcm)), "sentence": ordinal}}
+                    if chunk_idx == 0: meta["text"] = text
+                    await sink.put(PipelinePacket.pcm(pcm, reader.sample_rate, dtype=reader.dtype, channels=reader.channels, metadata=meta))
+                    chunk_idx += 1
+                return
+            audio = await resp.read()
+            timings = {"queue_wait": float(resp.headers.get("X-Queue-Wait", 0)), "synthesis": float(resp.headers.get("X-Synthesis-Time", 0))}
+        audio_path = os.path.join(session_dir, f"{node_id}_{ordinal:03d}.wav")
+        def _save():
+            os.makedirs(os.path.dirname(os.path.abspath(audio_path)), exist_ok=True)
+            with open(audio_path, 'wb') as f: f.write(audio)
+        await asyncio.to_thread(_save)
+        await sink.put(PipelinePacket.path("audio_path", audio_path, ordinal, metadata={"text": text, "metrics": timings}))
+
+    async def run_sentence(ordinal: int, text: str, sink: asyncio.Queue):
+        try:
+            await synthesize(ordinal, text, sink)
+        finally:
+            sink.put_nowait(None)
+
+    # Sentences enter `in_order` in arrival order; the emitter drains them head-first (reorder buffer),
+    # forwarding the head sentence's packets as soon as they land in its sink.
+    # The semaphore bounds synthesized-but-not-yet-emitted sentences plus requests in flight.
+    in_order = asyncio.Queue()
+    slots = asyncio.Semaphore(max_inflight)
+    failures = []
+    inflight = set()  # Every sentence task, including the head the emitter is draining, so cancellation reaches all of them
+
+    async def emitter():
+        nonlocal pcm_seq
+        while True:
+            item = await in_order.get()
+            if item is None: break
+            task, sink = item
+            try:
+                while (packet := await sink.get()) is not None:
+                    if packet.kind == PayloadKind.PCM:
+                        packet.seq = pcm_seq
+                        pcm_seq += 1
+                    await output_queue.put(packet)
+                await task
+            except Exception as e:
+                failures.append(str(e))
+                logger.error(f"[{node_id}] Sentence synthesis failed: {e}")
+            finally:
+                slots.release()
+
+    emit_task = asyncio.create_task(emitter())
+    ordinal = 0
+    try:
+        for stream in input_streams.values():
+            async for packet in stream:
+                if packet is None: break
+                text = packet.get('content')
+                if not isinstance(text, str) or not text.strip(): continue
+                await slots.acquire()
+                sink = asyncio.Queue()
+                task = asyncio.create_task(run_sentence(ordinal, text, sink))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+                await in_order.put((task, sink))
+                ordinal += 1
+        await in_order.put(None)
+        await emit_task
+    except BaseException:
+        emit_task.cancel()
+        for task in list(inflight): task.cancel()
+        raise
+
+    if failures and len(failures) == ordinal:
+        raise RuntimeError(f"All {ordinal} TTS requests failed: {failures[0]}")
 
 def validate_stt(node_id: str, config: dict, scenario_inputs: dict) -> tuple[bool, str]:
     """STT usually depends on upstream audio, so we don't strictly validate scenario_inputs here."""
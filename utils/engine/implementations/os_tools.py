@@ -75,7 +75,13 @@ async def execute_chunker(node_id: str, input_streams: dict[str, AsyncGenerator]
     delimiters = config.get('delimiters', '.?!')
     stream = next(iter(input_streams.values())) if input_streams else None
     if not stream: return
-    async for out_packet in chunk_by_delimiter(stream, delimiters=delimiters):
+    chunks = chunk_by_delimiter(
+        stream, delimiters=delimiters,
+        min_length=config.get('min_length', 1),
+        first_chunk_chars=config.get('first_chunk_chars'),
+        first_chunk_delimiters=config.get('first_chunk_delimiters', ',;:')
+    )
+    async for out_packet in chunks:
         await output_queue.put(out_packet)
 
 async def execute_memory_node(node_id: str, input_streams: dict[str, AsyncGenerator], config: dict[str, Any], output_queue: asyncio.Queue, session: Any):
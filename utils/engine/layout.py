@@ -1,4 +1,5 @@
 import os
+from .compiler import get_compiler
 
 class GraphLayoutEngine:
     """
@@ -13,26 +14,16 @@ class GraphLayoutEngine:
     def calculate_layout(self, bound_graph, canvas_w, canvas_h):
         if not bound_graph: return {}
 
-        # 1. Build Adjacency (Parents)
-        adj = {nid: node.get('inputs', []).copy() for nid, node in bound_graph.items()}
-        for nid, node in bound_graph.items():
-            sys_p = node.get('system_prompt')
-            if sys_p: adj[nid].append(sys_p)
-        
-        # 2. Assign Topological Ranks (Y-Rows)
-        ranks = {} 
-        def get_rank(nid):
-            if nid in ranks: return ranks[nid]
-            parents = [p for p in adj.get(nid, []) if p in bound_graph]
-            if not parents:
-                ranks[nid] = 0
-                return 0
-            r = max([get_rank(p) for p in parents]) + 1
-            ranks[nid] = r
-            return r
+        # 1. Adjacency and Topological Ranks (Y-Rows) come from the shared, cached pipeline compiler
+        compiled = get_compiler().compile(bound_graph)
+        adj = compiled.parents
+        ranks = dict(compiled.ranks)
 
-        for nid in bound_graph:
-            get_rank(nid)
+        # Nodes on a cycle have no rank; park them on an extra row so an invalid graph still renders
+        cyclic = [nid for nid in bound_graph if nid not in ranks]
+        if cyclic:
+            extra = max(ranks.values()) + 1 if ranks else 0
+            for nid in cyclic: ranks[nid] = extra
 
         max_rank = max(ranks.values()) if ranks else 0
         nodes_by_rank = {r: [] for r in range(max_rank + 1)}
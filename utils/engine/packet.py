@@ -0,0 +1,140 @@
+import time
+from enum import Enum
+from typing import Any, Optional
+
+class PayloadKind(Enum):
+    """What a packet's `content` actually is, so consumers never have to guess."""
+    TEXT = "text"      # str (tokens, sentences, final answers)
+    PATH = "path"      # str path to an artifact on disk
+    PCM = "pcm"        # memoryview over raw PCM samples
+    IMAGE = "image"    # raw image buffer (bytes / memoryview / array)
+    SIGNAL = "signal"  # small control values (e.g. "SUCCESS")
+    DATA = "data"      # anything else
+
+_BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+TURN_END = "turn_end"  # Continuous mode: closes one turn on an edge that stays open across turns
+
+def infer_kind(ptype: Optional[str], content: Any) -> PayloadKind:
+    """Derives the payload kind from the legacy packet `type` naming convention."""
+    ptype = ptype or ""
+    if ptype.startswith("text"): return PayloadKind.TEXT
+    if ptype.endswith("_path"): return PayloadKind.PATH
+    if ptype == "signal": return PayloadKind.SIGNAL
+    if isinstance(content, _BUFFER_TYPES) or hasattr(content, "__array_interface__"):
+        if ptype.startswith("audio"): return PayloadKind.PCM
+        if ptype.startswith("image"): return PayloadKind.IMAGE
+    return PayloadKind.DATA
+
+class PipelinePacket:
+    """
+    Compact envelope for everything that flows between nodes.
+    Slotted to keep per-token overhead low on long LLM streams; exposes a read-mostly dict interface
+    (`get`, `[]`, `in`) so implementations written against plain dict packets keep working.
+    """
+    __slots__ = ("type", "content", "seq", "ts", "kind", "metadata")
+    _FIELDS = frozenset(__slots__)
+
+    def __init__(self, type: str, content: Any = None, seq: int = 0, ts: Optional[float] = None, kind: Optional[PayloadKind] = None, metadata: Optional[dict] = None):
+        if kind is None:
+            kind = infer_kind(type, content)
+        if kind == PayloadKind.PCM and not isinstance(content, memoryview):
+            content = memoryview(content)
+        self.type = type
+        self.content = content
+        self.seq = seq
+        self.ts = time.perf_counter() if ts is None else ts
+        self.kind = kind
+        self.metadata = metadata
+
+    # --- Constructors ---
+    @classmethod
+    def text(cls, ptype: str, content: str, seq: int = 0, metadata: Optional[dict] = None) -> "PipelinePacket":
+        return cls(ptype, content, seq, kind=PayloadKind.TEXT, metadata=metadata)
+
+    @classmethod
+    def path(cls, ptype: str, path: str, seq: int = 0, metadata: Optional[dict] = None) -> "PipelinePacket":
+        return cls(ptype, path, seq, kind=PayloadKind.PATH, metadata=metadata)
+
+    @classmethod
+    def pcm(cls, buffer: Any, sample_rate: int, seq: int = 0, ptype: str = "audio_stream", dtype: str = "int16", channels: int = 1, metadata: Optional[dict] = None) -> "PipelinePacket":
+        """Wraps a PCM buffer without copying it. Format details travel in metadata."""
+        meta = {"sample_rate": sample_rate, "dtype": dtype, "channels": channels}
+        if metadata: meta.update(metadata)
+        return cls(ptype, buffer, seq, kind=PayloadKind.PCM, metadata=meta)
+
+    @classmethod
+    def turn_end(cls, turn: int) -> "PipelinePacket":
+        return cls(TURN_END, turn, kind=PayloadKind.SIGNAL, metadata={"turn": turn})
+
+    @classmethod
+    def coerce(cls, packet: Any) -> "PipelinePacket":
+        """Converts a legacy dict packet; PipelinePackets pass through untouched."""
+        if isinstance(packet, cls): return packet
+        extra = {k: v for k, v in packet.items() if k not in cls._FIELDS}
+        metadata = packet.get("metadata")
+        if extra:
+            metadata = {**(metadata or {}), **extra}
+        kind = packet.get("kind")
+        if isinstance(kind, str): kind = PayloadKind(kind)
+        return cls(packet.get("type"), packet.get("content"), packet.get("seq", 0), packet.get("ts"), kind, metadata)
+
+    def replace(self, **changes) -> "PipelinePacket":
+        """Returns a shallow copy with some fields changed (payload buffers are shared, not copied)."""
+        fields = {f: getattr(self, f) for f in self.__slots__}
+        fields.update(changes)
+        return PipelinePacket(**fields)
+
+    # --- Accounting ---
+    @property
+    def size(self) -> int:
+        """Payload size without materializing it: chars for text/paths, bytes for buffers."""
+        c = self.content
+        if c is None: return 0
+        if isinstance(c, str): return len(c)
+        if isinstance(c, memoryview): return c.nbytes
+        if isinstance(c, (bytes, bytearray)): return len(c)
+        nbytes = getattr(c, "nbytes", None)
+        return int(nbytes) if nbytes is not None else 0
+
+    @property
+    def is_text(self) -> bool:
+        return self.kind == PayloadKind.TEXT
+
+    @property
+    def is_turn_end(self) -> bool:
+        return self.type == TURN_END
+
+    # --- Dict compatibility ---
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._FIELDS:
+            val = getattr(self, key)
+            return default if val is None else val
+        if self.metadata and key in self.metadata:
+            return self.metadata[key]
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELDS: return getattr(self, key)
+        if self.metadata and key in self.metadata: return self.metadata[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.metadata is None: self.metadata = {}
+            self.metadata[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._FIELDS: return getattr(self, key) is not None
+        return bool(self.metadata) and key in self.metadata
+
+    def to_dict(self) -> dict:
+        d = {"type": self.type, "content": self.content, "seq": self.seq, "ts": self.ts, "kind": self.kind.value}
+        if self.metadata: d["metadata"] = self.metadata
+        return d
+
+    def __repr__(self):
+        preview = self.content if self.kind in (PayloadKind.TEXT, PayloadKind.PATH, PayloadKind.SIGNAL) else f"<{self.size} bytes>"
+        return f"PipelinePacket({self.type!r}, {preview!r}, seq={self.seq}, kind={self.kind.value})"
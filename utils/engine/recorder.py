@@ -0,0 +1,172 @@
+import json
+import struct
+from array import array
+from typing import Iterator, Optional
+
+DIRECTIONS = (None, "IN", "OUT")
+_DIR_CODES = {d: i for i, d in enumerate(DIRECTIONS)}
+
+BINARY_MAGIC = b"JTRC"
+BINARY_VERSION = 1
+
+class FlightRecorder:
+    """
+    Bounded, columnar ring buffer for executor trace events.
+    Event fields live in preallocated typed arrays (timestamp, node index, direction, type code, seq, byte length, edge depth),
+    so recording a packet allocates no per-event dict. Once `capacity` events are stored, the oldest are overwritten.
+
+    Text content is kept in a side table, optionally sampled (`content_sample_every`) and clipped (`content_max_chars`).
+    Rare fields (error messages, edge counters) go to a sparse `extra` table.
+
+    Read access yields plain event dicts, so it is a drop-in for the old `list[dict]` trace (`TraceEvaluator`, `len()`, indexing).
+    """
+    def __init__(self, capacity: int = 65536, content_sample_every: int = 1, content_max_chars: Optional[int] = None):
+        self.capacity = int(capacity)
+        self.content_sample_every = max(1, int(content_sample_every))
+        self.content_max_chars = content_max_chars
+
+        self._t = array('d', [0.0]) * self.capacity
+        self._node = array('H', [0]) * self.capacity
+        self._dir = array('b', [0]) * self.capacity
+        self._type = array('H', [0]) * self.capacity
+        self._seq = array('q', [0]) * self.capacity
+        self._len = array('q', [0]) * self.capacity
+        self._depth = array('i', [-1]) * self.capacity
+        self._content: dict[int, str] = {}
+        self._extra: dict[int, dict] = {}
+
+        self._nodes: list[str] = []
+        self._node_idx: dict[str, int] = {}
+        self._types: list[Optional[str]] = []
+        self._type_idx: dict[Optional[str], int] = {}
+        self.total = 0             # Events ever recorded (absolute cursor)
+        self._content_seen = 0
+
+    # --- Interning ---
+    def _intern_node(self, node: str) -> int:
+        idx = self._node_idx.get(node)
+        if idx is None:
+            idx = self._node_idx[node] = len(self._nodes)
+            self._nodes.append(node)
+        return idx
+
+    def _intern_type(self, ptype: Optional[str]) -> int:
+        idx = self._type_idx.get(ptype)
+        if idx is None:
+            idx = self._type_idx[ptype] = len(self._types)
+            self._types.append(ptype)
+        return idx
+
+    # --- Writing ---
+    def record(self, t: float, node: str, ptype: Optional[str], direction: Optional[str] = None, seq: int = 0, data_len: int = 0, content: Optional[str] = None, depth: Optional[int] = None, **extra):
+        slot = self.total % self.capacity
+        if self.total >= self.capacity:
+            self._content.pop(slot, None)
+            self._extra.pop(slot, None)
+
+        self._t[slot] = t
+        self._node[slot] = self._intern_node(node)
+        self._dir[slot] = _DIR_CODES.get(direction, 0)
+        self._type[slot] = self._intern_type(ptype)
+        self._seq[slot] = seq or 0
+        self._len[slot] = data_len or 0
+        self._depth[slot] = -1 if depth is None else depth
+
+        if content is not None:
+            if self._content_seen % self.content_sample_every == 0:
+                if self.content_max_chars is not None: content = content[:self.content_max_chars]
+                self._content[slot] = content
+            self._content_seen += 1
+        if extra:
+            self._extra[slot] = extra
+        self.total += 1
+
+    def append(self, event: dict):
+        """List-compatible entry point for ad-hoc events (`{"t", "node", "type", ...}`)."""
+        e = dict(event)
+        self.record(
+            e.pop("t"), e.pop("node"), e.pop("type", None), e.pop("dir", None),
+            e.pop("seq", 0), e.pop("data_len", 0), e.pop("content", None), e.pop("depth", None), **e
+        )
+
+    def clear(self):
+        """Forgets all events but keeps the preallocated columns."""
+        self._content.clear(); self._extra.clear()
+        self.total = 0
+        self._content_seen = 0
+
+    # --- Reading ---
+    @property
+    def dropped(self) -> int:
+        """Events overwritten by the ring."""
+        return max(0, self.total - self.capacity)
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _event(self, absolute: int) -> dict:
+        slot = absolute % self.capacity
+        e = {"t": self._t[slot], "node": self._nodes[self._node[slot]], "type": self._types[self._type[slot]]}
+        direction = DIRECTIONS[self._dir[slot]]
+        if direction:
+            e["dir"] = direction
+            e["seq"] = self._seq[slot]
+            e["content"] = self._content.get(slot)
+            e["data_len"] = self._len[slot]
+        if self._depth[slot] >= 0: e["depth"] = self._depth[slot]
+        extra = self._extra.get(slot)
+        if extra: e.update(extra)
+        return e
+
+    def __getitem__(self, i: int) -> dict:
+        n = len(self)
+        if i < 0: i += n
+        if not 0 <= i < n: raise IndexError("trace index out of range")
+        return self._event(self.dropped + i)
+
+    def __iter__(self) -> Iterator[dict]:
+        for absolute in range(self.dropped, self.total):
+            yield self._event(absolute)
+
+    def read_from(self, cursor: int) -> tuple[list[dict], int]:
+        """Returns events recorded since absolute `cursor` (skipping any already overwritten) and the new cursor."""
+        start = max(cursor, self.dropped)
+        return [self._event(a) for a in range(start, self.total)], self.total
+
+    # --- Export ---
+    def dump_ndjson(self, fp):
+        """Streams one JSON event per line; never materializes the whole trace."""
+        for e in self:
+            fp.write(json.dumps(e, default=str))
+            fp.write("\n")
+
+    def dump_binary(self, fp):
+        """
+        Writes the columns in chronological order.
+        Layout: MAGIC | u16 version | u32 header_len | JSON header | columns (t, node, dir, type, seq, len, depth).
+        The header holds the node/type tables plus the sampled content and extra tables keyed by row. Columns use native byte order.
+        """
+        start, n = self.dropped, len(self)
+        rows = [(a % self.capacity) for a in range(start, self.total)]
+        header = json.dumps({
+            "count": n, "dropped": start,
+            "nodes": self._nodes, "types": self._types, "directions": list(DIRECTIONS),
+            "columns": ["t:d", "node:H", "dir:b", "type:H", "seq:q", "len:q", "depth:i"],
+            "content": {str(r): self._content[slot] for r, slot in enumerate(rows) if slot in self._content},
+            "extra": {str(r): self._extra[slot] for r, slot in enumerate(rows) if slot in self._extra}
+        }, default=str).encode("utf-8")
+
+        fp.write(BINARY_MAGIC)
+        fp.write(struct.pack("<HI", BINARY_VERSION, len(header)))
+        fp.write(header)
+        for col in (self._t, self._node, self._dir, self._type, self._seq, self._len, self._depth):
+            if start % self.capacity == 0 or n < self.capacity:
+                col[:n].tofile(fp)
+            else:
+                split = start % self.capacity
+                col[split:].tofile(fp)
+                col[:split].tofile(fp)
+
+    @staticmethod
+    def load_ndjson(fp) -> list[dict]:
+        return [json.loads(line) for line in fp if line.strip()]
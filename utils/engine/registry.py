@@ -1,8 +1,8 @@
-from typing import Optional
+from typing import Iterable, Optional
 from .contract import NodeImplementation, IOType, Capability
 from .implementations import (
     execute_openai_chat, execute_whisper_stt, execute_chatterbox_tts,
-    execute_speaker, execute_ptt_mic, execute_notification, execute_chunker,
+    execute_speaker, execute_ptt_mic, execute_audio_preprocess, execute_notification, execute_chunker,
     execute_memory_node, execute_screen_capture, execute_camera_capture,
     execute_keyboard_typer, execute_clipboard_sensor, execute_clipboard_writer,
     execute_file_reader, validate_ptt_mic, validate_screen_capture,
@@ -14,10 +14,16 @@ class ImplementationRegistry:
     """
     Central registry for all NodeImplementations.
     Contains static (hardcoded) and dynamic (loadout-based) implementations.
+    Implementations are indexed by capability and by input/output IOType, so a lookup is an intersection
+    of id sets instead of a scan over every implementation.
     """
-    def __init__(self):
+    def __init__(self, load_static: bool = True):
         self._implementations: dict[str, NodeImplementation] = {}
-        self._load_static_implementations()
+        self._rank: dict[str, int] = {}  # Registration order, kept for deterministic results
+        self._by_cap: dict = {}
+        self._by_input: dict = {}
+        self._by_output: dict = {}
+        if load_static: self._load_static_implementations()
 
     def _load_static_implementations(self):
         # 1. Hardware / Edge Implementations
@@ -26,7 +32,7 @@ class ImplementationRegistry:
         self.register(NodeImplementation(
             id="InputMic",
             input_types=[],
-            output_types=[IOType.AUDIO_FILE],
+            output_types=[IOType.AUDIO_STREAM, IOType.AUDIO_FILE],
             execute_fn=execute_ptt_mic,
             capabilities=[Capability.AUDIO_OUT],
             validate_fn=validate_ptt_mic
@@ -110,6 +116,14 @@ class ImplementationRegistry:
             execute_fn=execute_chunker
         ))
 
+        # No capabilities on purpose: bound only via `implementation: AudioPreprocessor`, never by discovery
+        self.register(NodeImplementation(
+            id="AudioPreprocessor",
+            input_types=[IOType.AUDIO_FILE, IOType.AUDIO_STREAM],
+            output_types=[IOType.AUDIO_STREAM],
+            execute_fn=execute_audio_preprocess
+        ))
+
         self.register(NodeImplementation(
             id="ConversationMemory",
             input_types=[IOType.TEXT_FINAL],
@@ -119,7 +133,7 @@ class ImplementationRegistry:
 
         # 3. BACKWARD COMPATIBILITY (Legacy IDs)
         # We register these pointing to the same implementations to avoid breaking existing pipelines
-        self.register(NodeImplementation(id="PushToTalkMic", input_types=[], output_types=[IOType.AUDIO_FILE], execute_fn=execute_ptt_mic, capabilities=[Capability.AUDIO_OUT], validate_fn=validate_ptt_mic))
+        self.register(NodeImplementation(id="PushToTalkMic", input_types=[], output_types=[IOType.AUDIO_STREAM, IOType.AUDIO_FILE], execute_fn=execute_ptt_mic, capabilities=[Capability.AUDIO_OUT], validate_fn=validate_ptt_mic))
         self.register(NodeImplementation(id="SystemSpeaker", input_types=[IOType.AUDIO_FILE], output_types=[], execute_fn=execute_speaker, capabilities=[Capability.AUDIO_IN]))
         self.register(NodeImplementation(id="ScreenCapture", input_types=[], output_types=[IOType.IMAGE_FILE], execute_fn=execute_screen_capture, capabilities=[Capability.IMAGE_OUT], validate_fn=validate_screen_capture))
         self.register(NodeImplementation(id="KeyboardTyper", input_types=[IOType.TEXT_FINAL], output_types=[], execute_fn=execute_keyboard_typer, capabilities=[Capability.TEXT_IN], validate_fn=validate_keyboard_typer))
@@ -128,24 +142,48 @@ class ImplementationRegistry:
         self.register(NodeImplementation(id="NotificationActuator", input_types=[IOType.TEXT_FINAL], output_types=[], execute_fn=execute_notification, capabilities=[Capability.TEXT_IN]))
 
     def register(self, impl: NodeImplementation):
+        if impl.id in self._implementations: self._unindex(self._implementations[impl.id])
         self._implementations[impl.id] = impl
+        self._rank.setdefault(impl.id, len(self._rank))
+        for key, index in ((impl.capabilities, self._by_cap), (impl.input_types, self._by_input), (impl.output_types, self._by_output)):
+            for k in key: index.setdefault(_norm(k), set()).add(impl.id)
+
+    def _unindex(self, impl: NodeImplementation):
+        for key, index in ((impl.capabilities, self._by_cap), (impl.input_types, self._by_input), (impl.output_types, self._by_output)):
+            for k in key: index.get(_norm(k), set()).discard(impl.id)
+
+    def overlay(self, impls: Iterable[NodeImplementation]) -> "ImplementationRegistry":
+        """A copy of this registry with extra (e.g. loadout model) implementations; the original is untouched."""
+        out = ImplementationRegistry(load_static=False)
+        out._implementations = dict(self._implementations)
+        out._rank = dict(self._rank)
+        out._by_cap = {k: set(v) for k, v in self._by_cap.items()}
+        out._by_input = {k: set(v) for k, v in self._by_input.items()}
+        out._by_output = {k: set(v) for k, v in self._by_output.items()}
+        for impl in impls: out.register(impl)
+        return out
 
     def get(self, impl_id: str) -> Optional[NodeImplementation]:
         return self._implementations.get(impl_id)
 
+    def _select(self, *sets) -> list[NodeImplementation]:
+        ids = set.intersection(*sets) if sets else set(self._implementations)
+        return [self._implementations[i] for i in sorted(ids, key=self._rank.__getitem__)]
+
     def find_by_capability(self, caps: list[Capability]) -> list[NodeImplementation]:
         """Finds implementations that satisfy ALL required capabilities."""
-        return [
-            impl for impl in self._implementations.values()
-            if all(c in impl.capabilities for c in caps)
-        ]
+        return self._select(*(self._by_cap.get(_norm(c), set()) for c in caps))
 
     def find_by_io(self, inputs: list[IOType], outputs: list[IOType]) -> list[NodeImplementation]:
         """Finds implementations that match requested IO signatures."""
-        return [
-            impl for impl in self._implementations.values()
-            if all(i in impl.input_types for i in inputs) and all(o in impl.output_types for o in outputs)
-        ]
+        return self._select(
+            *(self._by_input.get(_norm(i), set()) for i in inputs),
+            *(self._by_output.get(_norm(o), set()) for o in outputs)
+        )
 
     def get_all(self) -> list[NodeImplementation]:
         return list(self._implementations.values())
+
+def _norm(key):
+    """Index keys are enum values, so `Capability.STT` and "stt" hit the same bucket."""
+    return key.value if hasattr(key, "value") else key
@@ -1,10 +1,11 @@
 import os
-import yaml
-import json
 from loguru import logger
 from utils.config import get_project_root, load_config
 from .binder import AutoBinder
 from .contract import MappingPreference, NodeImplementation
+from .file_cache import FileCache, CalibrationStore, file_signature, load_json_file
+from .cost import LATENCY_PROFILE, parse_preference
+from .strategy import BindingStrategy
 
 class PipelineResolver:
     def __init__(self, project_root=None, search_paths=None):
@@ -20,56 +21,55 @@ class PipelineResolver:
         self.strategies_dir = os.path.join(self.project_root, "system_config", "strategies")
         self.cal_dir = os.path.join(self.project_root, "system_config", "model_calibrations")
         self.registry_path = os.path.join(self.cal_dir, "runtime_registry.json")
+
+        # In-memory views of the files resolution depends on; each is re-parsed only when its signature changes
+        self.calibrations = CalibrationStore(self.cal_dir)
+        self._yaml_cache = FileCache()
+        self._registry_cache = FileCache(load_json_file)
+        self._resolved = {}  # (pipeline, strategy, preference, loadout) -> (fingerprint, bound graph)
         
-        self.binder = AutoBinder(self.project_root)
+        self.binder = AutoBinder(self.project_root, calibrations=self.calibrations)
 
-    def load_yaml(self, name):
-        """Searches for a YAML across the configured search paths."""
+    def find_yaml(self, name):
         clean_name = name.replace(".yaml", "")
-        
         for base in self.search_paths:
             path = os.path.join(base, f"{clean_name}.yaml")
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    return yaml.safe_load(f)
-        
+            if os.path.exists(path): return path
         raise FileNotFoundError(f"YAML '{clean_name}.yaml' not found in search paths: {self.search_paths}")
 
+    def load_yaml(self, name):
+        """Searches for a YAML across the configured search paths (parsed once per file change; returns a private copy)."""
+        return self._yaml_cache.get(self.find_yaml(name))
+
+    def strategy_path(self, strategy_name):
+        return os.path.join(self.strategies_dir, f"{str(strategy_name).replace('.yaml', '')}.yaml")
+
+    def load_strategy(self, strategy_name):
+        """Parses `system_config/strategies/<name>.yaml` (cached). Returns None when no strategy is selected or it does not exist."""
+        if not strategy_name or not isinstance(strategy_name, str): return None
+        data = self._yaml_cache.get(self.strategy_path(strategy_name), copy_result=False)
+        if not isinstance(data, dict):
+            logger.warning(f"Strategy '{strategy_name}' not found in {self.strategies_dir}; binding by preference only.")
+            return None
+        return BindingStrategy.from_dict(data, default_id=strategy_name)
+
     def get_live_models(self):
-        if not os.path.exists(self.registry_path):
-            return {"models": [], "external": 0.0, "loadout_id": "NONE"}
-        try:
-            with open(self.registry_path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content: return {"models": [], "external": 0.0, "loadout_id": "NONE"}
-                data = json.loads(content)
-                models = data.get("models", [])
-                external = data.get("external", 0.0)
-                loadout_id = data.get("loadout", "unknown")
-                for m in models:
-                    try:
-                        m['capabilities'] = self.get_model_capabilities(m['id'], m['engine'])
-                    except Exception as e:
-                        logger.error(f"Error getting caps for {m['id']}: {e}")
-                        m['capabilities'] = []
-                return {"models": models, "external": external, "loadout_id": loadout_id}
-        except Exception as e:
-            logger.error(f"Error reading registry: {e}")
-            return {"models": [], "external": 0.0, "loadout_id": "NONE"}
+        empty = {"models": [], "external": 0.0, "loadout_id": "NONE"}
+        data = self._registry_cache.get(self.registry_path)
+        if not isinstance(data, dict): return empty
+        models = data.get("models", [])
+        for m in models:
+            try:
+                m['capabilities'] = self.get_model_capabilities(m['id'], m['engine'])
+            except Exception as e:
+                logger.error(f"Error getting caps for {m['id']}: {e}")
+                m['capabilities'] = []
+        return {"models": models, "external": data.get("external", 0.0), "loadout_id": data.get("loadout", "unknown")}
 
     def get_model_capabilities(self, model_id, engine):
         """Looks up capabilities in the calibration registry."""
-        from utils.config import safe_filename
-        
-        caps = []
-        safe_id = safe_filename(model_id)
-        
-        # 1. Direct match using standard naming convention
-        cal_path = os.path.join(self.cal_dir, f"{engine}_{safe_id}.yaml")
-            
-        if os.path.exists(cal_path):
-            with open(cal_path, "r") as f:
-                caps = yaml.safe_load(f).get("capabilities", [])
+        # 1. Direct match using standard naming convention (served from the preloaded store)
+        caps = list(self.calibrations.get(model_id, engine).get("capabilities", []) or [])
 
         # 2. Engine-based defaults (ENSURE IN/OUT are present)
         if engine == "ollama" or engine == "vllm":
@@ -79,10 +79,45 @@ class PipelineResolver:
         
         return caps
 
+    def _fingerprint(self, pipeline_name, strategy_name, pref_str):
+        """
+        Cache key + validity fingerprint for a resolution: a handful of stats, no parsing.
+        Covers the pipeline YAML, the strategy, the runtime registry, the persisted bindings, the latency profile
+        (when it drives the ranking or strategy budgets) and the live models' calibrations.
+        """
+        registry = self._registry_cache.get(self.registry_path, copy_result=False)
+        registry = registry if isinstance(registry, dict) else {}
+        models = registry.get("models", [])
+        key = (pipeline_name, strategy_name, pref_str, registry.get("loadout", "NONE"))
+        uses_latency = pref_str == 'prefer_fast' or bool(strategy_name)
+        fingerprint = (
+            file_signature(self.find_yaml(pipeline_name)),
+            file_signature(self.strategy_path(strategy_name)) if strategy_name else None,
+            file_signature(self.registry_path),
+            file_signature(self.binder.cache_path),
+            file_signature(os.path.join(self.project_root, LATENCY_PROFILE)) if uses_latency else None,
+            tuple(file_signature(self.calibrations.path_for(m.get('id', ''), m.get('engine', ''))) for m in models)
+        )
+        return key, fingerprint
+
+    def invalidate(self):
+        self._resolved.clear()
+
+    def cached(self, pipeline_name, strategy_name=None):
+        """The memoized result of `resolve(pipeline_name, strategy_name)` if its fingerprint still holds, else None."""
+        if os.environ.get('JARVIS_MOCK_ALL') == "1": return None  # Mock bindings are never memoized
+        key, fingerprint = self._fingerprint(pipeline_name, strategy_name, self.cfg.get('mapping_preference', 'prefer_big'))
+        cached = self._resolved.get(key)
+        if cached and cached[0] == fingerprint:
+            return {nid: node.copy() for nid, node in cached[1].items()}
+        return None
+
     def resolve(self, pipeline_name, strategy_name=None, overrides=None, silent=False):
         """
         Binds a pipeline to live models using the AutoBinder.
-        Hierarchy: Manual Overrides > YAML Override > Persistent Cache > Physics Heuristic.
+        Hierarchy: Manual Overrides > YAML Override > Persistent Cache > Strategy Candidates > Physics Heuristic.
+        Results without overrides are memoized until one of the underlying files changes; every call
+        returns fresh node dicts so callers may annotate them.
         """
         if os.environ.get('JARVIS_MOCK_ALL') == "1":
             if overrides is None: overrides = {}
@@ -93,14 +128,24 @@ class PipelineResolver:
                 if nid not in overrides:
                     overrides[nid] = get_mock_implementation(f"mock_{nid}", node.get('role', 'unknown'))
 
+        if overrides is None:
+            cached = self.cached(pipeline_name, strategy_name)
+            if cached is not None: return cached
+            key, fingerprint = self._fingerprint(pipeline_name, strategy_name, self.cfg.get('mapping_preference', 'prefer_big'))
+            bound_nodes = self._resolve_uncached(pipeline_name, strategy_name, None, silent)
+            self._resolved[key] = (fingerprint, bound_nodes)
+            return {nid: node.copy() for nid, node in bound_nodes.items()}
+        return self._resolve_uncached(pipeline_name, strategy_name, overrides, silent)
+
+    def _resolve_uncached(self, pipeline_name, strategy_name=None, overrides=None, silent=False):
         pipeline = self.load_yaml(pipeline_name)
         live_data = self.get_live_models()
         live_models = live_data.get("models", [])
         loadout_id = live_data.get("loadout_id", "unknown")
         
-        # Determine Preference
+        # Determine Preference (prefer_big | prefer_small | prefer_fast)
         pref_str = self.cfg.get('mapping_preference', 'prefer_big')
-        preference = MappingPreference.PREFER_BIG if pref_str == 'prefer_big' else MappingPreference.PREFER_SMALL
+        preference = parse_preference(pref_str)
         
         # Generate Binding Manifest via AutoBinder
         manifest = self.binder.generate_manifest(
@@ -110,7 +155,8 @@ class PipelineResolver:
             preference=preference,
             loadout_id=loadout_id,
             overrides=overrides,
-            silent=silent
+            silent=silent,
+            strategy=self.load_strategy(strategy_name)
         )
         
         bound_nodes = {}
@@ -128,7 +174,7 @@ class PipelineResolver:
                 if node.get('type') == 'processing' and node.get('role') not in ['utility', 'memory']:
                     if not silent: logger.error(f"❌ ARCH_MISMATCH: No model found for {nid}")
 
-        if not silent: logger.info(f"✅ Resolved '{pipeline_name}' via AutoBinder [Pref: {pref_str}]")
+        if not silent: logger.info(f"✅ Resolved '{pipeline_name}' via AutoBinder [Strategy: {strategy_name or 'none'}, Pref: {pref_str}]")
         return bound_nodes
 
     def check_runnability(self, pipeline_name, strategy_name=None, external_health=None, silent=False):
@@ -179,7 +225,7 @@ class PipelineResolver:
                     "model": binding.id,
                     "port": port
                 }
-                if svc_info['status'] != "ON":
+                if svc_info['status'] not in ("ON", "BUSY"):  # A busy service is serving requests, not unavailable
                     report["runnable"] = False
                     report["errors"].append(f"Service for '{nid}' ({binding.id} on port {port}) is {svc_info['status']}.")
             else:
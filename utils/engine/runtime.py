@@ -0,0 +1,158 @@
+import time
+import asyncio
+import threading
+from typing import Any, Optional
+from concurrent.futures import Future
+import aiohttp
+from loguru import logger
+
+class RunHandle:
+    """
+    One in-flight turn on the runtime loop.
+    `cancel()` (any thread) or `await cancel_async()` (on the loop) cancels the turn's task. Cancellation propagates
+    through every node task, so model requests are closed and queued audio is flushed. Both return True once the
+    turn has fully unwound, or False if that took longer than `timeout`.
+    """
+    def __init__(self, task: asyncio.Task, turn: int):
+        self.task = task
+        self.turn = turn
+        self.cancel_reason: Optional[str] = None
+        self.started_t = time.perf_counter()
+        self._finished = threading.Event()
+        task.add_done_callback(lambda _: self._finished.set())
+
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def cancelled(self) -> bool:
+        return self.done() and self.task.cancelled()
+
+    def cancel(self, reason: str = "cancelled", timeout: Optional[float] = None) -> bool:
+        if not self.done():
+            self.cancel_reason = reason
+            self.task.get_loop().call_soon_threadsafe(self.task.cancel, reason)
+        return self._finished.wait(timeout)
+
+    async def cancel_async(self, reason: str = "cancelled", timeout: Optional[float] = None) -> bool:
+        if not self.done():
+            self.cancel_reason = reason
+            self.task.cancel(reason)
+            await asyncio.wait({self.task}, timeout=timeout)
+        return self.done()
+
+    async def wait(self) -> Any:
+        """Awaits the turn without propagating cancellation into it."""
+        return await asyncio.shield(self.task)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Blocks (off the loop) until the turn finishes; raises CancelledError if it was cancelled."""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"Turn {self.turn} still running after {timeout}s")
+        return self.task.result()
+
+class PipelineRuntime:
+    """
+    Long-lived host for pipeline turns.
+    Owns one event loop on a dedicated thread and one aiohttp session whose keep-alive connector pools
+    connections per model port, so a turn reuses warm TCP connections instead of paying for loop, DNS and
+    handshake setup. Bound graphs come from the resolver's cache, which is keyed on the pipeline, strategy,
+    registry and calibration files, so edits to any of them are picked up on the next turn. Each turn re-arms the node tasks and
+    channels on the warm loop (`PipelineExecutor.run`), so turn start is just packet dispatch. Pipelines declared
+    `mode: continuous` instead keep one graph alive across turns (`begin_continuous`).
+    """
+    def __init__(self, executor, resolver=None, limit_per_host: int = 8, keepalive_timeout: float = 60.0):
+        self.executor = executor
+        self.resolver = resolver
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.turns = 0
+        self._handle_seq = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="pipeline-runtime", daemon=True)
+        self._thread.start()
+        self.call(self._open_session())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host, keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def _close_session(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    # --- Loop access (thread-safe) ---
+    def spawn(self, coro) -> Future:
+        """Schedules a coroutine on the runtime loop and returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro, timeout: Optional[float] = None) -> Any:
+        """Runs a coroutine on the runtime loop and blocks the calling thread until it finishes."""
+        return self.spawn(coro).result(timeout)
+
+    # --- Graph cache ---
+    def cached_graph(self, pipeline_id: str, strategy: Optional[str] = None) -> Optional[dict]:
+        """The resolver's cached binding if it is still current (a few file stats), else None."""
+        return self.resolver.cached(pipeline_id, strategy)
+
+    def prepare(self, pipeline_id: str, strategy: Optional[str] = None, silent: bool = False) -> dict:
+        """Returns the bound graph for a pipeline, resolving it only when missing or stale. Blocking; call it off the loop."""
+        return self.resolver.resolve(pipeline_id, strategy_name=strategy, silent=silent)
+
+    async def graph(self, pipeline_id: str, strategy: Optional[str] = None) -> dict:
+        """Loop-side access to `prepare`: a cache hit never leaves the loop, a miss resolves in a worker thread."""
+        graph = self.cached_graph(pipeline_id, strategy)
+        if graph is not None: return graph
+        return await asyncio.to_thread(self.prepare, pipeline_id, strategy)
+
+    def invalidate(self):
+        self.resolver.invalidate()
+
+    # --- Turns ---
+    async def run_turn(self, bound_graph: dict, scenario_inputs: dict) -> bool:
+        """Executes one turn on the warm loop with the pooled session."""
+        self.turns += 1
+        return await self.executor.run(bound_graph, scenario_inputs, session=self.session)
+
+    def begin_turn(self, bound_graph: dict, scenario_inputs: dict) -> RunHandle:
+        """Starts a turn as a cancellable task. Must be called on the runtime loop."""
+        self._handle_seq += 1
+        return RunHandle(self.loop.create_task(self.run_turn(bound_graph, scenario_inputs)), self._handle_seq)
+
+    async def run_continuous(self, bound_graph: dict, scenario_inputs: dict, max_turns: Optional[int] = None) -> bool:
+        """Keeps one always-on graph alive on the warm loop (see `PipelineExecutor.run_continuous`)."""
+        self.turns += 1
+        return await self.executor.run_continuous(bound_graph, scenario_inputs, session=self.session, max_turns=max_turns)
+
+    def begin_continuous(self, bound_graph: dict, scenario_inputs: dict, max_turns: Optional[int] = None) -> RunHandle:
+        """Starts an always-on graph as a cancellable task. Must be called on the runtime loop."""
+        self._handle_seq += 1
+        return RunHandle(self.loop.create_task(self.run_continuous(bound_graph, scenario_inputs, max_turns)), self._handle_seq)
+
+    def submit(self, bound_graph: dict, scenario_inputs: dict) -> RunHandle:
+        """Thread-safe `begin_turn`."""
+        async def _begin():
+            return self.begin_turn(bound_graph, scenario_inputs)
+        return self.call(_begin())
+
+    def reset_connections(self):
+        """Drops pooled connections, e.g. after model servers were restarted on the same ports."""
+        async def _reset():
+            await self._close_session()
+            await self._open_session()
+        self.call(_reset())
+
+    def close(self):
+        if self.loop.is_closed(): return
+        try:
+            self.call(self._close_session(), timeout=5.0)
+        except Exception as e:
+            logger.warning(f"Pipeline runtime session close failed: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5.0)
+        if not self.loop.is_running(): self.loop.close()
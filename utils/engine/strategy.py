@@ -0,0 +1,97 @@
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+from loguru import logger
+from .contract import NodeImplementation
+from .cost import LatencyProfile
+
+# Older loadouts prefixed vLLM vision models with "VL_" (e.g. "VL_QuantTrio/Qwen3-VL-30B-A3B-Instruct-AWQ")
+_LEGACY_PREFIXES = ("vl-",)
+
+def model_key(model_id: str) -> str:
+    """Loose model identity: lowercase with every separator (':', '/', '_', ' ', '--') folded to a single '-'."""
+    key = re.sub(r"[\s:/_\-]+", "-", str(model_id or "").lower()).strip("-")
+    for prefix in _LEGACY_PREFIXES:
+        if key.startswith(prefix): key = key[len(prefix):]
+    return key
+
+@dataclass
+class NodeStrategy:
+    """Candidate models for one node, best first, and the latency the node may spend (seconds, None = unbounded)."""
+    candidates: list[str] = field(default_factory=list)
+    budget_s: Optional[float] = None
+
+@dataclass
+class BindingStrategy:
+    """
+    A `system_config/strategies/*.yaml` document.
+    `bindings` maps node ids to their candidate lists and per-node budgets; `e2e_budget_s` caps the sum of the
+    estimated latencies of the nodes the strategy binds.
+    """
+    id: str
+    description: str = ""
+    bindings: dict[str, NodeStrategy] = field(default_factory=dict)
+    e2e_budget_s: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, default_id: str = "unknown") -> "BindingStrategy":
+        bindings = {}
+        for nid, spec in (data.get('bindings') or {}).items():
+            spec = spec or {}
+            budget = spec.get('latency_budget_s')
+            bindings[nid] = NodeStrategy(
+                candidates=[str(c) for c in spec.get('candidates', []) or []],
+                budget_s=float(budget) if budget is not None else None
+            )
+        e2e = data.get('e2e_budget_s')
+        return cls(
+            id=data.get('id', default_id),
+            description=data.get('description', ""),
+            bindings=bindings,
+            e2e_budget_s=float(e2e) if e2e is not None else None
+        )
+
+@dataclass
+class StrategyPick:
+    """Outcome of binding one node from its strategy: the live candidates (in strategy order) and the chosen one."""
+    node: dict
+    live: list[NodeImplementation]
+    chosen: NodeImplementation
+    estimate: Optional[float]
+
+def pick_within_budget(node: dict, live: list[NodeImplementation], budget_s: Optional[float], profile: LatencyProfile, silent: bool = False) -> StrategyPick:
+    """
+    First live candidate whose measured latency fits the node budget. Unmeasured candidates are taken on trust,
+    since nothing shows them over budget. If every candidate is measured over budget, the fastest one wins.
+    """
+    role = node.get('role')
+    estimates = [profile.estimate(impl.id, role) for impl in live]
+    for impl, est in zip(live, estimates):
+        if budget_s is None or est is None or est <= budget_s:
+            return StrategyPick(node, live, impl, est)
+    best = min(range(len(live)), key=lambda i: estimates[i])
+    if not silent:
+        logger.warning(f"⏱️ No candidate for {node['id']} fits its {budget_s:.2f}s budget; using fastest '{live[best].id}' ({estimates[best]:.2f}s)")
+    return StrategyPick(node, live, live[best], estimates[best])
+
+def enforce_e2e_budget(picks: dict[str, StrategyPick], budget_s: Optional[float], profile: LatencyProfile, silent: bool = False) -> float:
+    """
+    Greedily swaps nodes to faster measured candidates until the summed estimate fits `budget_s`.
+    Each step takes the single swap that saves the most time. Returns the final estimated total.
+    """
+    total = sum(p.estimate or 0.0 for p in picks.values())
+    while budget_s is not None and total > budget_s:
+        best = None  # (saving, nid, impl, estimate)
+        for nid, pick in picks.items():
+            if pick.estimate is None: continue
+            for impl in pick.live:
+                est = profile.estimate(impl.id, pick.node.get('role'))
+                if est is not None and est < pick.estimate and (best is None or pick.estimate - est > best[0]):
+                    best = (pick.estimate - est, nid, impl, est)
+        if best is None:
+            if not silent: logger.warning(f"⏱️ Estimated {total:.2f}s exceeds the {budget_s:.2f}s end-to-end budget; no faster candidates left.")
+            break
+        _, nid, impl, est = best
+        picks[nid].chosen, picks[nid].estimate = impl, est
+        total = sum(p.estimate or 0.0 for p in picks.values())
+    return total
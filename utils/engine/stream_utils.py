@@ -1,47 +1,127 @@
-import re
-import time
 from loguru import logger
+from .packet import PipelinePacket
 
-async def chunk_by_delimiter(input_packet_stream, delimiters=".?!", min_length=1):
+# Lowercased words that end with a period without ending the sentence
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "approx",
+    "inc", "ltd", "co", "corp", "dept", "est", "fig", "no", "vol", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "a.m", "p.m", "u.s", "u.k"
+})
+CLOSERS = "\"')]}»”’"
+
+class SentenceSegmenter:
+    """
+    Incremental sentence splitter for token streams.
+    Each character is scanned once: the buffer only holds the current, not-yet-emitted sentence and
+    scanning resumes where it stopped. Boundaries that depend on the next character ("3." vs "3.5",
+    "Dr." vs end of sentence, "..." followed by lowercase) are deferred until that character arrives.
+
+    `first_chunk_chars`: if set, the very first chunk may end on a clause delimiter (",;:") once it is
+    at least that long, so TTS can start speaking before the first full sentence is complete.
     """
-    Consumes an async generator of PipelinePackets (tokens) 
+    def __init__(self, delimiters=".?!", min_length=1, first_chunk_chars=None, first_chunk_delimiters=",;:"):
+        self.delimiters = delimiters
+        self.min_length = max(1, int(min_length))
+        self.first_chunk_chars = first_chunk_chars
+        self.first_chunk_delimiters = first_chunk_delimiters
+        self.emitted = 0
+        self._text = ""
+        self._scan = 0
+
+    def feed(self, token):
+        """Consumes a token and returns the list of sentences it completed."""
+        self._text += token
+        out = []
+        while True:
+            end = self._next_boundary()
+            if end is None: break
+            out.append(self._text[:end].strip())
+            self._text = self._text[end:]
+            self._scan = 0
+            self.emitted += 1
+        return out
+
+    def flush(self):
+        """Returns whatever is left once the stream is over."""
+        tail = self._text.strip()
+        self._text, self._scan = "", 0
+        return tail
+
+    def _is_abbreviation(self, dot_idx):
+        t = self._text
+        s = dot_idx
+        while s > 0 and (t[s - 1].isalpha() or t[s - 1] == "."): s -= 1
+        word = t[s:dot_idx]
+        if not word: return False
+        # Single capital letters are initials ("J. R. R. Tolkien")
+        return word.lower() in ABBREVIATIONS or (len(word) == 1 and word.isupper())
+
+    def _long_enough(self, end):
+        return len(self._text[:end].strip()) >= self.min_length
+
+    def _next_boundary(self):
+        """Returns the end offset of the next complete chunk, or None if more input is needed."""
+        t, n, i = self._text, len(self._text), self._scan
+        clause_ok = self.first_chunk_chars is not None and self.emitted == 0
+
+        while i < n:
+            c = t[i]
+            if c in self.delimiters:
+                # Consume the whole delimiter run ("?!", "...") and any closing quotes/brackets
+                j = i
+                while j + 1 < n and t[j + 1] in self.delimiters: j += 1
+                k = j + 1
+                while k < n and t[k] in CLOSERS: k += 1
+                if k >= n:
+                    self._scan = i
+                    return None
+                if not t[k].isspace():
+                    i = k  # "3.5", "e.g.x", "U.S" -> not a boundary
+                    continue
+                if c == "." and j == i and self._is_abbreviation(i):
+                    i = k
+                    continue
+                if c == "." and j > i:
+                    # Ellipsis: only a boundary if the next word starts a new sentence
+                    m = k
+                    while m < n and t[m].isspace(): m += 1
+                    if m >= n:
+                        self._scan = i
+                        return None
+                    if t[m].islower():
+                        i = m
+                        continue
+                if self._long_enough(k): return k
+                i = k
+                continue
+
+            if clause_ok and c in self.first_chunk_delimiters and i + 1 >= self.first_chunk_chars:
+                if i + 1 >= n:
+                    self._scan = i
+                    return None
+                if t[i + 1].isspace() and self._long_enough(i + 1): return i + 1
+            i += 1
+
+        self._scan = n
+        return None
+
+async def chunk_by_delimiter(input_packet_stream, delimiters=".?!", min_length=1, first_chunk_chars=None, first_chunk_delimiters=",;:"):
+    """
+    Consumes an async generator of PipelinePackets (tokens)
     and yields packets (sentences) based on delimiters.
+    Chunks shorter than `min_length` are merged into the following one.
     """
-    buffer = ""
-    pattern = f"([{re.escape(delimiters)}])"
+    segmenter = SentenceSegmenter(delimiters, min_length, first_chunk_chars, first_chunk_delimiters)
     seq = 0
-    
+
     async for packet in input_packet_stream:
         token = packet.get('content', '')
         if not token: continue
-        buffer += token
-        
-        # Split but keep delimiters
-        parts = re.split(pattern, buffer)
-        
-        # re.split with capture group keeps delimiters in the list
-        while len(parts) > 2:
-            chunk = (parts[0] + parts[1]).strip()
-            if len(chunk) >= min_length:
-                yield {
-                    "type": "text_sentence",
-                    "content": chunk,
-                    "seq": seq,
-                    "ts": time.perf_counter(),
-                    "metadata": {"source_seq": packet.get('seq')}
-                }
-                seq += 1
-            
-            # Rebuild buffer with remaining parts
-            buffer = "".join(parts[2:])
-            parts = re.split(pattern, buffer)
-            
+        for chunk in segmenter.feed(token):
+            yield PipelinePacket.text("text_sentence", chunk, seq, metadata={"source_seq": packet.get('seq')})
+            seq += 1
+
     # Yield remaining buffer
-    final_chunk = buffer.strip()
+    final_chunk = segmenter.flush()
     if final_chunk:
-        yield {
-            "type": "text_sentence",
-            "content": final_chunk,
-            "seq": seq,
-            "ts": time.perf_counter()
-        }
+        yield PipelinePacket.text("text_sentence", final_chunk, seq)
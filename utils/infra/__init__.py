@@ -4,3 +4,4 @@ from .process import start_server, wait_for_port, kill_jarvis_ports, kill_proces
 from .docker import stop_vllm_docker, is_docker_daemon_running, is_vllm_docker_running, is_vllm_model_local, get_vllm_logs
 from .logs import check_log_for_errors, get_ollama_log_path
 from .session import init_session
+from .disconnect import ClientDisconnected, await_job
@@ -0,0 +1,29 @@
+import asyncio
+from concurrent.futures import Future
+from typing import Any, Optional
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before its worker job finished."""
+
+async def wait_for_disconnect(request, interval: float = 0.1):
+    """Returns once the client of a Starlette `request` has disconnected (polled; the body must already be read)."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+
+async def await_job(future: Future, request=None) -> Any:
+    """
+    Awaits a model worker job on behalf of a request handler.
+    If the client disconnects first, or the handler itself is cancelled, the job's future is cancelled so the
+    worker skips it instead of spending GPU time on a result nobody will read. A job the worker already started
+    runs to completion. Raises ClientDisconnected when the client left.
+    """
+    done = asyncio.wrap_future(future)
+    if request is None: return await done
+    watcher = asyncio.create_task(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({done, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not done.done(): done.cancel()  # Propagates to the worker's concurrent Future
+    if done.cancelled(): raise ClientDisconnected()
+    return done.result()